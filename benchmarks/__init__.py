@@ -0,0 +1 @@
+"""Micro-benchmarks for TrainWreck; run with `python -m benchmarks --help`."""
@@ -0,0 +1,345 @@
+"""
+Micro-benchmarks for TrainWreck's hot paths.
+
+Everything runs locally: LLM calls go to MockLLMServer, MCP calls to
+fake_mcp_server.py, and the feedback loop works on a throwaway git repo.
+Results are printed as a table and, with --output, written as JSON so runs
+can be compared; --baseline compares against such a file and exits with
+status 1 if any median got slower by more than --tolerance.
+
+    python -m benchmarks --output bench.json
+    python -m benchmarks --only loop,memory --baseline bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.mock_llm import MockLLMServer
+from trainwreck.agent.executor import Executor
+from trainwreck.agent.loop import FeedbackLoop
+from trainwreck.agent.planner import Planner
+from trainwreck.agent.reflector import Reflector
+from trainwreck.llm.factory import make_llm_client
+from trainwreck.memory.recorder import MemoryRecorder
+from trainwreck.memory.sqlite_store import SQLiteMemoryStore
+from trainwreck.tools.bash import BashExecutor
+from trainwreck.tools.mcp import MCPClient
+
+FAKE_MCP_SERVER = Path(__file__).with_name("fake_mcp_server.py")
+
+# Providers served by MockLLMServer, and the variable pointing each client at it
+LLM_PROVIDERS = {
+    "ollama": "OLLAMA_BASE_URL",
+    "vllm": "VLLM_BASE_URL",
+    "hf_tgi": "HF_TGI_BASE_URL",
+    "llamacpp": "LLAMACPP_BASE_URL",
+    "koboldcpp": "KOBOLDCPP_BASE_URL",
+}
+
+Results = dict[str, dict[str, Any]]
+
+
+@dataclass
+class BenchConfig:
+    iterations: int = 50
+    loop_iterations: int = 10
+    memory_steps: int = 1000
+    latency: float = 0.0
+    tokens_per_second: float | None = None
+
+
+def _stats(samples_ms: list[float]) -> dict[str, Any]:
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "min_ms": round(ordered[0], 4),
+    }
+
+
+def _measure(fn: Callable[[], Any], iterations: int, warmup: int = 1, per: int = 1) -> dict[str, Any]:
+    """Time `fn` `iterations` times after `warmup` untimed calls; `per` divides each sample (ms per operation)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000 / per)
+    return _stats(samples)
+
+
+@contextlib.contextmanager
+def _env(**values: str) -> Iterator[None]:
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _git_repo(path: Path) -> Path:
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+    subprocess.run([*git, "init", "-q", str(path)], check=True)
+    (path / "README.md").write_text("# Benchmark repo\n")
+    subprocess.run([*git, "add", "README.md"], cwd=path, check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "Initial commit"], cwd=path, check=True)
+    return path
+
+
+def _step(run_id: str, iteration: int, output_bytes: int = 200) -> dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "iteration": iteration,
+        "plan": {"action": "bash", "description": f"Run step {iteration}", "command": "make test"},
+        "result": {"returncode": 1, "stdout": "x" * output_bytes, "stderr": "FAILED test_bench.py"},
+        "reflection": {"feedback": "Step failed", "score": 0.3},
+        "score": 0.3,
+        "description": f"Run step {iteration}",
+        "outcome": "Step failed",
+    }
+
+
+def bench_llm(config: BenchConfig) -> Results:
+    """Round trip through each HTTP client to the mock server, blocking and streamed."""
+    results: Results = {}
+    messages = [{"role": "user", "content": "Plan the next step."}]
+    with MockLLMServer(latency=config.latency, tokens_per_second=config.tokens_per_second) as server:
+        for provider, variable in LLM_PROVIDERS.items():
+            with _env(**{variable: server.base_url}), make_llm_client(provider) as llm:
+                results[f"llm.{provider}.chat"] = _measure(lambda: llm.chat(messages), config.iterations)
+                results[f"llm.{provider}.stream_chat"] = _measure(
+                    lambda: "".join(llm.stream_chat(messages)), config.iterations
+                )
+    return results
+
+
+def bench_loop(config: BenchConfig) -> Results:
+    """
+    FeedbackLoop.iterate per iteration against a zero-latency mock LLM, so
+    what is measured is the loop's own overhead (prompt, git state,
+    execution, reflection, persistence), with each kind of memory.
+    """
+    results: Results = {}
+    repeats = max(3, config.iterations // 10)
+    with tempfile.TemporaryDirectory() as tmp, MockLLMServer() as server, _env(OLLAMA_BASE_URL=server.base_url):
+        repo = _git_repo(Path(tmp) / "repo")
+        db_path = Path(tmp) / "bench.db"
+        memories: dict[str, Callable[[], Any]] = {
+            "none": lambda: None,
+            "sqlite": lambda: SQLiteMemoryStore(db_path),
+            "recorder": lambda: MemoryRecorder(lambda: SQLiteMemoryStore(db_path)),
+        }
+        for name, make_memory in memories.items():
+            samples = []
+            for repeat in range(repeats + 1):
+                memory = make_memory()
+                llm = make_llm_client("ollama")
+                executor = Executor(repo_path=repo)
+                loop = FeedbackLoop(Planner(llm=llm), executor, Reflector(), memory=memory)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    loop.iterate("Benchmark the loop", max_iters=config.loop_iterations)
+                    if memory is not None:
+                        memory.close()
+                elapsed = (time.perf_counter() - start) * 1000
+                executor.close()
+                llm.close()
+                if repeat:  # the first run warms up imports and the git cache
+                    samples.append(elapsed / config.loop_iterations)
+            results[f"loop.iteration.memory_{name}"] = _stats(samples)
+    return results
+
+
+def bench_prompt(config: BenchConfig) -> Results:
+    """Planner prompt assembly for growing histories."""
+    results: Results = {}
+    planner = Planner(llm=make_llm_client("ollama"))
+    repo_state = "Branch: main\nModified files:\n" + "\n".join(f"  src/module_{i}.py" for i in range(20))
+    for size in (10, 100, 1000):
+        history = [_step("bench", i, output_bytes=4000) for i in range(size)]
+        context = {"repo_state": repo_state, "history": history, "run_id": "bench"}
+        results[f"prompt.build.history_{size}"] = _measure(
+            lambda context=context: planner._build_prompt("Make the tests pass", context), config.iterations
+        )
+    planner.llm.close()
+    return results
+
+
+def bench_memory(config: BenchConfig) -> Results:
+    """SQLiteMemoryStore write and read cost per step, and what queueing on a MemoryRecorder costs the caller."""
+    results: Results = {}
+    steps = config.memory_steps
+    repeats = max(3, config.iterations // 10)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteMemoryStore(Path(tmp) / "bench.db")
+
+        def write(output_bytes: int) -> Callable[[], None]:
+            def run() -> None:
+                run_id = store.start_run("Benchmark writes")
+                for i in range(steps):
+                    store.add_step(_step(run_id, i, output_bytes))
+                store.flush()
+
+            return run
+
+        results["memory.write"] = _measure(write(200), repeats, per=steps)
+        results["memory.write.large_output"] = _measure(write(64 * 1024), repeats, per=steps)
+        results["memory.read.recent_100"] = _measure(lambda: store.get_history(limit=100), config.iterations, per=100)
+        stored = sum(1 for _ in store.iter_history())
+        results["memory.read.scan"] = _measure(lambda: sum(1 for _ in store.iter_history()), repeats, per=stored)
+        store.close()
+
+        recorder = MemoryRecorder(lambda: SQLiteMemoryStore(Path(tmp) / "recorder.db"))
+        run_id = recorder.start_run("Benchmark recorder")
+        step = _step(run_id, 0)
+        # Faster than the database can keep up with, so this includes waiting once the queue is full
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["memory.recorder.add_step"] = _measure(lambda: recorder.add_step(step), steps, warmup=10)
+        recorder.close()
+    return results
+
+
+def bench_mcp(config: BenchConfig) -> Results:
+    """Tool call round trip to a stdio MCP server, and the cost of starting one."""
+    command = [sys.executable, str(FAKE_MCP_SERVER)]
+    results: Results = {}
+    client = MCPClient(server_command=command)
+    results["mcp.call_tool"] = _measure(lambda: client.call_tool("echo", {"text": "ping"}), config.iterations)
+    client.close()
+
+    def start_and_close() -> None:
+        MCPClient(server_command=command).close()
+
+    results["mcp.start"] = _measure(start_and_close, max(3, config.iterations // 10))
+    return results
+
+
+def bench_spawn(config: BenchConfig) -> Results:
+    """Cost of running a trivial command: raw subprocess, BashExecutor, and a persistent shell session."""
+    results: Results = {}
+    results["spawn.subprocess"] = _measure(lambda: subprocess.run(["true"]), config.iterations)
+    bash = BashExecutor()
+    results["spawn.bash_executor"] = _measure(lambda: bash.run("true"), config.iterations)
+    session = BashExecutor(session=True)
+    results["spawn.shell_session"] = _measure(lambda: session.run("true"), config.iterations)
+    session.close()
+    return results
+
+
+BENCHMARKS: dict[str, Callable[[BenchConfig], Results]] = {
+    "llm": bench_llm,
+    "loop": bench_loop,
+    "prompt": bench_prompt,
+    "memory": bench_memory,
+    "mcp": bench_mcp,
+    "spawn": bench_spawn,
+}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> list[str]:
+    """Benchmarks whose median is more than `tolerance` (a fraction) slower than in `baseline`."""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before or not before.get("p50_ms"):
+            continue
+        change = stats["p50_ms"] / before["p50_ms"] - 1
+        if change > tolerance:
+            regressions.append(f"{name}: {before['p50_ms']:.3f}ms -> {stats['p50_ms']:.3f}ms ({change:+.1%})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run TrainWreck micro-benchmarks.")
+    parser.add_argument("--only", help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--iterations", type=int, default=50, help="Samples per measurement")
+    parser.add_argument("--loop-iterations", type=int, default=10, help="Feedback loop iterations per run")
+    parser.add_argument("--memory-steps", type=int, default=1000, help="Steps written per memory measurement")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock LLM delay before responding, in seconds")
+    parser.add_argument("--tokens-per-second", type=float, help="Mock LLM streaming rate (default: unthrottled)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    config = BenchConfig(
+        iterations=args.iterations,
+        loop_iterations=args.loop_iterations,
+        memory_steps=args.memory_steps,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+    )
+
+    results: Results = {}
+    for name in selected:
+        print(f"⏱️  {name}...", file=sys.stderr)
+        results.update(BENCHMARKS[name](config))
+
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'p50 ms':>10}  {'p95 ms':>10}  {'mean ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<{width}}  {stats['p50_ms']:>10.3f}  {stats['p95_ms']:>10.3f}  {stats['mean_ms']:>10.3f}")
+
+    if args.output:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(config),
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"💾 Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"✅ No regressions beyond {args.tolerance:.0%}", file=sys.stderr)
+    return 0
@@ -0,0 +1,26 @@
+"""Minimal stdio MCP server for benchmarks: one `echo` tool that returns its arguments."""
+
+from __future__ import annotations
+
+import json
+import sys
+
+
+def main() -> None:
+    for line in sys.stdin:
+        request = json.loads(line)
+        if "id" not in request:
+            continue  # notification
+        method = request.get("method")
+        if method == "tools/list":
+            result = {"tools": [{"name": "echo", "description": "Return the arguments unchanged"}]}
+        elif method == "tools/call":
+            result = {"content": [{"type": "text", "text": json.dumps(request["params"].get("arguments", {}))}]}
+        else:
+            result = {}
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+# A step that fails cheaply (the file does not exist), so the loop never stops early
+DEFAULT_PLAN = {
+    "action": "read_file",
+    "description": "Read the benchmark notes",
+    "file_path": "BENCHMARK-NOTES-missing.md",
+}
+
+
+def _fake_embedding(text: str, dim: int = 16) -> list[float]:
+    digest = hashlib.sha256(text.encode()).digest()
+    return [(digest[i % len(digest)] - 128) / 128 for i in range(dim)]
+
+
+class MockLLMServer:
+    """
+    Local stand-in for the LLM servers TrainWreck talks to, answering every
+    request with `response` (by default a JSON step plan).
+
+    Serves the Ollama (/api/chat, /api/generate, /api/embed), OpenAI-compatible
+    (/v1/chat/completions, /v1/completions, /v1/embeddings), TGI/TEI
+    (/generate, /generate_stream, /embed), llama.cpp (/completion) and
+    KoboldCpp (/api/v1/generate) routes, streaming where the real server
+    does. `latency` delays the first byte and `tokens_per_second` paces
+    streamed tokens (about 4 characters each).
+    """
+
+    def __init__(
+        self,
+        response: str | None = None,
+        latency: float = 0.0,
+        tokens_per_second: float | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.response = response if response is not None else json.dumps(DEFAULT_PLAN)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> MockLLMServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> MockLLMServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def tokens(self) -> Iterator[str]:
+        """The response split into ~4-character tokens, paced at `tokens_per_second`."""
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for start in range(0, len(self.response), 4):
+            if delay:
+                time.sleep(delay)
+            yield self.response[start : start + 4]
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                # Like real servers; otherwise Nagle's algorithm adds ~40ms between headers and body
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *_args: Any) -> None:
+                return None
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                mock.requests += 1
+                if mock.latency:
+                    time.sleep(mock.latency)
+                route = ROUTES.get(self.path)
+                if route is None:
+                    self._send_json({"error": f"unknown route {self.path}"}, status=404)
+                    return
+                route(self, body)
+
+            def _send_json(self, payload: Any, status: int = 200) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, content_type: str, events: Iterator[bytes]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event in events:
+                    self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _ndjson(self, frames: Iterator[dict[str, Any]]) -> None:
+                self._send_stream("application/x-ndjson", (json.dumps(f).encode() + b"\n" for f in frames))
+
+            def _sse(self, frames: Iterator[Any], done: bool = False) -> None:
+                def events() -> Iterator[bytes]:
+                    for frame in frames:
+                        yield f"data: {json.dumps(frame)}\n\n".encode()
+                    if done:
+                        yield b"data: [DONE]\n\n"
+
+                self._send_stream("text/event-stream", events())
+
+            # Ollama
+            def ollama_chat(self, body: dict[str, Any]) -> None:
+                if not body.get("stream", True):
+                    self._send_json({"message": {"role": "assistant", "content": mock.response}, "done": True})
+                    return
+                frames = ({"message": {"role": "assistant", "content": t}, "done": False} for t in mock.tokens())
+                self._ndjson(_then(frames, {"message": {"role": "assistant", "content": ""}, "done": True}))
+
+            def ollama_generate(self, body: dict[str, Any]) -> None:
+                if not body.get("stream", True):
+                    self._send_json({"response": mock.response, "done": True})
+                    return
+                self._ndjson(
+                    _then(({"response": t, "done": False} for t in mock.tokens()), {"response": "", "done": True})
+                )
+
+            def ollama_embed(self, body: dict[str, Any]) -> None:
+                inputs = body.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                self._send_json({"embeddings": [_fake_embedding(text) for text in inputs]})
+
+            # OpenAI-compatible (vLLM, LM Studio, LocalAI, Jan)
+            def openai_chat(self, body: dict[str, Any]) -> None:
+                if not body.get("stream"):
+                    self._send_json(
+                        {"choices": [{"index": 0, "message": {"role": "assistant", "content": mock.response}}]}
+                    )
+                    return
+                self._sse(({"choices": [{"index": 0, "delta": {"content": t}}]} for t in mock.tokens()), done=True)
+
+            def openai_completions(self, _body: dict[str, Any]) -> None:
+                self._send_json({"choices": [{"index": 0, "text": mock.response}]})
+
+            def openai_embeddings(self, body: dict[str, Any]) -> None:
+                inputs = body.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                data = [{"index": i, "embedding": _fake_embedding(text)} for i, text in enumerate(inputs)]
+                self._send_json({"data": data})
+
+            # Hugging Face TGI / TEI
+            def tgi_generate(self, _body: dict[str, Any]) -> None:
+                self._send_json({"generated_text": mock.response})
+
+            def tgi_generate_stream(self, _body: dict[str, Any]) -> None:
+                self._sse({"token": {"text": t, "special": False}} for t in mock.tokens())
+
+            def tei_embed(self, body: dict[str, Any]) -> None:
+                self._send_json([_fake_embedding(text) for text in body.get("inputs", [])])
+
+            # llama.cpp server
+            def llamacpp_completion(self, body: dict[str, Any]) -> None:
+                if not body.get("stream"):
+                    self._send_json({"content": mock.response, "stop": True})
+                    return
+                self._sse(_then(({"content": t, "stop": False} for t in mock.tokens()), {"content": "", "stop": True}))
+
+            # KoboldCpp
+            def koboldcpp_generate(self, _body: dict[str, Any]) -> None:
+                self._send_json({"results": [{"text": mock.response}]})
+
+        ROUTES: dict[str, Callable[[Handler, dict[str, Any]], None]] = {
+            "/api/chat": Handler.ollama_chat,
+            "/api/generate": Handler.ollama_generate,
+            "/api/embed": Handler.ollama_embed,
+            "/v1/chat/completions": Handler.openai_chat,
+            "/v1/completions": Handler.openai_completions,
+            "/v1/embeddings": Handler.openai_embeddings,
+            "/generate": Handler.tgi_generate,
+            "/generate_stream": Handler.tgi_generate_stream,
+            "/embed": Handler.tei_embed,
+            "/completion": Handler.llamacpp_completion,
+            "/api/v1/generate": Handler.koboldcpp_generate,
+        }
+        return Handler
+
+
+def _then(frames: Iterator[dict[str, Any]], last: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield from frames
+    yield last
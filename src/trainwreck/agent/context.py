@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+# Result fields worth showing the planner, in order of preference
+_OUTPUT_FIELDS = ("error", "stderr", "stdout", "output", "content", "result")
+
+
+@dataclass
+class ContextReport:
+    """Token accounting for one assembled prompt."""
+
+    budget: int
+    sections: dict[str, int] = field(default_factory=dict)
+    dropped: list[str] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.sections.values())
+
+
+class ContextBuilder:
+    """
+    Assembles the planner prompt within a token budget.
+
+    The goal and response instructions are always kept. History gets up to
+    half of what remains: the newest steps are rendered in full (the latest
+    with an excerpt of its output) and older ones are folded into a one-line
+    summary. Recalled past successes get up to a quarter of the remainder.
+    Repository state and the MCP tool list share the rest and are
+    truncated if needed. Everything cut is listed in the ContextReport.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        budget: int = 6000,
+        recent_steps: int = 5,
+        max_output_chars: int = 2000,
+    ) -> None:
+        self.count_tokens = count_tokens
+        self.budget = budget
+        self.recent_steps = recent_steps
+        self.max_output_chars = max_output_chars
+        # Tool lines repeat every iteration; remember what each one costs
+        self._line_tokens: dict[str, int] = {}
+
+    def build(
+        self,
+        goal: str,
+        repo_state: str,
+        history: list[dict[str, Any]],
+        tool_lines: list[str],
+        template: str,
+        lesson_lines: list[str] | None = None,
+    ) -> tuple[str, ContextReport]:
+        """
+        Fill `template` (with {goal}, {repo_state}, {history}, {lessons} and
+        {tools} placeholders) and return the prompt with its report.
+        """
+        report = ContextReport(budget=self.budget)
+        fixed = template.format(goal=goal, repo_state="", history="", lessons="", tools="")
+        report.sections["instructions"] = self.count_tokens(fixed)
+        available = max(self.budget - report.sections["instructions"], 0)
+
+        history_text = self._fit_history(history, available // 2, report)
+        report.sections["history"] = self.count_tokens(history_text)
+        available -= report.sections["history"]
+
+        lessons_text = ""
+        if lesson_lines:
+            kept = self._fit_lines(lesson_lines, available // 4)
+            if kept < len(lesson_lines):
+                report.dropped.append(f"lessons: {len(lesson_lines) - kept} of {len(lesson_lines)} past steps omitted")
+            if kept:
+                lessons_text = "\n\nSimilar Past Successes:\n" + "\n".join(lesson_lines[:kept])
+        report.sections["lessons"] = self.count_tokens(lessons_text)
+        available -= report.sections["lessons"]
+
+        repo_text = self._truncate(repo_state, available // 2)
+        report.sections["repo_state"] = self.count_tokens(repo_text)
+        if repo_text != repo_state:
+            report.dropped.append(f"repo_state: truncated to {report.sections['repo_state']} tokens")
+        available -= report.sections["repo_state"]
+
+        tools_text = ""
+        if tool_lines:
+            kept = self._fit_lines(tool_lines, available)
+            if kept < len(tool_lines):
+                report.dropped.append(f"mcp_tools: {len(tool_lines) - kept} of {len(tool_lines)} tools omitted")
+            tools_text = "\n\nAvailable MCP Tools:\n" + "\n".join(tool_lines[:kept]) + "\n"
+        report.sections["mcp_tools"] = self.count_tokens(tools_text)
+
+        prompt = template.format(
+            goal=goal, repo_state=repo_text, history=history_text, lessons=lessons_text, tools=tools_text
+        )
+        return prompt, report
+
+    def _fit_history(self, history: list[dict[str, Any]], limit: int, report: ContextReport) -> str:
+        """Render the newest steps that fit in `limit` tokens and summarize the rest."""
+        lines: list[str] = []
+        used = 0
+        kept = 0
+        for offset, step in enumerate(reversed(history[-self.recent_steps :])):
+            line = self._render_step(step, with_output=offset == 0)
+            cost = self.count_tokens(line)
+            if used + cost > limit:
+                if offset == 0:
+                    # Always keep the latest step, even if only partially
+                    line = self._truncate(line, limit)
+                    lines.append(line)
+                    kept = 1
+                break
+            lines.append(line)
+            used += cost
+            kept += 1
+
+        older = history[: len(history) - kept]
+        if older:
+            summary = self._summarize(older)
+            if used + self.count_tokens(summary) <= limit:
+                lines.append(summary)
+            report.dropped.append(f"history: {len(older)} older step(s) summarized")
+        return "\n".join(reversed(lines))
+
+    def _render_step(self, step: dict[str, Any], with_output: bool) -> str:
+        """One history line; the latest step also carries an output excerpt."""
+        outcome = self._clip(str(step.get("outcome", "")), 300)
+        line = f"- {step.get('description', '')}: {outcome}"
+        if with_output:
+            excerpt = self._output_excerpt(step.get("result") or {})
+            if excerpt:
+                line += f"\n  Output:\n{excerpt}"
+        return line
+
+    def _output_excerpt(self, result: dict[str, Any]) -> str:
+        """Head and tail of the most informative field of a step result; batches share the space between steps."""
+        steps = result.get("steps")
+        if isinstance(steps, list) and steps:
+            per_step = max(self.max_output_chars // len(steps), 200)
+            parts = []
+            for step in steps:
+                excerpt = self._field_excerpt(step.get("result") or {}, per_step)
+                parts.append(
+                    f"  [{step.get('id')}] {step.get('description', '')}" + (f"\n{excerpt}" if excerpt else "")
+                )
+            return "\n".join(parts)
+        return self._field_excerpt(result, self.max_output_chars)
+
+    def _field_excerpt(self, result: dict[str, Any], max_chars: int) -> str:
+        for key in _OUTPUT_FIELDS:
+            value = result.get(key)
+            if not value:
+                continue
+            text = value if isinstance(value, str) else json.dumps(value, default=str)
+            return self._clip(text, max_chars)
+        return ""
+
+    def _summarize(self, steps: list[dict[str, Any]]) -> str:
+        """Collapse older steps into a single line."""
+        succeeded = sum(1 for s in steps if s.get("score", 0) >= 0.9)
+        actions = Counter(s.get("plan", {}).get("action", "?") for s in steps)
+        action_text = ", ".join(f"{a}×{n}" for a, n in actions.most_common())
+        return f"- Earlier: {len(steps)} step(s), {succeeded} succeeded ({action_text})"
+
+    def _fit_lines(self, lines: list[str], limit: int) -> int:
+        """Number of leading lines that fit in `limit` tokens."""
+        used = 0
+        for i, line in enumerate(lines):
+            cost = self._line_tokens.get(line)
+            if cost is None:
+                cost = self._line_tokens[line] = self.count_tokens(line)
+            used += cost + 1
+            if used > limit:
+                return i
+        return len(lines)
+
+    def _truncate(self, text: str, limit: int) -> str:
+        """Shrink text to roughly `limit` tokens, keeping its head and tail."""
+        tokens = self.count_tokens(text)
+        if tokens <= limit:
+            return text
+        if limit <= 0:
+            return ""
+        return self._clip(text, max(len(text) * limit // tokens - 40, 0))
+
+    @staticmethod
+    def _clip(text: str, max_chars: int) -> str:
+        """Keep the first and last parts of text longer than max_chars."""
+        if len(text) <= max_chars:
+            return text
+        head = max_chars * 2 // 3
+        tail = max_chars - head
+        omitted = len(text) - head - tail
+        return f"{text[:head]}\n... [{omitted} chars omitted] ...\n{text[len(text) - tail:] if tail else ''}"
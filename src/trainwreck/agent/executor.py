@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Any
 
+from trainwreck import telemetry
 from trainwreck.agent.step_plan import StepPlan
 from trainwreck.tools.abacus import AbacusClient
 from trainwreck.tools.bash import BashExecutor
 from trainwreck.tools.git import GitAdapter
-from trainwreck.tools.mcp import MCPClient
+from trainwreck.tools.mcp import AsyncMCPClient, MCPClient
 from trainwreck.tools.powershell import PowerShellExecutor
+from trainwreck.tools.process import OutputCallback
 
 
 class Executor:
@@ -19,16 +25,38 @@ class Executor:
         repo_path: Path,
         abacus: AbacusClient | None = None,
         mcp: MCPClient | None = None,
+        command_timeout: float | None = None,
+        idle_timeout: float | None = None,
+        max_output_bytes: int = 1024 * 1024,
+        on_output: OutputCallback | None = None,
+        shell_session: bool = False,
+        max_parallel_steps: int = 4,
     ) -> None:
         self.repo_path = repo_path
-        self.bash = BashExecutor()
-        self.powershell = PowerShellExecutor()
+        self.max_parallel_steps = max_parallel_steps
+        # GitPython and the index lock do not tolerate concurrent git steps
+        self._git_lock = threading.Lock()
+        shell_options: dict[str, Any] = {
+            "timeout": command_timeout,
+            "idle_timeout": idle_timeout,
+            "max_output_bytes": max_output_bytes,
+            "on_output": on_output,
+        }
+        self.bash = BashExecutor(**shell_options, session=shell_session)
+        self.powershell = PowerShellExecutor(**shell_options)
         self.git = GitAdapter(repo_path)
         self.abacus = abacus
         self.mcp = mcp
 
     def execute(self, plan: StepPlan) -> dict[str, Any]:
-        """Execute the step plan and return the result."""
+        """Execute the step plan and return the result. Batch steps are timed both as a whole and one by one."""
+        with telemetry.timed(telemetry.EXECUTE_SECONDS, "execute", action=plan.action) as fields:
+            result = self._dispatch(plan)
+            fields["failed"] = self._step_failed(result)
+            return result
+
+    def _dispatch(self, plan: StepPlan) -> dict[str, Any]:
+        """Run the plan with the handler for its action."""
         if plan.action == "bash":
             return self._execute_bash(plan)
         elif plan.action == "powershell":
@@ -38,39 +66,164 @@ class Executor:
         elif plan.action == "mcp":
             return self._execute_mcp(plan)
         elif plan.action == "abacus":
-            return self._execute_abacus(plan)
+            return self._execute_abacus()
         elif plan.action == "write_file":
             return self._write_file(plan)
         elif plan.action == "read_file":
             return self._read_file(plan)
+        elif plan.action == "batch":
+            return self._execute_batch(plan)
         else:
             return {"error": f"Unknown action: {plan.action}"}
 
+    def _execute_batch(self, plan: StepPlan) -> dict[str, Any]:
+        """Run a batch's steps in a thread pool, starting each once its dependencies have succeeded."""
+        if not plan.steps:
+            return {"action": "batch", "error": "Batch has no steps"}
+        order, steps, deps, results = self._batch_graph(plan)
+        pending = [step_id for step_id in order if step_id not in results]
+        running: dict[Future[dict[str, Any]], str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel_steps, thread_name_prefix="trainwreck-step") as pool:
+            while pending or running:
+                for step_id in list(pending):
+                    if not all(d in results for d in deps[step_id]):
+                        continue
+                    pending.remove(step_id)
+                    skipped = self._skip_reason(deps[step_id], results)
+                    if skipped:
+                        results[step_id] = skipped
+                    else:
+                        # In a copy of this context, so the step's trace spans nest under the batch
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, self._execute_step, steps[step_id])] = step_id
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    try:
+                        results[step_id] = future.result()
+                    except Exception as e:
+                        results[step_id] = {"error": str(e)}
+
+        return self._batch_result(steps, results)
+
+    def _execute_step(self, step: StepPlan) -> dict[str, Any]:
+        """Execute one step of a batch."""
+        if step.action == "git":
+            with self._git_lock:
+                return self.execute(step)
+        return self.execute(step)
+
+    @staticmethod
+    def _batch_graph(
+        plan: StepPlan,
+    ) -> tuple[list[str], dict[str, StepPlan], dict[str, list[str]], dict[str, dict[str, Any]]]:
+        """
+        Index a batch's steps by id (defaulting to their 1-based position) in
+        dependency order. Steps that cannot run (nested batches, unknown or
+        circular dependencies) get an error result up front.
+        """
+        order: list[str] = []
+        steps: dict[str, StepPlan] = {}
+        results: dict[str, dict[str, Any]] = {}
+        for index, step in enumerate(plan.steps or [], start=1):
+            step_id = str(step.id) if step.id is not None else str(index)
+            if step_id in steps:
+                step_id = f"{step_id}#{index}"
+                results[step_id] = {"error": f"Duplicate step id '{step.id}'"}
+            steps[step_id] = step
+            order.append(step_id)
+            if step.action == "batch":
+                results[step_id] = {"error": "Nested batches are not supported"}
+
+        deps = {step_id: [str(d) for d in steps[step_id].depends_on or []] for step_id in order}
+        for step_id in order:
+            unknown = [d for d in deps[step_id] if d not in steps]
+            if unknown and step_id not in results:
+                results[step_id] = {"error": f"Unknown dependency '{unknown[0]}'"}
+
+        # Kahn's algorithm; whatever is left over sits on a cycle
+        indegree = {step_id: sum(1 for d in deps[step_id] if d in steps) for step_id in order}
+        ready = [step_id for step_id in order if indegree[step_id] == 0]
+        sorted_ids: list[str] = []
+        while ready:
+            step_id = ready.pop(0)
+            sorted_ids.append(step_id)
+            for other in order:
+                if step_id in deps[other]:
+                    indegree[other] -= 1
+                    if indegree[other] == 0:
+                        ready.append(other)
+        for step_id in order:
+            if step_id not in sorted_ids:
+                sorted_ids.append(step_id)
+                results.setdefault(step_id, {"error": "Circular dependency"})
+                deps[step_id] = []
+        return sorted_ids, steps, deps, results
+
+    @staticmethod
+    def _step_failed(result: dict[str, Any]) -> bool:
+        return "error" in result or result.get("returncode", 0) not in (0, None)
+
+    def _skip_reason(self, deps: list[str], results: dict[str, dict[str, Any]]) -> dict[str, Any] | None:
+        """An error result if any dependency failed, otherwise None."""
+        for dep in deps:
+            if self._step_failed(results[dep]):
+                return {"error": f"Skipped: dependency '{dep}' failed"}
+        return None
+
+    def _batch_result(self, steps: dict[str, StepPlan], results: dict[str, dict[str, Any]]) -> dict[str, Any]:
+        """Collect sub-step results in the order the plan listed them."""
+        entries: list[dict[str, Any]] = [
+            {
+                "id": step_id,
+                "action": step.action,
+                "description": step.description,
+                "result": results[step_id],
+            }
+            for step_id, step in steps.items()
+        ]
+        failed = sum(1 for entry in entries if self._step_failed(entry["result"]))
+        return {"action": "batch", "steps": entries, "succeeded": len(entries) - failed, "failed": failed}
+
+    def close(self) -> None:
+        """Release long-lived resources such as the shell session."""
+        self.bash.close()
+
     def _execute_bash(self, plan: StepPlan) -> dict[str, Any]:
         """Execute a bash command."""
         if not plan.command:
             return {"error": "No command provided"}
         result = self.bash.run(plan.command, cwd=str(self.repo_path))
-        return {
-            "action": "bash",
-            "command": plan.command,
-            "stdout": result["stdout"],
-            "stderr": result["stderr"],
-            "returncode": result["returncode"],
-        }
+        return self._shell_result("bash", plan.command, result)
 
     def _execute_powershell(self, plan: StepPlan) -> dict[str, Any]:
         """Execute a PowerShell command."""
         if not plan.command:
             return {"error": "No command provided"}
         result = self.powershell.run(plan.command, cwd=str(self.repo_path))
-        return {
-            "action": "powershell",
-            "command": plan.command,
+        return self._shell_result("powershell", plan.command, result)
+
+    def _shell_result(self, action: str, command: str, result: dict[str, Any]) -> dict[str, Any]:
+        """Shape a bash or PowerShell run into a step result."""
+        step_result = {
+            "action": action,
+            "command": command,
             "stdout": result["stdout"],
             "stderr": result["stderr"],
             "returncode": result["returncode"],
         }
+        if result.get("truncated"):
+            step_result["truncated"] = True
+        if result.get("session_restarted"):
+            step_result["session_restarted"] = True
+        if result.get("timed_out") == "wall":
+            step_result["error"] = f"Command timed out after {self.bash.timeout}s"
+        elif result.get("timed_out") == "idle":
+            step_result["error"] = f"Command produced no output for {self.bash.idle_timeout}s and was killed"
+        return step_result
 
     def _execute_git(self, plan: StepPlan) -> dict[str, Any]:
         """Execute a git command."""
@@ -140,7 +293,7 @@ class Executor:
                 "error": str(e),
             }
 
-    def _execute_abacus(self, plan: StepPlan) -> dict[str, Any]:
+    def _execute_abacus(self) -> dict[str, Any]:
         """Execute an Abacus.AI API call."""
         if not self.abacus:
             return {"error": "Abacus client not initialized"}
@@ -198,3 +351,109 @@ class Executor:
                 "file_path": str(file_path),
                 "error": str(e),
             }
+
+
+class AsyncExecutor(Executor):
+    """
+    Executes step plans without blocking the event loop.
+    Shell and MCP actions are natively async; git, file and Abacus actions
+    run in worker threads.
+    """
+
+    mcp: AsyncMCPClient | None  # type: ignore[assignment]
+
+    def __init__(
+        self,
+        repo_path: Path,
+        abacus: AbacusClient | None = None,
+        mcp: AsyncMCPClient | None = None,
+        command_timeout: float | None = None,
+        idle_timeout: float | None = None,
+        max_output_bytes: int = 1024 * 1024,
+        on_output: OutputCallback | None = None,
+        shell_session: bool = False,
+        max_parallel_steps: int = 4,
+    ) -> None:
+        super().__init__(
+            repo_path,
+            abacus=abacus,
+            command_timeout=command_timeout,
+            idle_timeout=idle_timeout,
+            max_output_bytes=max_output_bytes,
+            on_output=on_output,
+            shell_session=shell_session,
+            max_parallel_steps=max_parallel_steps,
+        )
+        self.mcp = mcp
+
+    async def aexecute(self, plan: StepPlan) -> dict[str, Any]:
+        """Execute the step plan and return the result."""
+        if plan.action not in ("bash", "powershell", "mcp", "batch"):
+            # Timed by execute in the worker thread
+            return await asyncio.to_thread(self._execute_step, plan)
+        with telemetry.timed(telemetry.EXECUTE_SECONDS, "execute", action=plan.action) as fields:
+            if plan.action == "mcp":
+                result = await self._aexecute_mcp(plan)
+            elif plan.action == "batch":
+                result = await self._aexecute_batch(plan)
+            else:
+                result = await self._aexecute_shell(plan, plan.action)
+            fields["failed"] = self._step_failed(result)
+            return result
+
+    async def _aexecute_batch(self, plan: StepPlan) -> dict[str, Any]:
+        """Run a batch's steps as tasks, each awaiting its dependencies first."""
+        if not plan.steps:
+            return {"action": "batch", "error": "Batch has no steps"}
+        order, steps, deps, results = self._batch_graph(plan)
+        limit = asyncio.Semaphore(self.max_parallel_steps)
+        tasks: dict[str, asyncio.Task[None]] = {}
+
+        async def run(step_id: str) -> None:
+            for dep in deps[step_id]:
+                if dep in tasks:
+                    await tasks[dep]
+            skipped = self._skip_reason(deps[step_id], results)
+            if skipped:
+                results[step_id] = skipped
+                return
+            async with limit:
+                try:
+                    results[step_id] = await self.aexecute(steps[step_id])
+                except Exception as e:
+                    results[step_id] = {"error": str(e)}
+
+        for step_id in order:
+            if step_id not in results:
+                tasks[step_id] = asyncio.create_task(run(step_id))
+        await asyncio.gather(*tasks.values())
+        return self._batch_result(steps, results)
+
+    async def _aexecute_shell(self, plan: StepPlan, action: str) -> dict[str, Any]:
+        """Execute a bash or PowerShell command."""
+        if not plan.command:
+            return {"error": "No command provided"}
+        runner = self.bash if action == "bash" else self.powershell
+        result = await runner.arun(plan.command, cwd=str(self.repo_path))
+        return self._shell_result(action, plan.command, result)
+
+    async def _aexecute_mcp(self, plan: StepPlan) -> dict[str, Any]:
+        """Execute an MCP tool call."""
+        if not self.mcp:
+            return {"error": "MCP client not initialized"}
+        if not plan.tool_name:
+            return {"error": "No tool name provided"}
+
+        try:
+            result = await self.mcp.call_tool(plan.tool_name, plan.arguments or {})
+            return {
+                "action": "mcp",
+                "tool_name": plan.tool_name,
+                "result": result,
+            }
+        except Exception as e:
+            return {
+                "action": "mcp",
+                "tool_name": plan.tool_name,
+                "error": str(e),
+            }
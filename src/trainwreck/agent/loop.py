@@ -1,76 +1,360 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict
 from typing import Any
 
-from trainwreck.agent.executor import Executor
-from trainwreck.agent.planner import Planner
+from trainwreck import telemetry, tracing
+from trainwreck.agent.executor import AsyncExecutor, Executor
+from trainwreck.agent.planner import AsyncPlanner, Planner
 from trainwreck.agent.reflector import Reflector
+from trainwreck.agent.repo_state import RepoStateTracker
+from trainwreck.agent.step_plan import StepPlan
+from trainwreck.memory.recorder import MemoryRecorder
 from trainwreck.memory.sqlite_store import SQLiteMemoryStore
 
 
 class FeedbackLoop:
-    """Main feedback loop: Plan → Execute → Reflect → Repeat."""
+    """
+    Main feedback loop: Plan → Execute → Reflect → Repeat.
+
+    With `speculate=True` the next step is drafted while the current one
+    executes, assuming it will exit cleanly. The draft is used if the step
+    did exit cleanly without achieving the goal (e.g. it succeeded but wrote
+    warnings to stderr); if the step failed, drafting is cancelled and the
+    next step is planned from the real result.
+
+    Pass a MemoryRecorder as `memory` to persist steps from a background
+    thread instead of inside the loop.
+
+    A checkpoint (the plan about to run and the repo HEAD) is saved to
+    memory after each plan and each step, so a run that dies can be resumed
+    from SQLiteMemoryStore.load_checkpoint without repeating its steps.
+    """
 
     def __init__(
         self,
         planner: Planner,
         executor: Executor,
         reflector: Reflector,
-        memory: SQLiteMemoryStore | None = None,
+        memory: SQLiteMemoryStore | MemoryRecorder | None = None,
+        speculate: bool = False,
     ) -> None:
         self.planner = planner
         self.executor = executor
         self.reflector = reflector
         self.memory = memory
+        self.speculate = speculate
+        self.repo_state = RepoStateTracker(executor.git, executor.repo_path)
+        self.run_id: str | None = None
+
+    def iterate(self, goal: str, max_iters: int = 20, resume: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        """
+        Run the feedback loop until goal is met or max iterations reached.
+        With `resume` (a checkpoint), continue that run: its recorded steps
+        become the history and count towards `max_iters`.
+        """
+        history, pending = self._start_run(goal, resume)
+        with self._trace(goal, history):
+            try:
+                self._iterate(goal, max_iters, history, pending)
+            except BaseException:
+                self._finish_run(history, failed=True)
+                raise
+            self._finish_run(history)
+        return history
+
+    def _iterate(
+        self, goal: str, max_iters: int, history: list[dict[str, Any]], pending: StepPlan | None = None
+    ) -> None:
+        """The loop body of iterate; appends each step to `history`, starting with the `pending` plan if given."""
+        plan: StepPlan | None = None
+        drafted: StepPlan | None = None
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="trainwreck-execute") as pool:
+            for i in range(len(history), max_iters):
+                with tracing.span("iteration", iteration=i + 1):
+                    print(f"\n🔄 Iteration {i + 1}/{max_iters}")
+
+                    # Build context from history
+                    context = {
+                        "repo_state": self._get_repo_state(plan),
+                        "history": history,
+                        "run_id": self.run_id,
+                    }
+
+                    # Plan
+                    if pending is not None:
+                        plan, pending = pending, None
+                        print(f"📋 Plan (resumed): {plan.description}")
+                    elif drafted is not None:
+                        plan, drafted = drafted, None
+                        print(f"📋 Plan (speculative): {plan.description}")
+                    else:
+                        plan = self.planner.plan(goal, context)
+                        self._report_context()
+                        print(f"📋 Plan: {plan.description}")
+                    self._checkpoint(len(history), plan)
+
+                    # Execute, drafting the next plan meanwhile if speculating
+                    if self.speculate:
+                        result, drafted = self._execute_speculating(pool, goal, context, plan)
+                    else:
+                        result = self.executor.execute(plan)
+                    print(f"⚙️  Executed: {plan.action}")
+
+                    # Reflect and record
+                    if self._record(i + 1, plan, result, history):
+                        print("✅ Goal achieved!")
+                        break
+                    if drafted is not None and not self._exited_cleanly(result):
+                        print("🗑️  Discarded speculative plan: the step did not succeed")
+                        drafted = None
+                    self._checkpoint(len(history), drafted)
+
+    def _start_run(
+        self, goal: str, resume: dict[str, Any] | None = None
+    ) -> tuple[list[dict[str, Any]], StepPlan | None]:
+        """
+        Register this run in memory so its steps can be looked up later, or
+        reopen the resumed one. Returns the history so far and the plan that
+        was about to run when the checkpoint was taken, if any.
+        """
+        if resume is None:
+            self.run_id = self.memory.start_run(goal, repo=str(self.executor.repo_path)) if self.memory else None
+            if self.run_id:
+                print(f"🆔 Run: {self.run_id}")
+            telemetry.log_event("run_started", run_id=self.run_id, goal=goal, repo=str(self.executor.repo_path))
+            return [], None
+
+        self.run_id = resume["run_id"]
+        if self.memory:
+            self.memory.resume_run(self.run_id)
+        history = list(resume["history"])
+        print(f"🆔 Resuming run {self.run_id} after {len(history)} step(s)")
+        telemetry.log_event("run_resumed", run_id=self.run_id, goal=goal, completed=len(history))
+        head = self._head()
+        if resume.get("head") and head != resume["head"]:
+            print(f"⚠️  Repository HEAD moved since the checkpoint ({resume['head'][:8]} → {(head or 'none')[:8]})")
+        pending = StepPlan.from_dict(resume["plan"]) if resume.get("plan") else None
+        return history, pending
+
+    @contextmanager
+    def _trace(self, goal: str, history: list[dict[str, Any]]) -> Iterator[None]:
+        """Trace the run as one span tree; the run id doubles as the trace id, so a resumed run extends its trace."""
+        with tracing.trace("run", trace_id=self.run_id, goal=goal, resumed_at=len(history) or None) as root:
+            yield
+            root.set(iterations=len(history), score=history[-1]["score"] if history else None)
+
+    def _checkpoint(self, completed: int, pending: StepPlan | None) -> None:
+        """Save where the run is: steps completed, the plan to run next and the repo HEAD."""
+        if not self.memory or self.run_id is None:
+            return
+        state = {"plan": asdict(pending) if pending is not None else None, "head": self._head()}
+        self.memory.save_checkpoint(self.run_id, completed, state)
+
+    def _head(self) -> str | None:
+        try:
+            return self.executor.git.head()
+        except Exception:
+            return None
+
+    def _finish_run(self, history: list[dict[str, Any]], failed: bool = False) -> None:
+        """Record whether the run achieved its goal, ran out of iterations or raised."""
+        if failed:
+            status = "failed"
+        elif history and history[-1]["score"] >= 0.9:
+            status = "achieved"
+        else:
+            status = "exhausted"
+        telemetry.log_event("run_finished", run_id=self.run_id, status=status, iterations=len(history))
+        if not self.memory or self.run_id is None:
+            return
+        self.memory.finish_run(self.run_id, status, len(history))
+
+    def _execute_speculating(
+        self, pool: ThreadPoolExecutor, goal: str, context: dict[str, Any], plan: StepPlan
+    ) -> tuple[dict[str, Any], StepPlan | None]:
+        """Execute `plan` in the worker thread while drafting the next plan here."""
+        cancel = threading.Event()
+
+        def on_done(future: Future[dict[str, Any]]) -> None:
+            # Stop drafting as soon as the step fails; a step that achieves the goal ends the loop anyway
+            if future.exception() is not None or not self._exited_cleanly(future.result()):
+                cancel.set()
+
+        execution = pool.submit(contextvars.copy_context().run, self.executor.execute, plan)
+        execution.add_done_callback(on_done)
+        try:
+            drafted = self.planner.speculate(goal, self._assume_success(context, plan), cancel)
+        except Exception:
+            drafted = None
+        return execution.result(), drafted
+
+    @staticmethod
+    def _assume_success(context: dict[str, Any], plan: StepPlan) -> dict[str, Any]:
+        """The planning context as it would look if `plan` succeeds; its output is not known yet."""
+        step = {
+            "plan": asdict(plan),
+            "result": {},
+            "score": 1.0,
+            "description": plan.description,
+            "outcome": "Succeeded (output not available yet)",
+        }
+        return {**context, "history": [*context["history"], step]}
 
-    def iterate(self, goal: str, max_iters: int = 20) -> list[dict[str, Any]]:
-        """Run the feedback loop until goal is met or max iterations reached."""
-        history: list[dict[str, Any]] = []
-
-        for i in range(max_iters):
-            print(f"\n🔄 Iteration {i + 1}/{max_iters}")
-
-            # Build context from history
-            context = {
-                "repo_state": self._get_repo_state(),
-                "history": history,
-            }
-
-            # Plan
-            plan = self.planner.plan(goal, context)
-            print(f"📋 Plan: {plan.description}")
-
-            # Execute
-            result = self.executor.execute(plan)
-            print(f"⚙️  Executed: {plan.action}")
-
-            # Reflect
-            reflection = self.reflector.reflect(plan.__dict__, result)
-            print(f"💭 Reflection: {reflection['feedback']} (score: {reflection['score']:.2f})")
-
-            # Record
-            step = {
-                "iteration": i + 1,
-                "plan": plan.__dict__,
-                "result": result,
-                "reflection": reflection,
-                "score": reflection["score"],
-                "description": plan.description,
-                "outcome": reflection["feedback"],
-            }
-            history.append(step)
-
-            if self.memory:
-                self.memory.add_step(step)
-
-            # Check if goal is met
-            if reflection["score"] >= 0.9:
-                print("✅ Goal achieved!")
-                break
+    @staticmethod
+    def _exited_cleanly(result: dict[str, Any]) -> bool:
+        """True if the step (or every step of a batch) ran without error and exited 0."""
+        return "error" not in result and result.get("returncode", 0) in (0, None) and not result.get("failed")
 
+    def _record(self, iteration: int, plan: StepPlan, result: dict[str, Any], history: list[dict[str, Any]]) -> bool:
+        """Reflect on a result, append the step to history and memory; return True if the goal is met."""
+        plan_dict = asdict(plan)
+        reflection = self.reflector.reflect(plan_dict, result)
+        print(f"💭 Reflection: {reflection['feedback']} (score: {reflection['score']:.2f})")
+
+        step = {
+            "run_id": self.run_id,
+            "iteration": iteration,
+            "plan": plan_dict,
+            "result": result,
+            "reflection": reflection,
+            "score": reflection["score"],
+            "description": plan.description,
+            "outcome": reflection["feedback"],
+        }
+        history.append(step)
+        succeeded: bool = reflection["score"] >= 0.9
+        telemetry.STEPS.labels(plan.action, "succeeded" if succeeded else "failed").inc()
+        telemetry.log_event(
+            "step",
+            run_id=self.run_id,
+            iteration=iteration,
+            action=plan.action,
+            description=plan.description,
+            score=reflection["score"],
+            outcome=reflection["feedback"],
+        )
+
+        if self.memory:
+            self.memory.add_step(step)
+
+        return succeeded
+
+    def _report_context(self) -> None:
+        """Print what the planner had to cut to stay within its token budget."""
+        report = self.planner.last_context_report
+        if report and report.dropped:
+            print(f"✂️  Context trimmed to {report.total}/{report.budget} tokens: {'; '.join(report.dropped)}")
+
+    def _get_repo_state(self, last_plan: StepPlan | None = None) -> str:
+        """Get a summary of the repository state, refreshing what `last_plan` may have changed."""
+        try:
+            return self.repo_state.snapshot(last_plan)
+        except Exception as e:
+            self.repo_state.invalidate()
+            return f"Repository state unavailable: {e}"
+
+
+class AsyncFeedbackLoop(FeedbackLoop):
+    """
+    Asyncio feedback loop. Planning and execution await I/O instead of
+    blocking, so many loops can share one event loop (one loop per goal).
+    Memory writes are queued to a MemoryRecorder's thread, and git queries
+    for the repository state and checkpoints run in worker threads.
+    """
+
+    planner: AsyncPlanner
+    executor: AsyncExecutor
+
+    def __init__(
+        self,
+        planner: AsyncPlanner,
+        executor: AsyncExecutor,
+        reflector: Reflector,
+        memory: MemoryRecorder | None = None,
+        speculate: bool = False,
+    ) -> None:
+        super().__init__(planner, executor, reflector, memory=memory, speculate=speculate)
+
+    async def aiterate(
+        self, goal: str, max_iters: int = 20, resume: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """Run the feedback loop until goal is met or max iterations reached, optionally resuming a checkpoint."""
+        history, pending = await asyncio.to_thread(self._start_run, goal, resume)
+        with self._trace(goal, history):
+            try:
+                await self._aiterate(goal, max_iters, history, pending)
+            except BaseException:
+                self._finish_run(history, failed=True)
+                raise
+            self._finish_run(history)
         return history
 
-    def _get_repo_state(self) -> str:
-        """Get a summary of the repository state."""
-        # This is a placeholder; extend with actual repo inspection
-        return "Repository state: [placeholder]"
+    async def _aiterate(
+        self, goal: str, max_iters: int, history: list[dict[str, Any]], pending: StepPlan | None = None
+    ) -> None:
+        """The loop body of aiterate; appends each step to `history`, starting with the `pending` plan if given."""
+        plan: StepPlan | None = None
+        drafted: StepPlan | None = None
+        drafting: asyncio.Task[StepPlan | None] | None = None
+
+        try:
+            for i in range(len(history), max_iters):
+                with tracing.span("iteration", iteration=i + 1):
+                    print(f"\n🔄 Iteration {i + 1}/{max_iters}")
+
+                    context = {
+                        "repo_state": await asyncio.to_thread(self._get_repo_state, plan),
+                        "history": history,
+                        "run_id": self.run_id,
+                    }
+
+                    if pending is not None:
+                        plan, pending = pending, None
+                        print(f"📋 Plan (resumed): {plan.description}")
+                    elif drafted is not None:
+                        plan, drafted = drafted, None
+                        print(f"📋 Plan (speculative): {plan.description}")
+                    else:
+                        plan = await self.planner.aplan(goal, context)
+                        self._report_context()
+                        print(f"📋 Plan: {plan.description}")
+                    await asyncio.to_thread(self._checkpoint, len(history), plan)
+
+                    if self.speculate:
+                        drafting = asyncio.create_task(
+                            self.planner.aspeculate(goal, self._assume_success(context, plan))
+                        )
+                    result = await self.executor.aexecute(plan)
+                    print(f"⚙️  Executed: {plan.action}")
+
+                    if self._record(i + 1, plan, result, history):
+                        print("✅ Goal achieved!")
+                        break
+                    if drafting is not None and not self._exited_cleanly(result):
+                        print("🗑️  Discarded speculative plan: the step did not succeed")
+                        drafting.cancel()
+                    else:
+                        drafted = await self._adrafted(drafting)
+                    drafting = None
+                    await asyncio.to_thread(self._checkpoint, len(history), drafted)
+        finally:
+            if drafting is not None:
+                drafting.cancel()
+
+    @staticmethod
+    async def _adrafted(drafting: asyncio.Task[StepPlan | None] | None) -> StepPlan | None:
+        """Wait for a speculative plan; None if there is none or drafting failed."""
+        if drafting is None:
+            return None
+        try:
+            return await drafting
+        except Exception:
+            return None
@@ -1,59 +1,68 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
 from typing import Any
 
+from trainwreck import telemetry, tracing
+from trainwreck.agent.context import ContextBuilder, ContextReport
 from trainwreck.agent.step_plan import StepPlan
-from trainwreck.llm.base import LLMClient
+from trainwreck.llm.base import AsyncLLMClient, LLMClient
+from trainwreck.llm.cache import ResponseCache
+from trainwreck.memory.semantic import SemanticMemory
 
 
-class Planner:
-    """Plans the next development step based on goal and context."""
+class _JSONObjectScanner:
+    """Finds complete top-level JSON objects in a stream of text chunks."""
 
-    def __init__(self, llm: LLMClient, mcp_client: Any = None) -> None:
-        self.llm = llm
-        self.mcp_client = mcp_client
+    def __init__(self) -> None:
+        self._buf: list[str] = []
+        self._pending = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
 
-    def plan(self, goal: str, context: dict[str, Any]) -> StepPlan:
-        """Generate a step plan for the given goal and context."""
-        prompt = self._build_prompt(goal, context)
-        response = self.llm.chat(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are TrainWreck, a vibe coding agent. Plan the next development step.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.7,
-        )
-        return self._parse_plan(response)
+    def feed(self, chunk: str) -> str | None:
+        """
+        Consume a chunk; return an object's text once its closing brace arrives.
+        Text after that brace is kept and scanned by the next call.
+        """
+        text = self._pending + chunk
+        self._pending = ""
+        for i, ch in enumerate(text):
+            if self._depth == 0:
+                if ch != "{":
+                    continue
+                self._buf = []
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pending = text[i + 1 :]
+                    return "".join(self._buf)
+        return None
 
-    def _build_prompt(self, goal: str, context: dict[str, Any]) -> str:
-        """Build the planning prompt."""
-        repo_state = context.get("repo_state", "")
-        history = context.get("history", [])
-        history_str = "\n".join([f"- {h['description']}: {h['outcome']}" for h in history[-5:]])
 
-        mcp_tools_section = ""
-        if self.mcp_client and self.mcp_client.servers:
-            tools = self.mcp_client.list_tools()
-            if tools:
-                mcp_tools_section = "\n\nAvailable MCP Tools:\n"
-                for tool in tools:
-                    tool_name = tool.get("name", "unknown")
-                    description = tool.get("description", "")
-                    server = tool.get("mcp_server", "")
-                    mcp_tools_section += f"- {tool_name} ({server}): {description}\n"
-
-        return f"""
+_PROMPT_TEMPLATE = """
 Goal: {goal}
 
 Repository State:
 {repo_state}
 
 Recent History:
-{history_str}{mcp_tools_section}
+{history}{lessons}{tools}
 
 Plan the next step to achieve the goal. Respond with a JSON object:
 {{
@@ -65,20 +74,313 @@ Plan the next step to achieve the goal. Respond with a JSON object:
   "tool_name": "MCP tool name (if action is mcp)",
   "arguments": {{"key": "value"}} (if applicable)
 }}
+
+To run several steps in one go (e.g. reading files, searching, independent
+commands or MCP calls), respond instead with a batch. Steps without
+"depends_on" run in parallel; a step only runs once the steps it depends
+on have succeeded:
+{{
+  "action": "batch",
+  "description": "What these steps do together",
+  "steps": [
+    {{"id": "a", "action": "read_file", "description": "...", "file_path": "..."}},
+    {{"id": "b", "action": "bash", "description": "...", "command": "...", "depends_on": ["a"]}}
+  ]
+}}
 """
 
-    def _parse_plan(self, response: str) -> StepPlan:
-        """Parse the LLM response into a StepPlan."""
+
+class Planner:
+    """
+    Plans the next development step based on goal and context.
+
+    With `recall`, the prompt also lists the `recall_k` past successes from
+    other runs most similar to the goal. They are looked up once per run.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        mcp_client: Any = None,
+        stream: bool = True,
+        temperature: float = 0.7,
+        cache: ResponseCache | None = None,
+        token_budget: int = 6000,
+        max_mcp_tools: int | None = None,
+        recall: SemanticMemory | None = None,
+        recall_k: int = 3,
+    ) -> None:
+        self.llm = llm
+        self.mcp_client = mcp_client
+        self.max_mcp_tools = max_mcp_tools
+        self.recall = recall
+        self.recall_k = recall_k
+        self._lessons: dict[tuple[str, str | None], list[str]] = {}
+        self.stream = stream
+        self.temperature = temperature
+        self.cache = cache
+        self.context_builder = ContextBuilder(llm.count_tokens, budget=token_budget)
+        self.last_context_report: ContextReport | None = None
+
+    def plan(self, goal: str, context: dict[str, Any]) -> StepPlan:
+        """Generate a step plan for the given goal and context."""
+        with telemetry.timed(telemetry.PLAN_SECONDS, "plan") as fields:
+            messages, report = self._build_messages(goal, context)
+            # Speculative drafts leave this alone, so it always describes the plan in use
+            self.last_context_report = report
+            key = self._cache_key(messages)
+            if key is not None and self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    fields["cached"] = True
+                    return self._parse_plan(cached)
+
+            if self.stream:
+                response = self._stream_response(messages)
+            else:
+                response = self.llm.chat(messages=messages, temperature=self.temperature)
+            plan = self._finish(key, response)
+            fields.update(self._plan_fields(plan, report))
+            return plan
+
+    def speculate(self, goal: str, context: dict[str, Any], cancel: threading.Event) -> StepPlan | None:
+        """
+        Draft a plan while the current step is still running. Gives up and
+        returns None as soon as `cancel` is set (checked between streamed
+        chunks), and also if the response does not parse.
+        """
+        messages, _ = self._build_messages(goal, context)
+        key = self._cache_key(messages)
+        if key is not None and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._try_parse_plan(cached)
+
+        if self.stream:
+            response = self._stream_response(messages, cancel)
+        else:
+            response = self.llm.chat(messages=messages, temperature=self.temperature)
+        if cancel.is_set():
+            return None
+        return self._finish_draft(key, response)
+
+    def _finish_draft(self, key: str | None, response: str) -> StepPlan | None:
+        """Like _finish, but a draft that does not parse is dropped rather than replaced by the fallback."""
+        plan = self._try_parse_plan(response)
+        if plan is not None and key is not None and self.cache is not None:
+            self.cache.put(key, response)
+        return plan
+
+    def _stream_response(self, messages: list[dict[str, str]], cancel: threading.Event | None = None) -> str:
+        """
+        Stream the response and stop generation as soon as a JSON object
+        that parses into a StepPlan has been received. Returns that object's
+        text, or the full response if none was found, or "" if `cancel` was
+        set mid-stream.
+        """
+        scanner = _JSONObjectScanner()
+        chunks: list[str] = []
+        stream = self.llm.stream_chat(messages=messages, temperature=self.temperature)
+        try:
+            for chunk in stream:
+                if cancel is not None and cancel.is_set():
+                    return ""
+                chunks.append(chunk)
+                candidate = scanner.feed(chunk)
+                # A chunk may hold several objects; keep scanning if the first is not a plan
+                while candidate is not None:
+                    if self._try_parse_plan(candidate) is not None:
+                        return candidate
+                    candidate = scanner.feed("")
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return "".join(chunks)
+
+    def _cache_key(self, messages: list[dict[str, str]]) -> str | None:
+        """Cache key for this request, or None if it should not be cached."""
+        if self.cache is None or not self.cache.cacheable(self.temperature):
+            return None
+        return self.cache.make_key(self.llm, messages, self.temperature)
+
+    def _finish(self, key: str | None, response: str) -> StepPlan:
+        """Parse a fresh response, caching it if it produced a valid plan."""
+        plan = self._try_parse_plan(response)
+        if plan is None:
+            return self._fallback_plan()
+        if key is not None and self.cache is not None:
+            self.cache.put(key, response)
+        return plan
+
+    def _plan_fields(self, plan: StepPlan, report: ContextReport) -> dict[str, Any]:
+        """What the JSON log records about a fresh plan."""
+        return {"action": plan.action, "prompt_tokens": report.total}
+
+    def _build_messages(self, goal: str, context: dict[str, Any]) -> tuple[list[dict[str, str]], ContextReport]:
+        """Build the chat messages for a planning request, with the report of what went into the prompt."""
+        prompt, report = self._build_prompt(goal, context)
+        messages = [
+            {
+                "role": "system",
+                "content": "You are TrainWreck, a vibe coding agent. Plan the next development step.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+        return messages, report
+
+    def _build_prompt(self, goal: str, context: dict[str, Any]) -> tuple[str, ContextReport]:
+        """Build the planning prompt within the token budget; also returns what it had to cut."""
+        repo_state = context.get("repo_state", "")
+        history = context.get("history", [])
+
+        tool_lines = []
+        if self.mcp_client and self.mcp_client.servers:
+            # Most relevant first, so trimming to the budget drops the least useful tools
+            tool_lines = self.mcp_client.tool_lines(goal, top_k=self.max_mcp_tools)
+
+        with tracing.span("prompt_build", history_steps=len(history)) as span:
+            lesson_lines = self._lesson_lines(goal, context.get("run_id"))
+
+            prompt, report = self.context_builder.build(
+                goal, repo_state, history, tool_lines, _PROMPT_TEMPLATE, lesson_lines=lesson_lines
+            )
+            span.set(tokens=report.total, dropped=len(report.dropped))
+        return prompt, report
+
+    def _lesson_lines(self, goal: str, run_id: str | None) -> list[str]:
+        """Prompt lines for the past successes most relevant to the goal, excluding this run's own steps."""
+        if self.recall is None or self.recall_k <= 0:
+            return []
+        key = (goal, run_id)
+        if key not in self._lessons:
+            try:
+                steps = self.recall.recall(goal, k=self.recall_k, exclude_run=run_id)
+            except Exception as e:
+                print(f"Warning: Failed to recall past steps: {e}")
+                steps = []
+            lines = []
+            for step in steps:
+                plan = step.get("plan") or {}
+                detail = plan.get("command") or plan.get("file_path") or plan.get("tool_name")
+                line = f"- {step.get('description', '')}"
+                if detail:
+                    line += f" [{plan.get('action')}: {detail}]"
+                if step.get("goal"):
+                    line += f" (goal: {step['goal']})"
+                lines.append(line)
+            self._lessons[key] = lines
+        return self._lessons[key]
+
+    def _try_parse_plan(self, response: str) -> StepPlan | None:
+        """Parse the LLM response into a StepPlan, or return None."""
         try:
             response = response.strip()
             if response.startswith("```"):
                 lines = response.split("\n")
                 response = "\n".join(lines[1:-1])
             data = json.loads(response)
-            return StepPlan(**data)
+            if not isinstance(data, dict):
+                return None
+            return StepPlan.from_dict(data)
         except (json.JSONDecodeError, TypeError):
-            return StepPlan(
-                action="bash",
-                description="Parse error, listing files",
-                command="ls -la",
-            )
+            return None
+
+    def _parse_plan(self, response: str) -> StepPlan:
+        """Parse the LLM response into a StepPlan."""
+        return self._try_parse_plan(response) or self._fallback_plan()
+
+    def _fallback_plan(self) -> StepPlan:
+        """Plan used when the response cannot be parsed."""
+        return StepPlan(
+            action="bash",
+            description="Parse error, listing files",
+            command="ls -la",
+        )
+
+
+class AsyncPlanner(Planner):
+    """
+    Planner driven by an AsyncLLMClient. Prompt building (MCP tool ranking,
+    recall) and response cache lookups block, so they run in worker threads;
+    the cache and recall store must accept connections from other threads
+    (`check_same_thread=False`).
+    """
+
+    llm: AsyncLLMClient  # type: ignore[assignment]
+
+    def __init__(
+        self,
+        llm: AsyncLLMClient,
+        mcp_client: Any = None,
+        stream: bool = True,
+        temperature: float = 0.7,
+        cache: ResponseCache | None = None,
+        token_budget: int = 6000,
+        max_mcp_tools: int | None = None,
+        recall: SemanticMemory | None = None,
+        recall_k: int = 3,
+    ) -> None:
+        super().__init__(
+            llm,  # type: ignore[arg-type]
+            mcp_client=mcp_client,
+            stream=stream,
+            temperature=temperature,
+            cache=cache,
+            token_budget=token_budget,
+            max_mcp_tools=max_mcp_tools,
+            recall=recall,
+            recall_k=recall_k,
+        )
+
+    async def aplan(self, goal: str, context: dict[str, Any]) -> StepPlan:
+        """Generate a step plan for the given goal and context."""
+        with telemetry.timed(telemetry.PLAN_SECONDS, "plan") as fields:
+            messages, report = await asyncio.to_thread(self._build_messages, goal, context)
+            self.last_context_report = report
+            key = self._cache_key(messages)
+            if key is not None and self.cache is not None:
+                cached = await asyncio.to_thread(self.cache.get, key)
+                if cached is not None:
+                    fields["cached"] = True
+                    return self._parse_plan(cached)
+
+            if self.stream:
+                response = await self._astream_response(messages)
+            else:
+                response = await self.llm.chat(messages=messages, temperature=self.temperature)
+            plan = await asyncio.to_thread(self._finish, key, response)
+            fields.update(self._plan_fields(plan, report))
+            return plan
+
+    async def aspeculate(self, goal: str, context: dict[str, Any]) -> StepPlan | None:
+        """Async counterpart of Planner.speculate; cancel the task to abandon the draft."""
+        messages, _ = await asyncio.to_thread(self._build_messages, goal, context)
+        key = self._cache_key(messages)
+        if key is not None and self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return self._try_parse_plan(cached)
+
+        if self.stream:
+            response = await self._astream_response(messages)
+        else:
+            response = await self.llm.chat(messages=messages, temperature=self.temperature)
+        return await asyncio.to_thread(self._finish_draft, key, response)
+
+    async def _astream_response(self, messages: list[dict[str, str]]) -> str:
+        """Async counterpart of Planner._stream_response."""
+        scanner = _JSONObjectScanner()
+        chunks: list[str] = []
+        stream = self.llm.stream_chat(messages=messages, temperature=self.temperature)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                candidate = scanner.feed(chunk)
+                while candidate is not None:
+                    if self._try_parse_plan(candidate) is not None:
+                        return candidate
+                    candidate = scanner.feed("")
+        finally:
+            await stream.aclose()  # type: ignore[attr-defined]
+        return "".join(chunks)
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any
 
+from trainwreck import telemetry
+
 
 class Reflector:
     """Reflects on execution results and provides feedback."""
@@ -12,7 +14,19 @@ class Reflector:
         - score (0.0 to 1.0)
         - feedback (string)
         - suggestions (list of strings)
+
+        A batch result is reflected on as a whole: its score is the mean of
+        its steps' scores and the feedback names the steps that failed.
         """
+        with telemetry.timed(telemetry.REFLECT_SECONDS, span="reflect") as fields:
+            reflection = self._reflect(plan, result)
+            fields["score"] = reflection["score"]
+            return reflection
+
+    def _reflect(self, plan: dict[str, Any], result: dict[str, Any]) -> dict[str, Any]:
+        if plan.get("action") == "batch" and isinstance(result.get("steps"), list):
+            return self._reflect_batch(result["steps"])
+
         score = self._score_result(result)
         feedback = self._generate_feedback(result)
         suggestions = self._generate_suggestions(result)
@@ -23,6 +37,31 @@ class Reflector:
             "suggestions": suggestions,
         }
 
+    def _reflect_batch(self, steps: list[dict[str, Any]]) -> dict[str, Any]:
+        """Combine the reflections of every step in a batch."""
+        reflections = [(step, self._reflect({"action": step.get("action")}, step.get("result", {}))) for step in steps]
+        failures = [
+            f"[{step.get('id')}] {reflection['feedback']}"
+            for step, reflection in reflections
+            if reflection["score"] < 0.9
+        ]
+        succeeded = len(reflections) - len(failures)
+        feedback = f"{succeeded}/{len(reflections)} steps succeeded"
+        if failures:
+            feedback += ": " + "; ".join(failures)
+
+        suggestions: list[str] = []
+        for _, reflection in reflections:
+            for suggestion in reflection["suggestions"]:
+                if suggestion not in suggestions:
+                    suggestions.append(suggestion)
+
+        return {
+            "score": sum(r["score"] for _, r in reflections) / len(reflections) if reflections else 0.0,
+            "feedback": feedback,
+            "suggestions": suggestions,
+        }
+
     def _score_result(self, result: dict[str, Any]) -> float:
         """Score the result (0.0 = failure, 1.0 = perfect)."""
         if "error" in result:
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from trainwreck.agent.step_plan import StepPlan
+from trainwreck.tools.git import GitAdapter
+
+# Actions whose effects on the working tree are unknown, so the full status is refreshed
+_MUTATING_ACTIONS = {"bash", "powershell", "git", "mcp"}
+
+
+class RepoStateTracker:
+    """
+    Builds the compact repository summary given to the planner.
+
+    The tracked-file tree is cached until HEAD or the git index changes, and
+    the dirty-file list is only refreshed for what the previous step could
+    have touched: the written paths after `write_file`, nothing after
+    `read_file`, and a full `git status` after shell, git or MCP actions.
+    A batch is treated as the union of its steps. Written paths are resolved
+    against `repo_path`, as the executor does, before matching git's output.
+    """
+
+    def __init__(
+        self, git: GitAdapter, repo_path: Path | None = None, max_tree_lines: int = 40, max_dirty: int = 30
+    ) -> None:
+        self.git = git
+        self.repo_path = repo_path or Path(".")
+        self.max_tree_lines = max_tree_lines
+        self.max_dirty = max_dirty
+        self._tree_key: tuple[Any, ...] | None = None
+        self._tree = ""
+        self._file_count = 0
+        self._dirty: dict[str, str] | None = None
+
+    def snapshot(self, last_plan: StepPlan | None = None) -> str:
+        """Return the repository summary, recomputing only what may have changed."""
+        tree_key = (self.git.head(), self.git.index_mtime())
+        if tree_key != self._tree_key:
+            self._refresh_tree()
+            self._tree_key = tree_key
+            # Staging, commits and checkouts can change any file's status
+            self._dirty = None
+
+        steps = (last_plan.steps or []) if last_plan is not None and last_plan.action == "batch" else [last_plan]
+        written = [
+            self._repo_relative(step.file_path)
+            for step in steps
+            if step and step.action == "write_file" and step.file_path
+        ]
+        # Writes outside the repository never show up in its status
+        written = [path for path in written if path != ".." and not path.startswith("../")]
+        if self._dirty is None or any(step is None or step.action in _MUTATING_ACTIONS for step in steps):
+            self._dirty = self.git.status_porcelain()
+        elif written:
+            for path in written:
+                self._dirty.pop(path, None)
+            self._dirty.update(self.git.status_porcelain(*written))
+        else:
+            return self._render()
+
+        # git status may refresh the index on disk without changing what is tracked
+        self._tree_key = (tree_key[0], self.git.index_mtime())
+        return self._render()
+
+    def _repo_relative(self, path: str) -> str:
+        """Express `path` as git status does: relative to the repository root, with forward slashes."""
+        return Path(os.path.relpath(self.repo_path / path, self.repo_path)).as_posix()
+
+    def invalidate(self) -> None:
+        """Force a full recomputation on the next snapshot."""
+        self._tree_key = None
+        self._dirty = None
+
+    def _refresh_tree(self) -> None:
+        """Summarize tracked files as directories with file counts."""
+        files = self.git.ls_files()
+        self._file_count = len(files)
+
+        top_level_files = sorted(f for f in files if "/" not in f)
+        dir_counts: Counter[str] = Counter()
+        for path in files:
+            parts = path.split("/")
+            if len(parts) > 1:
+                dir_counts[parts[0] + "/"] += 1
+            if len(parts) > 2:
+                dir_counts["/".join(parts[:2]) + "/"] += 1
+
+        lines = [f"{d} ({n} files)" for d, n in sorted(dir_counts.items())]
+        lines += top_level_files
+        if len(lines) > self.max_tree_lines:
+            omitted = len(lines) - self.max_tree_lines
+            lines = lines[: self.max_tree_lines] + [f"... {omitted} more entries"]
+        self._tree = "\n".join(f"  {line}" for line in lines)
+
+    def _render(self) -> str:
+        """Render the cached tree and dirty files as prompt text."""
+        head = self._tree_key[0] if self._tree_key else None
+        lines = [f"HEAD: {head[:12] if head else '(no commits)'}"]
+        lines.append(f"Tracked files: {self._file_count}")
+        if self._tree:
+            lines.append(self._tree)
+
+        dirty = self._dirty or {}
+        if dirty:
+            lines.append(f"Uncommitted changes ({len(dirty)}):")
+            for path, code in sorted(dirty.items())[: self.max_dirty]:
+                lines.append(f"  {code} {path}")
+            if len(dirty) > self.max_dirty:
+                lines.append(f"  ... {len(dirty) - self.max_dirty} more")
+        else:
+            lines.append("Working tree clean")
+        return "\n".join(lines)
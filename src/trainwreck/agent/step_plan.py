@@ -1,17 +1,37 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Literal
+from typing import Any, Literal
 
 
 @dataclass
 class StepPlan:
-    """A single step in the development plan."""
+    """
+    A single step in the development plan.
 
-    action: Literal["bash", "powershell", "git", "mcp", "abacus", "write_file", "read_file"]
+    A "batch" step carries several sub-steps in `steps`. Each sub-step has an
+    `id` and may list the ids it `depends_on`; sub-steps with no pending
+    dependencies run concurrently.
+    """
+
+    action: Literal["bash", "powershell", "git", "mcp", "abacus", "write_file", "read_file", "batch"]
     description: str
     command: str | None = None
     file_path: str | None = None
     content: str | None = None
     tool_name: str | None = None
     arguments: dict | None = None
+    id: str | None = None
+    depends_on: list[str] | None = None
+    steps: list[StepPlan] | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> StepPlan:
+        """Build a plan from parsed JSON, including nested batch steps."""
+        values = dict(data)
+        steps = values.get("steps")
+        if steps is not None:
+            if not isinstance(steps, list) or not all(isinstance(s, dict) for s in steps):
+                raise TypeError("steps must be a list of objects")
+            values["steps"] = [cls.from_dict(s) for s in steps]
+        return cls(**values)
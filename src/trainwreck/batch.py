@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import atexit
+import contextlib
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import MISSING, asdict, dataclass, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from trainwreck.tools.mcp import MCPServerPool
+
+# MCP servers kept alive between the jobs a worker process runs
+_mcp_pool: MCPServerPool | None = None
+
+
+@dataclass
+class BatchJob:
+    """One goal to run against one repository."""
+
+    goal: str
+    repo: str
+    model: str | None = None
+    max_iters: int = 20
+    mcp_server: str | None = None
+    mcp_config: str | None = None
+    temperature: float = 0.7
+    cache: bool = False
+    token_budget: int = 6000
+    command_timeout: float | None = 1800.0
+    idle_timeout: float | None = 600.0
+    shell_session: bool = False
+    mcp_lazy: bool = False
+    mcp_idle_timeout: float | None = None
+    mcp_max_tools: int | None = None
+    max_parallel_steps: int = 4
+    speculate: bool = False
+    recall: int = 0
+    embeddings: str | None = None
+
+    @property
+    def provider(self) -> str:
+        default_provider: str = os.getenv("MODEL_PROVIDER", "ollama")
+        return (self.model or default_provider).lower()
+
+    @property
+    def repo_path(self) -> Path:
+        return Path(self.repo).resolve()
+
+
+def load_manifest(path: Path) -> list[BatchJob]:
+    """
+    Load batch jobs from a JSONL file (one job per line) or a YAML file
+    holding a list of jobs, optionally under a top-level `jobs` key.
+    Relative repo paths are resolved against the manifest's directory.
+    Raises ValueError naming the line (or YAML job) of an invalid entry.
+    """
+    entries: list[tuple[str, Any]] = []
+    if path.suffix in (".yaml", ".yml"):
+        import yaml
+
+        data = yaml.safe_load(path.read_text()) or []
+        data = data.get("jobs", []) if isinstance(data, dict) else data
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: expected a list of jobs")
+        entries = [(f"job {i}", entry) for i, entry in enumerate(data, 1)]
+    else:
+        for number, line in enumerate(path.read_text().splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append((f"line {number}", json.loads(line)))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}, line {number}: invalid JSON: {e}") from e
+
+    keys = {f.name for f in fields(BatchJob)}
+    required = [f.name for f in fields(BatchJob) if f.default is MISSING]
+    jobs = []
+    for where, entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}, {where}: expected a mapping of job options, got {type(entry).__name__}")
+        unknown = sorted(set(entry) - keys)
+        if unknown:
+            raise ValueError(f"{path}, {where}: unknown key(s) {', '.join(map(str, unknown))}")
+        missing = [key for key in required if key not in entry]
+        if missing:
+            raise ValueError(f"{path}, {where}: missing required key(s) {', '.join(missing)}")
+        job = BatchJob(**entry)
+        if not Path(job.repo).is_absolute():
+            job.repo = str(path.parent / job.repo)
+        jobs.append(job)
+    return jobs
+
+
+def parse_backend_limits(specs: tuple[str, ...] | list[str]) -> dict[str, int]:
+    """Parse 'provider=N' strings into a per-provider concurrency cap."""
+    limits = {}
+    for spec in specs:
+        provider, sep, value = spec.partition("=")
+        if not sep or not value.isdigit() or int(value) < 1:
+            raise ValueError(f"Invalid backend limit '{spec}', expected provider=N")
+        limits[provider.strip().lower()] = int(value)
+    return limits
+
+
+def _worker_mcp_pool(idle_timeout: float | None) -> MCPServerPool:
+    """This worker's MCP server pool, created on first use and closed at exit."""
+    global _mcp_pool
+    from trainwreck.tools.mcp import MCPServerPool
+
+    if _mcp_pool is None:
+        _mcp_pool = MCPServerPool()
+        atexit.register(_mcp_pool.close)
+    _mcp_pool.idle_timeout = idle_timeout
+    return _mcp_pool
+
+
+def _run_job(job: BatchJob, log_path: str | None) -> dict[str, Any]:
+    """Worker entry point: run one job and return a picklable summary."""
+    from trainwreck.runner import run_goal
+
+    summary: dict[str, Any] = {**asdict(job), "provider": job.provider}
+    started = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        if log_path:
+            log = stack.enter_context(open(log_path, "w"))
+            stack.enter_context(contextlib.redirect_stdout(log))
+            stack.enter_context(contextlib.redirect_stderr(log))
+        try:
+            history = run_goal(
+                job.goal,
+                job.repo_path,
+                job.provider,
+                max_iters=job.max_iters,
+                mcp_server=job.mcp_server,
+                mcp_config=job.mcp_config,
+                temperature=job.temperature,
+                cache=job.cache,
+                token_budget=job.token_budget,
+                command_timeout=job.command_timeout,
+                idle_timeout=job.idle_timeout,
+                shell_session=job.shell_session,
+                mcp_lazy=job.mcp_lazy,
+                mcp_pool=_worker_mcp_pool(job.mcp_idle_timeout),
+                mcp_max_tools=job.mcp_max_tools,
+                max_parallel_steps=job.max_parallel_steps,
+                speculate=job.speculate,
+                recall=job.recall,
+                embeddings=job.embeddings,
+            )
+            summary["iterations"] = len(history)
+            summary["successes"] = sum(1 for h in history if h["score"] >= 0.9)
+            summary["achieved"] = bool(history) and history[-1]["score"] >= 0.9
+        except Exception as e:
+            summary["error"] = f"{type(e).__name__}: {e}"
+            summary["achieved"] = False
+    summary["elapsed"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_batch(
+    jobs: list[BatchJob],
+    workers: int,
+    backend_limits: dict[str, int] | None = None,
+    log_dir: Path | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Run jobs across a process pool and return their summaries in manifest order.
+
+    Worker processes are reused between jobs, so imports are paid once per
+    worker. A job starts only when its provider is under its cap in
+    `backend_limits` and no other job is running against the same repo, so
+    each repository's working tree and `.trainwreck.db` have one writer.
+    """
+    backend_limits = backend_limits or {}
+    if log_dir is not None:
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+    pending = list(enumerate(jobs))
+    running: dict[Future[dict[str, Any]], tuple[int, BatchJob]] = {}
+    active_providers: Counter[str] = Counter()
+    active_repos: set[Path] = set()
+    results: list[dict[str, Any]] = [{} for _ in jobs]
+
+    def can_start(job: BatchJob) -> bool:
+        limit = backend_limits.get(job.provider)
+        if limit is not None and active_providers[job.provider] >= limit:
+            return False
+        return job.repo_path not in active_repos
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for item in list(pending):
+                if len(running) >= workers:
+                    break
+                index, job = item
+                if not can_start(job):
+                    continue
+                log_path = str(log_dir / f"{index:03d}-{job.repo_path.name}.log") if log_dir else None
+                running[pool.submit(_run_job, job, log_path)] = item
+                active_providers[job.provider] += 1
+                active_repos.add(job.repo_path)
+                pending.remove(item)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, job = running.pop(future)
+                active_providers[job.provider] -= 1
+                active_repos.discard(job.repo_path)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    results[index] = {**asdict(job), "provider": job.provider, "achieved": False, "error": str(e)}
+
+    return results
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, cast
+
+from trainwreck.llm.base import LLMClient
+
+_FORMAT_VERSION = 1
+
+# Calls that release resources rather than do I/O worth replaying
+_UNRECORDED = {"close"}
+
+
+class CassetteMiss(LookupError):
+    """Raised in strict replay when a request was never recorded."""
+
+
+def _encode(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    return str(value)
+
+
+def _request_key(kind: str, method: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
+    material = json.dumps([kind, method, args, kwargs], sort_keys=True, default=_encode)
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    A gzip-compressed JSON Lines file of recorded calls.
+
+    Each line holds the kind of call ("llm", "executor" or "git"), the method,
+    a hash of its arguments and the response. Arguments are not stored, only
+    hashed, which keeps cassettes small.
+
+    In replay, a call gets the next unused response recorded for the same
+    request. If there is none, it falls back to the next unused response for
+    that method in recording order, because prompts can differ slightly
+    between runs (e.g. token counts from another tokenizer). With
+    `strict=True` such a miss raises CassetteMiss instead. With `cycle=True`
+    a method whose responses are all used starts over, so a short recording
+    can drive an arbitrarily long benchmark.
+
+    Cassettes wrap the blocking interfaces (LLMClient, Executor); the async
+    loop can replay through ThreadedAsyncLLMClient.
+    """
+
+    def __init__(self, path: Path, mode: str = "replay", strict: bool = False, cycle: bool = False) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Invalid cassette mode '{mode}', expected 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.strict = strict
+        self.cycle = cycle
+        self.meta: dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: list[dict[str, Any]] = []
+        # Replay indexes: per (kind, method) the recorded (key, response) list, and per key its unused positions
+        self._by_method: dict[tuple[str, str], list[tuple[str, str]]] = defaultdict(list)
+        self._by_key: dict[tuple[str, str, str], deque[int]] = {}
+        self._used: dict[tuple[str, str], set[int]] = defaultdict(set)
+        self._cursor: dict[tuple[str, str], int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+
+    def record(self, kind: str, method: str, args: tuple[Any, ...], kwargs: dict[str, Any], response: Any) -> None:
+        """Append one call and its response."""
+        entry = {
+            "kind": kind,
+            "method": method,
+            "key": _request_key(kind, method, args, kwargs),
+            "response": response,
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def replay(self, kind: str, method: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        """Return the recorded response for a call."""
+        key = _request_key(kind, method, args, kwargs)
+        slot = (kind, method)
+        with self._lock:
+            recorded = self._by_method.get(slot)
+            if not recorded:
+                raise CassetteMiss(f"No {kind}.{method} calls recorded in {self.path}")
+            if self.cycle and len(self._used[slot]) == len(recorded):
+                self._reset(slot)
+            position = self._take_keyed(slot, key)
+            if position is None:
+                if self.strict:
+                    raise CassetteMiss(f"No recorded {kind}.{method} call matches this request ({key})")
+                position = self._take_next(slot)
+                if position is None:
+                    raise CassetteMiss(f"All {len(recorded)} recorded {kind}.{method} calls have been replayed")
+                self.misses += 1
+            else:
+                self.hits += 1
+            response = recorded[position][1]
+        # Decode per call so callers never share (and mutate) one response object
+        return json.loads(response)
+
+    def save(self) -> None:
+        """Write a recording to `path`."""
+        if self.mode != "record":
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, gzip.open(self.path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"version": _FORMAT_VERSION, "meta": self.meta}) + "\n")
+            for entry in self._entries:
+                f.write(json.dumps(entry, default=_encode, separators=(",", ":")) + "\n")
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported cassette version in {self.path}: {header.get('version')}")
+            self.meta = header.get("meta", {})
+            for line in f:
+                entry = json.loads(line)
+                slot = (entry["kind"], entry["method"])
+                self._by_method[slot].append((entry["key"], json.dumps(entry["response"])))
+        for slot in self._by_method:
+            self._reset(slot)
+
+    def _reset(self, slot: tuple[str, str]) -> None:
+        self._used[slot] = set()
+        self._cursor[slot] = 0
+        keyed: dict[str, deque[int]] = defaultdict(deque)
+        for position, (key, _) in enumerate(self._by_method[slot]):
+            keyed[key].append(position)
+        for key, positions in keyed.items():
+            self._by_key[(slot[0], slot[1], key)] = positions
+
+    def _take_keyed(self, slot: tuple[str, str], key: str) -> int | None:
+        positions = self._by_key.get((*slot, key))
+        while positions:
+            position = positions.popleft()
+            if position not in self._used[slot]:
+                self._used[slot].add(position)
+                return position
+        return None
+
+    def _take_next(self, slot: tuple[str, str]) -> int | None:
+        recorded = self._by_method[slot]
+        while self._cursor[slot] < len(recorded):
+            position = self._cursor[slot]
+            self._cursor[slot] += 1
+            if position not in self._used[slot]:
+                self._used[slot].add(position)
+                return position
+        return None
+
+
+class RecordingLLMClient(LLMClient):
+    """Passes calls through to `client` and records each response; streams record the chunks consumed."""
+
+    def __init__(self, client: LLMClient, cassette: Cassette) -> None:
+        self.client = client
+        self.cassette = cassette
+
+    @property
+    def wrapped(self) -> LLMClient:
+        """The client being recorded."""
+        return self.client
+
+    def complete(self, prompt: str, **kwargs: Any) -> str:
+        response = self.client.complete(prompt, **kwargs)
+        self.cassette.record("llm", "complete", (prompt,), kwargs, response)
+        return response
+
+    def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        response = self.client.chat(messages, **kwargs)
+        self.cassette.record("llm", "chat", (messages,), kwargs, response)
+        return response
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        chunks: list[str] = []
+        stream = self.client.stream_chat(messages, **kwargs)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            # Also on early close: replay then stops where the planner stopped reading
+            self.cassette.record("llm", "stream_chat", (messages,), kwargs, chunks)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.client.embed(texts)
+        self.cassette.record("llm", "embed", (texts,), {}, vectors)
+        return vectors
+
+    def count_tokens(self, text: str) -> int:
+        return self.client.count_tokens(text)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class ReplayLLMClient(LLMClient):
+    """Serves recorded responses without contacting any model."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+
+    def complete(self, prompt: str, **kwargs: Any) -> str:
+        return cast(str, self.cassette.replay("llm", "complete", (prompt,), kwargs))
+
+    def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        return cast(str, self.cassette.replay("llm", "chat", (messages,), kwargs))
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        yield from self.cassette.replay("llm", "stream_chat", (messages,), kwargs)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return cast("list[list[float]]", self.cassette.replay("llm", "embed", (texts,), {}))
+
+
+class RecordingProxy:
+    """
+    Wraps an object (an Executor, or its GitAdapter) and records the result
+    of every method called on it. Attributes named in `nested` are wrapped
+    too, under their own kind.
+    """
+
+    def __init__(self, target: Any, cassette: Cassette, kind: str, nested: dict[str, str] | None = None) -> None:
+        self._target = target
+        self._cassette = cassette
+        self._kind = kind
+        for name, nested_kind in (nested or {}).items():
+            setattr(self, name, RecordingProxy(getattr(target, name), cassette, nested_kind))
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr) or name in _UNRECORDED:
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            result = attr(*args, **kwargs)
+            self._cassette.record(self._kind, name, args, kwargs, result)
+            return result
+
+        return call
+
+
+class ReplayProxy:
+    """
+    Stands in for a recorded object: every method call returns the recorded
+    result. `attributes` supplies plain attributes (e.g. `repo_path`) and
+    `nested` the kinds of wrapped sub-objects, as in RecordingProxy.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        kind: str,
+        attributes: dict[str, Any] | None = None,
+        nested: dict[str, str] | None = None,
+    ) -> None:
+        self._cassette = cassette
+        self._kind = kind
+        for name, value in (attributes or {}).items():
+            setattr(self, name, value)
+        for name, nested_kind in (nested or {}).items():
+            setattr(self, name, ReplayProxy(cassette, nested_kind))
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name in _UNRECORDED:
+            return lambda *_args, **_kwargs: None
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return self._cassette.replay(self._kind, name, args, kwargs)
+
+        return call
+
+
+def record_executor(executor: Any, cassette: Cassette) -> Any:
+    """Wrap an Executor so its step results and git queries are recorded."""
+    cassette.meta.setdefault("repo_path", str(executor.repo_path))
+    return RecordingProxy(executor, cassette, "executor", nested={"git": "git"})
+
+
+def replay_executor(cassette: Cassette) -> Any:
+    """An Executor stand-in that replays recorded step results and git queries."""
+    return ReplayProxy(
+        cassette,
+        "executor",
+        attributes={"repo_path": Path(cassette.meta.get("repo_path", "."))},
+        nested={"git": "git"},
+    )
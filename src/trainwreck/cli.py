@@ -1,19 +1,15 @@
 from __future__ import annotations
 
+import json
 import os
 from pathlib import Path
-from typing import Optional
 
 import click
 
-from trainwreck.agent.executor import Executor
-from trainwreck.agent.loop import FeedbackLoop
-from trainwreck.agent.planner import Planner
-from trainwreck.agent.reflector import Reflector
-from trainwreck.llm.factory import make_llm_client
+from trainwreck import telemetry, tracing
+from trainwreck.batch import load_manifest, parse_backend_limits, run_batch
 from trainwreck.memory.sqlite_store import SQLiteMemoryStore
-from trainwreck.tools.abacus import AbacusClient
-from trainwreck.tools.mcp import MCPClient
+from trainwreck.runner import run_goal
 
 
 @click.group()
@@ -23,7 +19,7 @@ def cli() -> None:
 
 
 @cli.command()
-@click.option("--goal", required=True, help="Development goal for TrainWreck.")
+@click.option("--goal", default=None, help="Development goal for TrainWreck (required unless resuming).")
 @click.option("--model", default=None, help="LLM provider (overrides MODEL_PROVIDER).")
 @click.option("--repo", default=".", help="Path to git repository.")
 @click.option("--max-iters", default=20, show_default=True, help="Maximum feedback iterations.")
@@ -37,71 +33,293 @@ def cli() -> None:
     default=None,
     help="Path to MCP configuration file (default: .trainwreck-mcp.json in repo).",
 )
+@click.option("--temperature", default=0.7, show_default=True, help="Planner sampling temperature.")
+@click.option(
+    "--cache/--no-cache",
+    default=False,
+    show_default=True,
+    help="Replay planner responses from .trainwreck-cache.db (only at temperature 0).",
+)
+@click.option("--prompt-budget", default=6000, show_default=True, help="Token budget for the planner prompt.")
+@click.option(
+    "--command-timeout",
+    default=1800.0,
+    show_default=True,
+    help="Kill shell commands running longer than this many seconds.",
+)
+@click.option(
+    "--idle-timeout",
+    default=600.0,
+    show_default=True,
+    help="Kill shell commands that produce no output for this many seconds.",
+)
+@click.option(
+    "--shell-session/--no-shell-session",
+    default=False,
+    show_default=True,
+    help="Run bash steps in one persistent shell so env vars and cwd carry over.",
+)
+@click.option(
+    "--mcp-lazy/--no-mcp-lazy",
+    default=False,
+    show_default=True,
+    help="Plan from cached MCP tool catalogs and only start a server when one of its tools is called.",
+)
+@click.option(
+    "--mcp-idle-timeout",
+    default=None,
+    type=float,
+    help="Stop MCP servers that have had no calls for this many seconds (restarted on demand).",
+)
+@click.option(
+    "--mcp-max-tools",
+    default=None,
+    type=int,
+    help="Only show the planner this many MCP tools, ranked by relevance to the goal.",
+)
+@click.option(
+    "--max-parallel-steps",
+    default=4,
+    show_default=True,
+    help="How many independent steps of a batch plan may run at once.",
+)
+@click.option(
+    "--speculate/--no-speculate",
+    default=False,
+    show_default=True,
+    help="Draft the next plan while a step runs, assuming it succeeds; discarded if it does not.",
+)
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    default=False,
+    help="Run on the asyncio stack (async LLM client, MCP and shell I/O). Not combinable with --record/--replay.",
+)
+@click.option(
+    "--recall",
+    default=0,
+    show_default=True,
+    help="Show the planner this many successful steps from past runs that are most similar to the goal.",
+)
+@click.option(
+    "--embeddings",
+    type=click.Choice(["hash", "ollama", "llamacpp", "hf_tgi"]),
+    default=None,
+    help="Embedding backend for --recall (defaults to TRAINWRECK_EMBEDDINGS, then the model-free hash).",
+)
+@click.option(
+    "--resume",
+    default=None,
+    metavar="RUN_ID",
+    help="Continue a run from its last checkpoint instead of starting over; completed steps are not re-run.",
+)
+@click.option(
+    "--record",
+    default=None,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Record every LLM response and step result to this cassette file.",
+)
+@click.option(
+    "--replay",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Replay a recorded cassette instead of calling the model or running commands.",
+)
+@click.option(
+    "--metrics-port",
+    default=None,
+    type=int,
+    help="Serve Prometheus metrics on this port while running (defaults to TRAINWRECK_METRICS_PORT).",
+)
+@click.option(
+    "--log-json",
+    default=None,
+    help="Append structured JSON events to this file, or '-' for stderr (defaults to TRAINWRECK_LOG_JSON).",
+)
+@click.option(
+    "--trace-exporter",
+    default=None,
+    type=click.Choice(tracing.TRACE_EXPORTERS),
+    help="Where to send the run's spans (defaults to TRAINWRECK_TRACE_EXPORTER, else json).",
+)
 def run(
-    goal: str,
-    model: Optional[str],
+    goal: str | None,
+    model: str | None,
     repo: str,
     max_iters: int,
-    mcp_server: Optional[str],
-    mcp_config: Optional[str],
+    mcp_server: str | None,
+    mcp_config: str | None,
+    temperature: float,
+    cache: bool,
+    prompt_budget: int,
+    command_timeout: float,
+    idle_timeout: float,
+    shell_session: bool,
+    mcp_lazy: bool,
+    mcp_idle_timeout: float | None,
+    mcp_max_tools: int | None,
+    max_parallel_steps: int,
+    speculate: bool,
+    use_async: bool,
+    recall: int,
+    embeddings: str | None,
+    resume: str | None,
+    record: Path | None,
+    replay: Path | None,
+    metrics_port: int | None,
+    log_json: str | None,
+    trace_exporter: str | None,
 ) -> None:
     """Run the TrainWreck agent on a given goal."""
     repo_path = Path(repo).resolve()
     if not repo_path.exists():
         raise click.BadParameter(f"Repository path does not exist: {repo_path}")
+    if not goal and not resume:
+        raise click.UsageError("Missing option '--goal' (or '--resume RUN_ID').")
 
-    provider = model or os.getenv("MODEL_PROVIDER", "ollama")
+    default_provider: str = os.getenv("MODEL_PROVIDER", "ollama")
+    provider = model or default_provider
 
-    llm = make_llm_client(provider=provider)
+    log_json = log_json or os.getenv("TRAINWRECK_LOG_JSON")
+    if log_json:
+        telemetry.configure_logging(log_json)
+    metrics_port = metrics_port or int(os.getenv("TRAINWRECK_METRICS_PORT", "0"))
+    if metrics_port:
+        addr = os.getenv("TRAINWRECK_METRICS_ADDR", "127.0.0.1")
+        telemetry.start_metrics_server(metrics_port, addr=addr)
+        click.echo(f"📈 Metrics at http://{addr}:{metrics_port}/metrics")
 
-    abacus: AbacusClient | None = None
-    if os.getenv("ABACUS_API_KEY"):
-        abacus = AbacusClient()
+    history = run_goal(
+        goal or "",
+        repo_path,
+        provider,
+        max_iters=max_iters,
+        mcp_server=mcp_server,
+        mcp_config=mcp_config,
+        temperature=temperature,
+        cache=cache,
+        token_budget=prompt_budget,
+        command_timeout=command_timeout,
+        idle_timeout=idle_timeout,
+        shell_session=shell_session,
+        mcp_lazy=mcp_lazy,
+        mcp_idle_timeout=mcp_idle_timeout,
+        mcp_max_tools=mcp_max_tools,
+        max_parallel_steps=max_parallel_steps,
+        speculate=speculate,
+        recall=recall,
+        embeddings=embeddings,
+        resume=resume,
+        record=record,
+        replay=replay,
+        trace_exporter=trace_exporter,
+        use_async=use_async,
+    )
 
-    mcp: MCPClient | None = None
+    click.echo("\n📊 Summary:")
+    click.echo(f"Iterations: {len(history)}")
+    successes = sum(1 for h in history if h["score"] >= 0.9)
+    click.echo(f"Successful steps (score >= 0.9): {successes}")
 
-    if mcp_server:
-        mcp = MCPClient(server_command=mcp_server.split())
-    else:
-        mcp = MCPClient()
 
-        config_path = Path(mcp_config) if mcp_config else repo_path / ".trainwreck-mcp.json"
-        if config_path.exists():
-            click.echo(f"📡 Loading MCP servers from {config_path}")
-            mcp.load_config(config_path)
+@cli.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Worker processes.")
+@click.option(
+    "--backend-limit",
+    multiple=True,
+    help="Per-provider concurrency cap, e.g. 'ollama=1'. Repeatable.",
+)
+@click.option(
+    "--log-dir",
+    default=None,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Write each job's output to a log file in this directory.",
+)
+@click.option(
+    "--summary-json",
+    default=None,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the aggregated summary to this JSON file.",
+)
+def batch(
+    manifest: Path,
+    workers: int,
+    backend_limit: tuple[str, ...],
+    log_dir: Path | None,
+    summary_json: Path | None,
+) -> None:
+    """Run the goal/repo pairs in a YAML or JSONL manifest in parallel."""
+    try:
+        limits = parse_backend_limits(backend_limit)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--backend-limit") from e
 
-    if mcp and mcp.servers:
-        click.echo(f"🔧 Connected to {len(mcp.servers)} MCP server(s)")
-        tools_summary = mcp.get_tools_summary()
-        click.echo(f"📋 Available MCP tools:{tools_summary}\n")
+    try:
+        jobs = load_manifest(manifest)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="MANIFEST") from e
+    click.echo(f"🚂 Running {len(jobs)} job(s) on {workers} worker(s)")
 
-    planner = Planner(llm=llm, mcp_client=mcp)
+    results = run_batch(jobs, workers=workers, backend_limits=limits, log_dir=log_dir)
 
-    executor = Executor(
-        repo_path=repo_path,
-        abacus=abacus,
-        mcp=mcp,
-    )
-    reflector = Reflector()
+    click.echo("\n📊 Batch summary:")
+    for result in results:
+        status = "✅" if result.get("achieved") else "❌"
+        detail = result.get("error") or f"{result.get('iterations', 0)} iteration(s)"
+        click.echo(f"{status} [{result['provider']}] {result['repo']}: {result['goal']} ({detail})")
+    achieved = sum(1 for r in results if r.get("achieved"))
+    click.echo(f"Goals achieved: {achieved}/{len(results)}")
+
+    if summary_json:
+        summary_json.write_text(json.dumps(results, indent=2))
+
+
+@cli.command()
+@click.option("--repo", default=".", help="Path to git repository.")
+@click.option("--keep-runs", default=None, type=int, help="Keep only this many of the most recent runs.")
+@click.option("--older-than", default=None, type=float, help="Delete runs started more than this many days ago.")
+@click.option(
+    "--max-size", default=None, type=float, help="Delete the oldest runs until the database fits in this many MB."
+)
+def vacuum(repo: str, keep_runs: int | None, older_than: float | None, max_size: float | None) -> None:
+    """Apply retention to the step history database and compact it."""
+    db_path = Path(repo).resolve() / ".trainwreck.db"
+    if not db_path.exists():
+        raise click.BadParameter(f"No step history database at {db_path}", param_hint="--repo")
 
-    memory_db_path = repo_path / ".trainwreck.db"
-    memory = SQLiteMemoryStore(memory_db_path)
+    store = SQLiteMemoryStore(db_path)
+    try:
+        before = db_path.stat().st_size
+        pruned = store.prune(keep_runs=keep_runs, older_than_days=older_than)
+        stats = store.vacuum(max_bytes=int(max_size * 1024 * 1024) if max_size is not None else None)
+    finally:
+        store.close()
 
-    click.echo(f"🚀 TrainWreck starting with model provider: {provider}")
-    click.echo(f"📁 Repo: {repo_path}")
-    click.echo(f"🎯 Goal: {goal}")
-    click.echo(f"🔁 Max iterations: {max_iters}\n")
+    click.echo(f"🧹 Deleted {pruned + stats['runs_deleted']} run(s) and {stats['blobs_deleted']} unused blob(s)")
+    click.echo(f"💾 {db_path}: {before / 1024 / 1024:.1f} MB → {db_path.stat().st_size / 1024 / 1024:.1f} MB")
 
-    loop = FeedbackLoop(planner, executor, reflector, memory=memory)
-    history = loop.iterate(goal=goal, max_iters=max_iters)
 
-    click.echo("\n📊 Summary:")
-    click.echo(f"Iterations: {len(history)}")
-    successes = sum(1 for h in history if h["score"] >= 0.9)
-    click.echo(f"Successful steps (score >= 0.9): {successes}")
+@cli.group()
+def trace() -> None:
+    """Inspect the span traces of past runs."""
 
-    if mcp is not None:
-        mcp.close()
+
+@trace.command("show")
+@click.argument("run_id")
+@click.option("--repo", default=".", help="Path to git repository.")
+@click.option("--min-ms", default=0.0, show_default=True, help="Hide spans shorter than this many milliseconds.")
+@click.option("--width", default=40, show_default=True, help="Width of the timeline bars.")
+def trace_show(run_id: str, repo: str, min_ms: float, width: int) -> None:
+    """Show a run's span tree on a timeline, and where its time went."""
+    trace_dir = Path(repo).resolve() / tracing.TRACE_DIR_NAME
+    try:
+        spans = tracing.load_trace(trace_dir, run_id)
+    except LookupError as e:
+        raise click.ClickException(str(e)) from e
+    for line in tracing.format_trace(spans, width=width, min_ms=min_ms):
+        click.echo(line)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 """LLM abstraction and provider clients."""
 
-from trainwreck.llm.base import LLMClient
-from trainwreck.llm.factory import make_llm_client
+from trainwreck.llm.base import AsyncLLMClient, LLMClient
+from trainwreck.llm.factory import make_async_llm_client, make_llm_client
 
-__all__ = ["LLMClient", "make_llm_client"]
+__all__ = ["AsyncLLMClient", "LLMClient", "make_async_llm_client", "make_llm_client"]
@@ -3,12 +3,10 @@ from __future__ import annotations
 import os
 from typing import Any
 
-import httpx
+from trainwreck.llm.http import HTTPLLMClient
 
-from trainwreck.llm.base import LLMClient
 
-
-class AbacusLLMClient(LLMClient):
+class AbacusLLMClient(HTTPLLMClient):
     """Abacus.AI LLM client."""
 
     def __init__(self) -> None:
@@ -21,7 +19,13 @@ class AbacusLLMClient(LLMClient):
             raise ValueError("ABACUS_DEPLOYMENT_ID environment variable not set")
 
         self.deployment_token = os.getenv("ABACUS_DEPLOYMENT_TOKEN")
-        self.base_url = "https://api.abacus.ai"
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+        }
+        if self.deployment_token:
+            headers["X-Deployment-Token"] = self.deployment_token
+        super().__init__("https://api.abacus.ai", timeout=60.0, headers=headers)
 
     def complete(self, prompt: str, **kwargs: Any) -> str:
         """Generate a completion using Abacus.AI."""
@@ -35,20 +39,9 @@ class AbacusLLMClient(LLMClient):
 
     def _predict(self, prompt: str, **kwargs: Any) -> str:
         """Make a prediction request to Abacus.AI."""
-        url = f"{self.base_url}/v0/deployments/{self.deployment_id}/predict"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        if self.deployment_token:
-            headers["X-Deployment-Token"] = self.deployment_token
-
         payload = {
             "prompt": prompt,
             **kwargs,
         }
-
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, headers=headers, timeout=60.0)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("prediction", "")
+        data = self._post_json(f"/v0/deployments/{self.deployment_id}/predict", payload)
+        return data.get("prediction", "")
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
 
+def estimate_tokens(text: str) -> int:
+    """Fast token estimate (~4 characters per token) for providers without a local tokenizer."""
+    return len(text) // 4 + 1
+
+
 class LLMClient(ABC):
     """Abstract base for all LLM clients."""
 
@@ -16,3 +23,107 @@ class LLMClient(ABC):
     def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
         """Generate a chat completion for the given messages."""
         ...
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """
+        Yield a chat completion incrementally as text chunks.
+        Clients without a streaming API yield the full response once.
+        Closing the generator early abandons the rest of the generation.
+        """
+        yield self.chat(messages, **kwargs)
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens `text` occupies for this provider's model."""
+        return estimate_tokens(text)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one embedding vector per text. Only some providers serve embeddings."""
+        raise NotImplementedError(f"{type(self).__name__} does not provide embeddings")
+
+    def close(self) -> None:
+        """Release any resources held by the client."""
+        return None
+
+    def __enter__(self) -> LLMClient:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncLLMClient(ABC):
+    """Abstract base for asyncio-native LLM clients."""
+
+    @abstractmethod
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a completion for the given prompt."""
+        ...
+
+    @abstractmethod
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        """Generate a chat completion for the given messages."""
+        ...
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Yield a chat completion incrementally as text chunks.
+        Clients without a streaming API yield the full response once.
+        """
+        yield await self.chat(messages, **kwargs)
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens `text` occupies for this provider's model."""
+        return estimate_tokens(text)
+
+    async def aclose(self) -> None:
+        """Release any resources held by the client."""
+        return None
+
+    async def __aenter__(self) -> AsyncLLMClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class ThreadedAsyncLLMClient(AsyncLLMClient):
+    """Runs a blocking LLMClient in worker threads for providers without a native async API."""
+
+    def __init__(self, client: LLMClient) -> None:
+        self.client = client
+
+    @property
+    def wrapped(self) -> LLMClient:
+        """The blocking client run in worker threads."""
+        return self.client
+
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a completion in a worker thread."""
+        return await asyncio.to_thread(self.client.complete, prompt, **kwargs)
+
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        """Generate a chat completion in a worker thread."""
+        return await asyncio.to_thread(self.client.chat, messages, **kwargs)
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        """Pull chunks from the blocking stream one worker-thread hop at a time."""
+        stream = self.client.stream_chat(messages, **kwargs)
+        done = object()
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, stream, done)
+                if chunk is done:
+                    return
+                yield chunk  # type: ignore[misc]
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the wrapped client's tokenizer."""
+        return self.client.count_tokens(text)
+
+    async def aclose(self) -> None:
+        """Close the wrapped client."""
+        await asyncio.to_thread(self.client.close)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of LLM responses.
+
+    Entries are keyed on a hash of (provider, model, messages, temperature).
+    A small in-memory LRU sits in front of an optional SQLite file so reruns
+    of the same goal can replay without calling the model. Requests with a
+    temperature above `max_temperature` are not cached, since their output is
+    not meant to be reproducible. Pass `check_same_thread=False` to use the
+    cache from worker threads, one call at a time.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | None = None,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float | None = 7 * 24 * 3600,
+        max_temperature: float = 0.0,
+        check_same_thread: bool = True,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.conn: sqlite3.Connection | None = None
+        if db_path is not None:
+            self.conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread)
+            self._init_db()
+
+    def _init_db(self) -> None:
+        """Initialize the database schema."""
+        assert self.conn is not None
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                accessed_at REAL
+            )
+        """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(llm: Any, messages: list[dict[str, str]], temperature: float) -> str:
+        """Hash the request into a cache key, identifying the backend by the innermost wrapped client."""
+        # Instrumentation, recording and thread wrappers expose the client they wrap as `wrapped`
+        while getattr(llm, "wrapped", None) is not None:
+            llm = llm.wrapped
+        material = {
+            "provider": type(llm).__name__,
+            "base_url": getattr(llm, "base_url", None),
+            "model": getattr(llm, "model", None),
+            "messages": messages,
+            "temperature": temperature,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+    def cacheable(self, temperature: float) -> bool:
+        """Whether responses at this temperature may be cached."""
+        return temperature <= self.max_temperature
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> str | None:
+        """Return a cached response, or None on a miss."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._memory[key]
+
+        if self.conn is not None:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                if not self._expired(row[1]):
+                    self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                    self.conn.commit()
+                    response: str = row[0]
+                    self._remember(key, response, row[1])
+                    self.hits += 1
+                    return response
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response in both tiers."""
+        now = time.time()
+        self._remember(key, response, now)
+        if self.conn is None:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, response, len(response.encode()), now, now),
+        )
+        self._evict_disk()
+        self.conn.commit()
+
+    def _remember(self, key: str, response: str, created_at: float) -> None:
+        """Insert into the in-memory LRU, evicting the least recently used entries."""
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """Drop expired rows, then least recently used rows until under max_bytes."""
+        assert self.conn is not None
+        if self.ttl is not None:
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
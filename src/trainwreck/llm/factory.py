@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import os
 
-from trainwreck.llm.base import LLMClient
+from trainwreck.llm.base import AsyncLLMClient, LLMClient, ThreadedAsyncLLMClient
+from trainwreck.llm.instrumented import InstrumentedAsyncLLMClient, InstrumentedLLMClient
 from trainwreck.llm.types import LLMProvider
 
 
@@ -10,10 +11,15 @@ def make_llm_client(provider: str | None = None) -> LLMClient:
     """
     Factory to create an LLM client based on provider name.
     Falls back to MODEL_PROVIDER env var, then 'ollama'.
+    The client is wrapped to record latency and token metrics.
     """
-    provider = provider or os.getenv("MODEL_PROVIDER", "ollama")
-    provider = provider.lower()
+    default_provider: str = os.getenv("MODEL_PROVIDER", "ollama")
+    provider = (provider or default_provider).lower()
+    return InstrumentedLLMClient(_make_llm_client(provider), provider)
 
+
+def _make_llm_client(provider: str) -> LLMClient:
+    """The uninstrumented client for a provider name."""
     if provider == "openai":
         from trainwreck.llm.openai_client import OpenAILLMClient
 
@@ -64,3 +70,52 @@ def make_llm_client(provider: str | None = None) -> LLMClient:
         return HuggingFaceTGIClient()
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def make_async_llm_client(provider: str | None = None) -> AsyncLLMClient:
+    """
+    Factory to create an asyncio-native LLM client.
+    Providers without a native async client are wrapped in ThreadedAsyncLLMClient.
+    The client is wrapped to record latency and token metrics.
+    """
+    default_provider: str = os.getenv("MODEL_PROVIDER", "ollama")
+    provider = (provider or default_provider).lower()
+    client = _make_async_llm_client(provider)
+    if isinstance(client, ThreadedAsyncLLMClient):
+        # The blocking client inside is instrumented already
+        return client
+    return InstrumentedAsyncLLMClient(client, provider)
+
+
+def _make_async_llm_client(provider: str) -> AsyncLLMClient:
+    """The uninstrumented async client for a provider name."""
+    if provider == "ollama":
+        from trainwreck.llm.local.ollama import AsyncOllamaClient
+
+        return AsyncOllamaClient()
+    elif provider == "lmstudio":
+        from trainwreck.llm.local.lmstudio import AsyncLMStudioClient
+
+        return AsyncLMStudioClient()
+    elif provider == "vllm":
+        from trainwreck.llm.local.vllm import AsyncVLLMClient
+
+        return AsyncVLLMClient()
+    elif provider == "localai":
+        from trainwreck.llm.local.localai import AsyncLocalAIClient
+
+        return AsyncLocalAIClient()
+    elif provider == "llamacpp":
+        from trainwreck.llm.local.llamacpp import AsyncLlamaCppClient
+
+        return AsyncLlamaCppClient()
+    elif provider == "jan":
+        from trainwreck.llm.local.jan import AsyncJanClient
+
+        return AsyncJanClient()
+    elif provider == "hf_tgi":
+        from trainwreck.llm.local.hf_tgi import AsyncHuggingFaceTGIClient
+
+        return AsyncHuggingFaceTGIClient()
+    else:
+        return ThreadedAsyncLLMClient(make_llm_client(provider))
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+from collections.abc import AsyncGenerator, Iterator
+from typing import Any
+
+import httpx
+
+from trainwreck.llm.base import AsyncLLMClient, LLMClient
+
+
+def _http2_available() -> bool:
+    """Return True if the optional h2 package is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def make_http_limits() -> httpx.Limits:
+    """
+    Build connection pool limits from the environment.
+    TRAINWRECK_HTTP_MAX_CONNECTIONS, TRAINWRECK_HTTP_MAX_KEEPALIVE and
+    TRAINWRECK_HTTP_KEEPALIVE_EXPIRY (seconds) override the defaults.
+    """
+    return httpx.Limits(
+        max_connections=int(os.getenv("TRAINWRECK_HTTP_MAX_CONNECTIONS", "10")),
+        max_keepalive_connections=int(os.getenv("TRAINWRECK_HTTP_MAX_KEEPALIVE", "5")),
+        keepalive_expiry=float(os.getenv("TRAINWRECK_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def use_http2() -> bool:
+    """HTTP/2 is used when h2 is installed, unless TRAINWRECK_HTTP2=0."""
+    if os.getenv("TRAINWRECK_HTTP2", "1").lower() in ("0", "false", "no"):
+        return False
+    return _http2_available()
+
+
+def make_http_client(
+    base_url: str,
+    timeout: float = 120.0,
+    headers: dict[str, str] | None = None,
+) -> httpx.Client:
+    """Create a keep-alive httpx.Client bound to a single base URL."""
+    return httpx.Client(
+        base_url=base_url,
+        timeout=timeout,
+        headers=headers,
+        limits=make_http_limits(),
+        http2=use_http2(),
+    )
+
+
+def make_async_http_client(
+    base_url: str,
+    timeout: float = 120.0,
+    headers: dict[str, str] | None = None,
+) -> httpx.AsyncClient:
+    """Create a keep-alive httpx.AsyncClient bound to a single base URL."""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        headers=headers,
+        limits=make_http_limits(),
+        http2=use_http2(),
+    )
+
+
+class HTTPLLMClient(LLMClient):
+    """
+    Base for LLM clients that talk to an HTTP API.
+
+    Each client owns one pooled httpx.Client for its base URL, created on first
+    use, so repeated planner calls reuse warm connections instead of paying
+    TCP/TLS setup on every request.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 120.0,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._http: httpx.Client | None = None
+
+    @property
+    def http(self) -> httpx.Client:
+        """The pooled HTTP client for this base URL."""
+        if self._http is None or self._http.is_closed:
+            self._http = make_http_client(self.base_url, timeout=self.timeout, headers=self.headers)
+        return self._http
+
+    def _post_json(self, path: str, payload: dict[str, Any]) -> Any:
+        """POST a JSON payload and return the decoded JSON response."""
+        response = self.http.post(path, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def _stream_lines(self, path: str, payload: dict[str, Any]) -> Iterator[str]:
+        """POST a JSON payload and yield non-empty response lines as they arrive."""
+        with self.http.stream("POST", path, json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line.strip():
+                    yield line
+
+    def _stream_ndjson(self, path: str, payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """Yield objects from a newline-delimited JSON stream."""
+        for line in self._stream_lines(path, payload):
+            yield json.loads(line)
+
+    def _stream_sse(self, path: str, payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """Yield JSON `data:` payloads from a server-sent events stream."""
+        for line in self._stream_lines(path, payload):
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                return
+            yield json.loads(data)
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+
+class AsyncHTTPLLMClient(AsyncLLMClient):
+    """Async counterpart of HTTPLLMClient, backed by a pooled httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 120.0,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The pooled async HTTP client for this base URL."""
+        if self._http is None or self._http.is_closed:
+            self._http = make_async_http_client(self.base_url, timeout=self.timeout, headers=self.headers)
+        return self._http
+
+    async def _post_json(self, path: str, payload: dict[str, Any]) -> Any:
+        """POST a JSON payload and return the decoded JSON response."""
+        response = await self.http.post(path, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def _stream_lines(self, path: str, payload: dict[str, Any]) -> AsyncGenerator[str, None]:
+        """POST a JSON payload and yield non-empty response lines as they arrive."""
+        async with self.http.stream("POST", path, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield line
+
+    async def _stream_ndjson(self, path: str, payload: dict[str, Any]) -> AsyncGenerator[dict[str, Any], None]:
+        """Yield objects from a newline-delimited JSON stream."""
+        stream = self._stream_lines(path, payload)
+        try:
+            async for line in stream:
+                yield json.loads(line)
+        finally:
+            await stream.aclose()
+
+    async def _stream_sse(self, path: str, payload: dict[str, Any]) -> AsyncGenerator[dict[str, Any], None]:
+        """Yield JSON `data:` payloads from a server-sent events stream."""
+        stream = self._stream_lines(path, payload)
+        try:
+            async for line in stream:
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    return
+                yield json.loads(data)
+        finally:
+            await stream.aclose()
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
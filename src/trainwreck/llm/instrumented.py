@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from trainwreck import telemetry, tracing
+from trainwreck.llm.base import AsyncLLMClient, LLMClient
+
+
+def _prompt_text(messages: list[dict[str, str]]) -> str:
+    return "\n".join(m.get("content", "") for m in messages)
+
+
+class _Instrumentation:
+    """Shared bookkeeping for the sync and async wrappers."""
+
+    def __init__(self, client: Any, provider: str) -> None:
+        self.client = client
+        self.provider = provider
+
+    @property
+    def wrapped(self) -> Any:
+        """The client being instrumented."""
+        return self.client
+
+    def __getattr__(self, name: str) -> Any:
+        # Provider-specific attributes (model, embed_model, ...) stay reachable
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def count_tokens(self, text: str) -> int:
+        tokens: int = self.client.count_tokens(text)
+        return tokens
+
+    @contextmanager
+    def _request(self, method: str, prompt: str) -> Iterator[dict[str, Any]]:
+        """Time one request; the caller stores the generated text in the yielded dict as "completion"."""
+        call: dict[str, Any] = {}
+        fields: dict[str, Any] = {"provider": self.provider, "method": method}
+        # Not made current: a stream's generator may be resumed from another context
+        span = tracing.start_span("llm_request", **fields)
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            telemetry.LLM_ERRORS.labels(self.provider, method).inc()
+            fields["error"] = str(e)
+            span.fail(e)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            telemetry.LLM_REQUEST_SECONDS.labels(self.provider, method).observe(seconds)
+            prompt_tokens = self.count_tokens(prompt)
+            completion_tokens = self.count_tokens(call["completion"]) if call.get("completion") else 0
+            telemetry.LLM_TOKENS.labels(self.provider, "prompt").inc(prompt_tokens)
+            telemetry.LLM_TOKENS.labels(self.provider, "completion").inc(completion_tokens)
+            if "first_token" in call:
+                fields["time_to_first_token"] = round(call["first_token"], 6)
+                telemetry.LLM_FIRST_TOKEN_SECONDS.labels(self.provider).observe(call["first_token"])
+            span.set(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                time_to_first_token=fields.get("time_to_first_token"),
+            )
+            span.end()
+            telemetry.log_event(
+                "llm_request",
+                level="error" if "error" in fields else "info",
+                seconds=round(seconds, 6),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                **fields,
+            )
+
+
+class InstrumentedLLMClient(_Instrumentation, LLMClient):
+    """
+    Wraps an LLMClient to record the latency, token counts and (for streams)
+    time to first token of every call in Prometheus metrics and the JSON log.
+    Tokens are counted with the client's own count_tokens, since not every
+    provider reports usage.
+    """
+
+    client: LLMClient
+
+    def complete(self, prompt: str, **kwargs: Any) -> str:
+        with self._request("complete", prompt) as call:
+            completion = self.client.complete(prompt, **kwargs)
+            call["completion"] = completion
+        return completion
+
+    def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        with self._request("chat", _prompt_text(messages)) as call:
+            completion = self.client.chat(messages, **kwargs)
+            call["completion"] = completion
+        return completion
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        chunks: list[str] = []
+        with self._request("stream_chat", _prompt_text(messages)) as call:
+            start = time.perf_counter()
+            stream = self.client.stream_chat(messages, **kwargs)
+            try:
+                for chunk in stream:
+                    if not chunks:
+                        call["first_token"] = time.perf_counter() - start
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+                # Also when the caller stops reading early: count what was generated so far
+                call["completion"] = "".join(chunks)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        with self._request("embed", "\n".join(texts)):
+            return self.client.embed(texts)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class InstrumentedAsyncLLMClient(_Instrumentation, AsyncLLMClient):
+    """The async counterpart of InstrumentedLLMClient."""
+
+    client: AsyncLLMClient
+
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        with self._request("complete", prompt) as call:
+            completion = await self.client.complete(prompt, **kwargs)
+            call["completion"] = completion
+        return completion
+
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        with self._request("chat", _prompt_text(messages)) as call:
+            completion = await self.client.chat(messages, **kwargs)
+            call["completion"] = completion
+        return completion
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        chunks: list[str] = []
+        with self._request("stream_chat", _prompt_text(messages)) as call:
+            start = time.perf_counter()
+            stream = self.client.stream_chat(messages, **kwargs)
+            try:
+                async for chunk in stream:
+                    if not chunks:
+                        call["first_token"] = time.perf_counter() - start
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                call["completion"] = "".join(chunks)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -1,31 +1,27 @@
 from __future__ import annotations
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import httpx
+from trainwreck.llm.http import AsyncHTTPLLMClient, HTTPLLMClient
 
-from trainwreck.llm.base import LLMClient
 
-
-class HuggingFaceTGIClient(LLMClient):
+class HuggingFaceTGIClient(HTTPLLMClient):
     """Hugging Face Text Generation Inference (TGI) local LLM client."""
 
     def __init__(self) -> None:
-        self.base_url = os.getenv("HF_TGI_BASE_URL", "http://localhost:8080")
+        super().__init__(os.getenv("HF_TGI_BASE_URL", "http://localhost:8080"))
 
     def complete(self, prompt: str, **kwargs: Any) -> str:
         """Generate a completion using HF TGI."""
-        url = f"{self.base_url}/generate"
         payload = {
             "inputs": prompt,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=120.0)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("generated_text", "")
+        data = self._post_json("/generate", payload)
+        text: str = data.get("generated_text", "")
+        return text
 
     def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
         """Generate a chat completion using HF TGI."""
@@ -33,3 +29,69 @@ class HuggingFaceTGIClient(LLMClient):
         # Convert messages to a single prompt
         prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
         return self.complete(prompt, **kwargs)
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """Stream a completion from HF TGI over SSE."""
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        payload = {
+            "inputs": prompt,
+            **kwargs,
+        }
+        for event in self._stream_sse("/generate_stream", payload):
+            token = event.get("token", {})
+            if token.get("special"):
+                continue
+            text = token.get("text")
+            if text:
+                yield text
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed texts with a Text Embeddings Inference server. TGI itself has no
+        embedding route, so HF_TEI_BASE_URL can point at a separate TEI instance.
+        """
+        base_url = os.getenv("HF_TEI_BASE_URL")
+        path = f"{base_url.rstrip('/')}/embed" if base_url else "/embed"
+        vectors: list[list[float]] = self._post_json(path, {"inputs": texts})
+        return vectors
+
+
+class AsyncHuggingFaceTGIClient(AsyncHTTPLLMClient):
+    """Async Hugging Face TGI client."""
+
+    def __init__(self) -> None:
+        super().__init__(os.getenv("HF_TGI_BASE_URL", "http://localhost:8080"))
+
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a completion using HF TGI."""
+        payload = {
+            "inputs": prompt,
+            **kwargs,
+        }
+        data = await self._post_json("/generate", payload)
+        text: str = data.get("generated_text", "")
+        return text
+
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        """Generate a chat completion using HF TGI."""
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        return await self.complete(prompt, **kwargs)
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        """Stream a completion from HF TGI over SSE."""
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        payload = {
+            "inputs": prompt,
+            **kwargs,
+        }
+        stream = self._stream_sse("/generate_stream", payload)
+        try:
+            async for event in stream:
+                token = event.get("token", {})
+                if token.get("special"):
+                    continue
+                text = token.get("text")
+                if text:
+                    yield text
+        finally:
+            await stream.aclose()
@@ -1,32 +1,28 @@
 from __future__ import annotations
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import httpx
+from trainwreck.llm.http import AsyncHTTPLLMClient, HTTPLLMClient
 
-from trainwreck.llm.base import LLMClient
 
-
-class LlamaCppClient(LLMClient):
+class LlamaCppClient(HTTPLLMClient):
     """llama.cpp server local LLM client."""
 
     def __init__(self) -> None:
-        self.base_url = os.getenv("LLAMACPP_BASE_URL", "http://localhost:8080")
+        super().__init__(os.getenv("LLAMACPP_BASE_URL", "http://localhost:8080"))
 
     def complete(self, prompt: str, **kwargs: Any) -> str:
         """Generate a completion using llama.cpp server."""
-        url = f"{self.base_url}/completion"
         payload = {
             "prompt": prompt,
             "stream": False,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=120.0)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("content", "")
+        data = self._post_json("/completion", payload)
+        text: str = data.get("content", "")
+        return text
 
     def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
         """Generate a chat completion using llama.cpp server."""
@@ -34,3 +30,66 @@ class LlamaCppClient(LLMClient):
         # Convert messages to a single prompt
         prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
         return self.complete(prompt, **kwargs)
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """Stream a completion from llama.cpp server over SSE."""
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        payload = {
+            "prompt": prompt,
+            **kwargs,
+            "stream": True,
+        }
+        for event in self._stream_sse("/completion", payload):
+            content = event.get("content")
+            if content:
+                yield content
+            if event.get("stop"):
+                return
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts via the OpenAI-compatible endpoint (server started with --embedding)."""
+        data = self._post_json("/v1/embeddings", {"input": texts})
+        items = sorted(data.get("data", []), key=lambda item: item.get("index", 0))
+        return [item["embedding"] for item in items]
+
+
+class AsyncLlamaCppClient(AsyncHTTPLLMClient):
+    """Async llama.cpp server client."""
+
+    def __init__(self) -> None:
+        super().__init__(os.getenv("LLAMACPP_BASE_URL", "http://localhost:8080"))
+
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a completion using llama.cpp server."""
+        payload = {
+            "prompt": prompt,
+            "stream": False,
+            **kwargs,
+        }
+        data = await self._post_json("/completion", payload)
+        text: str = data.get("content", "")
+        return text
+
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        """Generate a chat completion using llama.cpp server."""
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        return await self.complete(prompt, **kwargs)
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        """Stream a completion from llama.cpp server over SSE."""
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        payload = {
+            "prompt": prompt,
+            **kwargs,
+            "stream": True,
+        }
+        stream = self._stream_sse("/completion", payload)
+        try:
+            async for event in stream:
+                content = event.get("content")
+                if content:
+                    yield content
+                if event.get("stop"):
+                    return
+        finally:
+            await stream.aclose()
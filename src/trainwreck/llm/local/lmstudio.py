@@ -1,44 +1,99 @@
 from __future__ import annotations
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import httpx
+from trainwreck.llm.http import AsyncHTTPLLMClient, HTTPLLMClient
 
-from trainwreck.llm.base import LLMClient
 
-
-class LMStudioClient(LLMClient):
+class LMStudioClient(HTTPLLMClient):
     """LM Studio local LLM client."""
 
     def __init__(self) -> None:
-        self.base_url = os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234")
+        super().__init__(os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234"))
         self.model = os.getenv("LMSTUDIO_MODEL", "local-model")
 
     def complete(self, prompt: str, **kwargs: Any) -> str:
         """Generate a completion using LM Studio."""
-        url = f"{self.base_url}/v1/completions"
         payload = {
             "model": self.model,
             "prompt": prompt,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=120.0)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["text"].strip()
+        data = self._post_json("/v1/completions", payload)
+        text: str = data["choices"][0]["text"].strip()
+        return text
 
     def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
         """Generate a chat completion using LM Studio."""
-        url = f"{self.base_url}/v1/chat/completions"
         payload = {
             "model": self.model,
             "messages": messages,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=120.0)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
+        data = self._post_json("/v1/chat/completions", payload)
+        text: str = data["choices"][0]["message"]["content"]
+        return text
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """Stream a chat completion from LM Studio over SSE."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            **kwargs,
+        }
+        for event in self._stream_sse("/v1/chat/completions", payload):
+            choices = event.get("choices") or [{}]
+            content = choices[0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+class AsyncLMStudioClient(AsyncHTTPLLMClient):
+    """Async LM Studio client."""
+
+    def __init__(self) -> None:
+        super().__init__(os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234"))
+        self.model = os.getenv("LMSTUDIO_MODEL", "local-model")
+
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a completion using LM Studio."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            **kwargs,
+        }
+        data = await self._post_json("/v1/completions", payload)
+        text: str = data["choices"][0]["text"].strip()
+        return text
+
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        """Generate a chat completion using LM Studio."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            **kwargs,
+        }
+        data = await self._post_json("/v1/chat/completions", payload)
+        text: str = data["choices"][0]["message"]["content"]
+        return text
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        """Stream a chat completion from LM Studio over SSE."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            **kwargs,
+        }
+        stream = self._stream_sse("/v1/chat/completions", payload)
+        try:
+            async for event in stream:
+                choices = event.get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+        finally:
+            await stream.aclose()
@@ -1,46 +1,112 @@
 from __future__ import annotations
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import httpx
+from trainwreck.llm.http import AsyncHTTPLLMClient, HTTPLLMClient
 
-from trainwreck.llm.base import LLMClient
 
-
-class OllamaClient(LLMClient):
+class OllamaClient(HTTPLLMClient):
     """Ollama local LLM client."""
 
     def __init__(self) -> None:
-        self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        super().__init__(os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
         self.model = os.getenv("OLLAMA_MODEL", "llama2")
+        self.embed_model = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
 
     def complete(self, prompt: str, **kwargs: Any) -> str:
         """Generate a completion using Ollama."""
-        url = f"{self.base_url}/api/generate"
         payload = {
             "model": self.model,
             "prompt": prompt,
             "stream": False,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=120.0)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "")
+        data = self._post_json("/api/generate", payload)
+        text: str = data.get("response", "")
+        return text
 
     def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
         """Generate a chat completion using Ollama."""
-        url = f"{self.base_url}/api/chat"
         payload = {
             "model": self.model,
             "messages": messages,
             "stream": False,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=120.0)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("message", {}).get("content", "")
+        data = self._post_json("/api/chat", payload)
+        text: str = data.get("message", {}).get("content", "")
+        return text
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """Stream a chat completion from Ollama as NDJSON."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            **kwargs,
+        }
+        for chunk in self._stream_ndjson("/api/chat", payload):
+            content = chunk.get("message", {}).get("content")
+            if content:
+                yield content
+            if chunk.get("done"):
+                return
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts with Ollama's embedding model (OLLAMA_EMBED_MODEL)."""
+        data = self._post_json("/api/embed", {"model": self.embed_model, "input": texts})
+        vectors: list[list[float]] = data.get("embeddings", [])
+        return vectors
+
+
+class AsyncOllamaClient(AsyncHTTPLLMClient):
+    """Async Ollama client."""
+
+    def __init__(self) -> None:
+        super().__init__(os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+        self.model = os.getenv("OLLAMA_MODEL", "llama2")
+
+    async def complete(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a completion using Ollama."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            **kwargs,
+        }
+        data = await self._post_json("/api/generate", payload)
+        text: str = data.get("response", "")
+        return text
+
+    async def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        """Generate a chat completion using Ollama."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            **kwargs,
+        }
+        data = await self._post_json("/api/chat", payload)
+        text: str = data.get("message", {}).get("content", "")
+        return text
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> AsyncIterator[str]:
+        """Stream a chat completion from Ollama as NDJSON."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            **kwargs,
+        }
+        stream = self._stream_ndjson("/api/chat", payload)
+        try:
+            async for chunk in stream:
+                content = chunk.get("message", {}).get("content")
+                if content:
+                    yield content
+                if chunk.get("done"):
+                    return
+        finally:
+            await stream.aclose()
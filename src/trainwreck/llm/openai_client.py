@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import os
-from typing import Any
+from collections.abc import Iterator
+from typing import Any, cast
 
 from openai import OpenAI
 
-from trainwreck.llm.base import LLMClient
+from trainwreck.llm.base import LLMClient, estimate_tokens
 
 
 class OpenAILLMClient(LLMClient):
@@ -17,6 +18,7 @@ class OpenAILLMClient(LLMClient):
             raise ValueError("OPENAI_API_KEY environment variable not set")
         self.client = OpenAI(api_key=api_key)
         self.model = os.getenv("OPENAI_MODEL", "gpt-4")
+        self._encoding: Any = None
 
     def complete(self, prompt: str, **kwargs: Any) -> str:
         """Generate a completion using OpenAI's API."""
@@ -31,7 +33,39 @@ class OpenAILLMClient(LLMClient):
         """Generate a chat completion using OpenAI's API."""
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=messages,  # type: ignore
+            messages=cast(Any, messages),
             **kwargs,
         )
         return response.choices[0].message.content or ""
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        """Stream a chat completion using OpenAI's API."""
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=cast(Any, messages),
+            stream=True,
+            **kwargs,
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with tiktoken when it is installed."""
+        if self._encoding is None:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except (ImportError, KeyError):
+                self._encoding = False
+        if not self._encoding:
+            return estimate_tokens(text)
+        return len(self._encoding.encode(text))
+
+    def close(self) -> None:
+        """Close the underlying OpenAI HTTP client."""
+        self.client.close()
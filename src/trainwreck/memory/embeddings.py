@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+
+from trainwreck.llm.base import LLMClient
+
+# Providers whose clients implement LLMClient.embed
+EMBEDDING_PROVIDERS = ("ollama", "llamacpp", "hf_tgi")
+
+
+class Embedder(ABC):
+    """Turns texts into vectors; `model` identifies the vector space so stored vectors are never mixed."""
+
+    model: str
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one vector per text."""
+
+    def close(self) -> None:
+        """Release any resources held by the embedder."""
+        return None
+
+
+class HashedNgramEmbedder(Embedder):
+    """
+    Model-free embedding: words and character trigrams are hashed into `dim`
+    signed buckets and the result is L2-normalized. Cosine similarity then
+    approximates shared vocabulary, which is enough to match a goal against
+    step descriptions and commands without any service running.
+    """
+
+    def __init__(self, dim: int = 512) -> None:
+        self.dim = dim
+        self.model = f"hashed-ngram-{dim}"
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        for word in re.findall(r"[a-z0-9_]+", text.lower()):
+            features = [word] if len(word) < 3 else [word, *(f"#{word}#"[i : i + 3] for i in range(len(word)))]
+            for feature in features:
+                h = zlib.crc32(feature.encode())
+                vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+class LLMEmbedder(Embedder):
+    """Embeds through an LLM client's embedding endpoint."""
+
+    def __init__(self, client: LLMClient, provider: str) -> None:
+        self.client = client
+        model = getattr(client, "embed_model", None)
+        self.model = f"{provider}:{model}" if model else provider
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.client.embed(texts)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def make_embedder(provider: str | None = None) -> Embedder:
+    """
+    Create an embedder by name, falling back to the TRAINWRECK_EMBEDDINGS env
+    var and then to the model-free "hash" embedder.
+    """
+    default_provider: str = os.getenv("TRAINWRECK_EMBEDDINGS", "hash")
+    provider = (provider or default_provider).lower()
+    if provider == "hash":
+        return HashedNgramEmbedder()
+    if provider in EMBEDDING_PROVIDERS:
+        from trainwreck.llm.factory import make_llm_client
+
+        return LLMEmbedder(make_llm_client(provider), provider)
+    raise ValueError(
+        f"Unknown embedding provider: {provider}, expected hash or one of {', '.join(EMBEDDING_PROVIDERS)}"
+    )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import atexit
+import contextvars
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable
+
+from trainwreck.memory.sqlite_store import SQLiteMemoryStore
+
+_STOP = object()
+
+
+class MemoryRecorder:
+    """
+    Records runs and steps from a background thread.
+
+    Calls return as soon as the write is queued; the thread owns its own
+    SQLiteMemoryStore (created by `store_factory`, since a SQLite connection
+    belongs to the thread that opened it) and applies the queued writes in
+    order, batching steps as the store does. The queue holds at most
+    `max_queue` writes: when the database falls that far behind, callers
+    block until there is room rather than dropping steps.
+
+    Everything queued is written on `close()`, which the runner calls in a
+    `finally` (so also on Ctrl-C) and which also runs at interpreter exit.
+    """
+
+    def __init__(self, store_factory: Callable[[], SQLiteMemoryStore], max_queue: int = 256) -> None:
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue)
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+        self._closed = False
+        self._warned = False
+        self._thread = threading.Thread(
+            target=self._run, args=(store_factory,), name="trainwreck-recorder", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        atexit.register(self.close)
+
+    def start_run(self, goal: str, repo: str | None = None) -> str:
+        """Queue the start of a run and return its id."""
+        run_id = uuid.uuid4().hex
+        self._put("start_run", goal, repo=repo, run_id=run_id)
+        return run_id
+
+    def add_step(self, step: dict[str, Any]) -> None:
+        """Queue a step; its timestamp is taken now rather than when it is written."""
+        self._put("add_step", {**step, "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())})
+
+    def finish_run(self, run_id: str, status: str, iterations: int) -> None:
+        """Queue how a run ended."""
+        self._put("finish_run", run_id, status, iterations)
+
+    def resume_run(self, run_id: str) -> None:
+        """Queue marking a run as running again."""
+        self._put("resume_run", run_id)
+
+    def save_checkpoint(self, run_id: str, iteration: int, state: dict[str, Any]) -> None:
+        """Queue a checkpoint; it is written after the steps queued before it."""
+        self._put("save_checkpoint", run_id, iteration, state)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far is committed; False on timeout."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._put("flush", done=done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write everything still queued, then stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _put(self, method: str, *args: Any, **kwargs: Any) -> None:
+        if self._closed:
+            raise RuntimeError("MemoryRecorder is closed")
+        # The write runs in the caller's context, so its trace span nests under the caller's
+        item = (method, args, kwargs, contextvars.copy_context())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if not self._warned:
+                print(f"Warning: step history is {self._queue.maxsize} writes behind, waiting for the database")
+                self._warned = True
+            self._queue.put(item)
+
+    def _run(self, store_factory: Callable[[], SQLiteMemoryStore]) -> None:
+        try:
+            store = store_factory()
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=store.flush_interval)
+                except queue.Empty:
+                    self._apply(store.flush)
+                    continue
+                if item is _STOP:
+                    return
+                method, args, kwargs, context = item
+                if method == "flush":
+                    self._apply(store.flush)
+                    kwargs["done"].set()
+                else:
+                    context.run(self._apply, getattr(store, method), *args, **kwargs)
+        finally:
+            self._apply(store.close)
+
+    @staticmethod
+    def _apply(write: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Run one write; a failure is reported but does not stop the recorder."""
+        try:
+            write(*args, **kwargs)
+        except Exception as e:
+            print(f"Warning: Failed to record step history ({write.__name__}): {e}")
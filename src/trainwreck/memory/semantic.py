@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from trainwreck.memory.embeddings import Embedder
+from trainwreck.memory.sqlite_store import SQLiteMemoryStore
+from trainwreck.memory.vector_index import VectorIndex, pack_vector, unpack_vector
+
+
+def step_text(step: dict[str, Any]) -> str:
+    """The text a step is embedded as: its goal, what it did and how."""
+    plan = step.get("plan") or {}
+    parts = [step.get("goal") or "", step.get("description") or plan.get("description", "")]
+    for sub in [plan, *(plan.get("steps") or [])]:
+        if sub is not plan:
+            parts.append(sub.get("description", ""))
+        detail = sub.get("command") or sub.get("file_path") or sub.get("tool_name")
+        if detail:
+            parts.append(f"{sub.get('action', '')} {detail}")
+    return "\n".join(p for p in parts if p)
+
+
+class SemanticMemory:
+    """
+    Retrieves past successful steps relevant to a goal, across every run
+    recorded in a SQLiteMemoryStore.
+
+    Steps scoring at least `min_score` are embedded once and their
+    normalized vectors kept in the store's `step_vectors` table (float32
+    BLOBs, one set per embedding model). The vectors are loaded into a VectorIndex on first
+    use, and steps recorded since are embedded and added on each `recall`.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteMemoryStore,
+        embedder: Embedder,
+        min_score: float = 0.9,
+        approximate: bool = False,
+        batch_size: int = 32,
+    ) -> None:
+        self.store = store
+        self.embedder = embedder
+        self.min_score = min_score
+        self.batch_size = batch_size
+        self.index = VectorIndex(approximate=approximate)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def recall(self, query: str, k: int = 3, exclude_run: str | None = None) -> list[dict[str, Any]]:
+        """
+        The `k` stored successes most similar to `query`, best first, skipping
+        steps of `exclude_run`. Each step carries its run's "goal" and its
+        "similarity" to the query.
+        """
+        with self._lock:
+            self._refresh()
+            # Over-fetch so excluded steps do not leave the result short
+            matches = self.index.search(self.embedder.embed([query])[0], k * 4 if exclude_run else k)
+            similarity = dict(matches)
+            steps = [
+                {**step, "similarity": similarity[step["id"]]}
+                for step in self.store.get_steps([step_id for step_id, _ in matches])
+                if exclude_run is None or step["run_id"] != exclude_run
+            ]
+        return steps[:k]
+
+    def _refresh(self) -> None:
+        """Load stored vectors once, then embed and index steps that have none yet."""
+        model = self.embedder.model
+        if not self._loaded:
+            for step_id, blob in self.store.iter_vectors(model):
+                self.index.add(step_id, unpack_vector(blob), normalized=True)
+            self._loaded = True
+        while True:
+            steps = self.store.steps_without_vectors(model, self.min_score, limit=self.batch_size)
+            if not steps:
+                return
+            vectors = self.embedder.embed([step_text(step) for step in steps])
+            if len(vectors) != len(steps):
+                raise ValueError(f"Embedder {model} returned {len(vectors)} vectors for {len(steps)} texts")
+            stored = [(step["id"], self.index.add(step["id"], vector)) for step, vector in zip(steps, vectors)]
+            self.store.add_vectors(model, [(step_id, pack_vector(vector)) for step_id, vector in stored])
+            if len(steps) < self.batch_size:
+                return
+
+    def close(self) -> None:
+        """Release the embedder; the store is owned by the caller."""
+        self.embedder.close()
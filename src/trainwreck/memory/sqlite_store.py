@@ -1,88 +1,623 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import sqlite3
+import time
+import uuid
+import zlib
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+from trainwreck import telemetry
+
+_SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_COMPRESSIONS = {"zlib", "zstd"}
+
+# Marks a result field moved to the blobs table: {"$blob": sha256, "size": bytes}
+_BLOB_KEY = "$blob"
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run
+_MIGRATIONS: list[list[str]] = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS steps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            iteration INTEGER,
+            plan TEXT,
+            result TEXT,
+            reflection TEXT,
+            score REAL,
+            description TEXT,
+            outcome TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ],
+    [
+        "ALTER TABLE steps ADD COLUMN run_id TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_steps_run_iteration ON steps (run_id, iteration)",
+        "CREATE INDEX IF NOT EXISTS idx_steps_score ON steps (score)",
+        "CREATE INDEX IF NOT EXISTS idx_steps_timestamp ON steps (timestamp)",
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT UNIQUE NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            goal_id INTEGER NOT NULL REFERENCES goals (id),
+            repo TEXT,
+            status TEXT NOT NULL DEFAULT 'running',
+            iterations INTEGER NOT NULL DEFAULT 0,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            finished_at DATETIME
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_runs_goal ON runs (goal_id, started_at)",
+        "ALTER TABLE steps ADD COLUMN action TEXT",
+        "UPDATE steps SET action = json_extract(plan, '$.action') WHERE json_valid(plan)",
+        "CREATE INDEX IF NOT EXISTS idx_steps_action ON steps (action, score)",
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS step_vectors (
+            model TEXT NOT NULL,
+            step_id INTEGER NOT NULL REFERENCES steps (id),
+            vector BLOB NOT NULL,
+            PRIMARY KEY (model, step_id)
+        )
+        """,
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+        """,
+    ],
+    [
+        """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            run_id TEXT PRIMARY KEY REFERENCES runs (id),
+            iteration INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ],
+]
+
+_STEP_COLUMNS = "id, run_id, iteration, plan, result, reflection, score, description, outcome, timestamp"
+_QUALIFIED_STEP_COLUMNS = ", ".join(f"steps.{column}" for column in _STEP_COLUMNS.split(", "))
+_RUN_COLUMNS = "runs.id, goals.text, runs.repo, runs.status, runs.iterations, runs.started_at, runs.finished_at"
+
+
+class LazyResult(dict):
+    """
+    A stored step result whose large fields are read from the blob table
+    only when accessed (by key, `get`, `items` or `values`).
+    """
+
+    def __init__(self, data: dict[str, Any], load: Callable[[str], str]) -> None:
+        super().__init__(data)
+        self._load = load
+
+    def __getitem__(self, key: Any) -> Any:
+        value = super().__getitem__(key)
+        resolved = self._resolve(value)
+        if resolved is not value:
+            super().__setitem__(key, resolved)
+        return resolved
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        # dict.get would skip __getitem__ and return the unresolved blob reference
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self) -> list[tuple[Any, Any]]:  # type: ignore[override]
+        return [(key, self[key]) for key in self]
+
+    def values(self) -> list[Any]:  # type: ignore[override]
+        return [self[key] for key in self]
+
+    def _resolve(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        if isinstance(value, dict) and not isinstance(value, LazyResult):
+            if _BLOB_KEY in value:
+                return self._load(value[_BLOB_KEY])
+            return LazyResult(value, self._load)
+        return value
 
 
 class SQLiteMemoryStore:
-    """SQLite-backed memory store for conversation and step history."""
+    """
+    SQLite-backed memory store for conversation and step history.
+
+    Each FeedbackLoop run is recorded in `runs` against its goal in `goals`,
+    and its steps carry the run id. History is read with keyset pagination
+    (`iter_history`), so a query costs one indexed page at a time however
+    many past runs the file holds.
+
+    The database runs in WAL mode so concurrent runs sharing a file do not
+    block each other's reads, and waits up to `busy_timeout` seconds for a
+    writer instead of failing. Steps are written behind: they are buffered
+    and inserted in one transaction once `batch_size` are queued or the
+    oldest has waited `flush_interval` seconds, and on `flush()`, any read,
+    or `close()`.
+
+    Result strings longer than `blob_threshold` bytes (file contents, long
+    outputs) are stored once in `blobs`, compressed and keyed by their
+    SHA-256, so repeated outputs cost nothing extra. Steps read back carry a
+    LazyResult that loads those fields on access. `prune` and `vacuum`
+    enforce retention and reclaim space.
 
-    def __init__(self, db_path: Path) -> None:
+    With `check_same_thread=False` the store may be used from threads other
+    than the one that opened it, one call at a time (the async runner reads
+    through it from worker threads).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        synchronous: str = "NORMAL",
+        batch_size: int = 16,
+        flush_interval: float = 2.0,
+        busy_timeout: float = 30.0,
+        blob_threshold: int = 4096,
+        compression: str = "zlib",
+        check_same_thread: bool = True,
+    ) -> None:
+        synchronous = synchronous.upper()
+        if synchronous not in _SYNCHRONOUS_LEVELS:
+            raise ValueError(
+                f"Invalid synchronous level '{synchronous}', expected one of {sorted(_SYNCHRONOUS_LEVELS)}"
+            )
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Invalid compression '{compression}', expected one of {sorted(_COMPRESSIONS)}")
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.blob_threshold = blob_threshold
+        self.compression = compression
+        self.conn = sqlite3.connect(str(db_path), timeout=busy_timeout, check_same_thread=check_same_thread)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._pending: list[tuple[Any, ...]] = []
+        self._pending_blobs: dict[str, tuple[str, int, bytes]] = {}
+        # Blobs this store has already written, so repeats skip compression
+        self._known_blobs: set[str] = set()
+        self._oldest_pending = 0.0
         self._init_db()
 
     def _init_db(self) -> None:
-        """Initialize the database schema."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS steps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                iteration INTEGER,
-                plan TEXT,
-                result TEXT,
-                reflection TEXT,
-                score REAL,
-                description TEXT,
-                outcome TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """
-        )
-        self.conn.commit()
+        """Create the schema or bring an existing database up to date."""
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= len(_MIGRATIONS):
+            return
+        # Take the write lock first so concurrent runs cannot migrate the same file twice
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for statements in _MIGRATIONS[version:]:
+                for statement in statements:
+                    self.conn.execute(statement)
+            self.conn.execute(f"PRAGMA user_version = {max(version, len(_MIGRATIONS))}")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
 
     def add_step(self, step: dict[str, Any]) -> None:
-        """Add a step to the memory store."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO steps (iteration, plan, result, reflection, score, description, outcome)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
+        """Queue a step for writing; it is flushed with the next batch."""
+        if not self._pending:
+            self._oldest_pending = time.monotonic()
+        self._pending.append(
             (
+                step.get("run_id"),
+                step.get("plan", {}).get("action"),
                 step["iteration"],
                 json.dumps(step["plan"]),
-                json.dumps(step["result"]),
+                json.dumps(self._externalize(step["result"])),
                 json.dumps(step["reflection"]),
                 step["score"],
                 step["description"],
                 step["outcome"],
-            ),
+                # Same format as CURRENT_TIMESTAMP, taken now rather than at flush time
+                step.get("timestamp") or time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+            )
         )
-        self.conn.commit()
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._oldest_pending >= self.flush_interval:
+            self.flush()
 
-    def get_history(self, limit: int = 100) -> list[dict[str, Any]]:
-        """Retrieve step history."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT iteration, plan, result, reflection, score, description, outcome, timestamp
+    def flush(self) -> None:
+        """Write all queued steps in a single transaction."""
+        if not self._pending:
+            return
+        with telemetry.timed(telemetry.MEMORY_WRITE_SECONDS, span="db_write", operation="flush") as fields, self.conn:
+            fields["steps"] = len(self._pending)
+            if self._pending_blobs:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                    [(digest, *blob) for digest, blob in self._pending_blobs.items()],
+                )
+            self.conn.executemany(
+                """
+                INSERT INTO steps
+                    (run_id, action, iteration, plan, result, reflection, score, description, outcome, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                self._pending,
+            )
+        telemetry.MEMORY_STEPS_WRITTEN.inc(len(self._pending))
+        self._known_blobs.update(self._pending_blobs)
+        self._pending = []
+        self._pending_blobs = {}
+
+    def _externalize(self, value: Any) -> Any:
+        """Replace long strings in a result with blob references, queueing new blobs for the next flush."""
+        if isinstance(value, dict):
+            return {key: self._externalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(item) for item in value]
+        if not isinstance(value, str) or len(value) <= self.blob_threshold // 4:
+            return value
+        raw = value.encode()
+        if len(raw) <= self.blob_threshold:
+            return value
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest not in self._known_blobs and digest not in self._pending_blobs:
+            if self.compression == "zstd":
+                import zstandard
+
+                data = zstandard.ZstdCompressor().compress(raw)
+            else:
+                data = zlib.compress(raw, 6)
+            self._pending_blobs[digest] = (self.compression, len(raw), data)
+        return {_BLOB_KEY: digest, "size": len(raw)}
+
+    def _load_blob(self, digest: str) -> str:
+        """Read and decompress a blob written by _externalize."""
+        row = self.conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return f"[missing blob {digest}]"
+        codec, data = row
+        if codec == "zstd":
+            import zstandard
+
+            raw: bytes = zstandard.ZstdDecompressor().decompress(data)
+            return raw.decode()
+        return zlib.decompress(data).decode()
+
+    def start_run(self, goal: str, repo: str | None = None, run_id: str | None = None) -> str:
+        """Record the start of a run towards `goal` and return its id (generated unless given)."""
+        self.flush()
+        run_id = run_id or uuid.uuid4().hex
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO goals (text) VALUES (?)", (goal,))
+            (goal_id,) = self.conn.execute("SELECT id FROM goals WHERE text = ?", (goal,)).fetchone()
+            self.conn.execute("INSERT INTO runs (id, goal_id, repo) VALUES (?, ?, ?)", (run_id, goal_id, repo))
+        return run_id
+
+    def finish_run(self, run_id: str, status: str, iterations: int) -> None:
+        """Record how a run ended: "achieved", "exhausted" or "failed"."""
+        self.flush()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET status = ?, iterations = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (status, iterations, run_id),
+            )
+
+    def resume_run(self, run_id: str) -> None:
+        """Mark a run as running again."""
+        self.flush()
+        with self.conn:
+            self.conn.execute("UPDATE runs SET status = 'running', finished_at = NULL WHERE id = ?", (run_id,))
+
+    def save_checkpoint(self, run_id: str, iteration: int, state: dict[str, Any]) -> None:
+        """Record a run's loop state after `iteration` completed steps, replacing the previous checkpoint."""
+        self.flush()
+        with telemetry.timed(telemetry.MEMORY_WRITE_SECONDS, span="db_write", operation="checkpoint"), self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, iteration, state, updated_at) "
+                "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                (run_id, iteration, json.dumps(state)),
+            )
+
+    def load_checkpoint(self, run_id: str) -> dict[str, Any] | None:
+        """
+        Everything needed to resume a run: its goal and status, its recorded
+        steps oldest first as "history", and from the last checkpoint the
+        "plan" about to run (if still pending) and the repo "head".
+        Returns None for an unknown run.
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return None
+        history = list(self.iter_history(run_id=run_id, newest_first=False))
+        row = self.conn.execute("SELECT iteration, state FROM checkpoints WHERE run_id = ?", (run_id,)).fetchone()
+        state = json.loads(row[1]) if row else {}
+        # A plan checkpointed before the last recorded step has already run
+        pending = state.get("plan") if row and row[0] == len(history) else None
+        return {**run, "run_id": run_id, "history": history, "plan": pending, "head": state.get("head")}
+
+    def iter_history(
+        self,
+        run_id: str | None = None,
+        goal: str | None = None,
+        action: str | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+        page_size: int = 100,
+        newest_first: bool = True,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield matching steps one page at a time, newest first by default.
+        Pages are fetched by step id, so stopping early never reads the rest.
+        """
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        self.flush()
+        where: list[str] = []
+        params: list[Any] = []
+        if run_id is not None:
+            where.append("run_id = ?")
+            params.append(run_id)
+        if goal is not None:
+            where.append(
+                "run_id IN (SELECT runs.id FROM runs JOIN goals ON goals.id = runs.goal_id WHERE goals.text = ?)"
+            )
+            params.append(goal)
+        if action is not None:
+            where.append("action = ?")
+            params.append(action)
+        if min_score is not None:
+            where.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("score <= ?")
+            params.append(max_score)
+
+        comparison, order = ("<", "DESC") if newest_first else (">", "ASC")
+        last_id: int | None = None
+        while True:
+            clauses = list(where)
+            page_params = list(params)
+            if last_id is not None:
+                clauses.append(f"id {comparison} ?")
+                page_params.append(last_id)
+            sql = f"SELECT {_STEP_COLUMNS} FROM steps"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += f" ORDER BY id {order} LIMIT ?"
+            rows = self.conn.execute(sql, (*page_params, page_size)).fetchall()
+            for row in rows:
+                yield self._step_from_row(row)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def get_history(self, limit: int = 100, **filters: Any) -> list[dict[str, Any]]:
+        """Retrieve the most recent `limit` steps, optionally filtered as in iter_history."""
+        if limit <= 0:
+            return []
+        history: list[dict[str, Any]] = []
+        for step in self.iter_history(page_size=min(limit, 500), **filters):
+            if len(history) >= limit:
+                break
+            history.append(step)
+        return history
+
+    def iter_runs(self, goal: str | None = None, status: str | None = None) -> Iterator[dict[str, Any]]:
+        """Yield runs newest first, optionally only those for `goal` or with `status`."""
+        sql = f"SELECT {_RUN_COLUMNS} FROM runs JOIN goals ON goals.id = runs.goal_id"
+        where: list[str] = []
+        params: list[Any] = []
+        if goal is not None:
+            where.append("goals.text = ?")
+            params.append(goal)
+        if status is not None:
+            where.append("runs.status = ?")
+            params.append(status)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY runs.started_at DESC, runs.rowid DESC"
+        for row in self.conn.execute(sql, params):
+            yield self._run_from_row(row)
+
+    def get_run(self, run_id: str) -> dict[str, Any] | None:
+        """Look up one run by id."""
+        self.flush()
+        row = self.conn.execute(
+            f"SELECT {_RUN_COLUMNS} FROM runs JOIN goals ON goals.id = runs.goal_id WHERE runs.id = ?", (run_id,)
+        ).fetchone()
+        return self._run_from_row(row) if row else None
+
+    @staticmethod
+    def _run_from_row(row: tuple[Any, ...]) -> dict[str, Any]:
+        return {
+            "id": row[0],
+            "goal": row[1],
+            "repo": row[2],
+            "status": row[3],
+            "iterations": row[4],
+            "started_at": row[5],
+            "finished_at": row[6],
+        }
+
+    def get_steps(self, step_ids: list[int]) -> list[dict[str, Any]]:
+        """Fetch steps by id, each with the goal of its run, in the order given."""
+        if not step_ids:
+            return []
+        self.flush()
+        placeholders = ", ".join("?" * len(step_ids))
+        rows = self.conn.execute(
+            f"""
+            SELECT {_QUALIFIED_STEP_COLUMNS}, goals.text
             FROM steps
-            ORDER BY id DESC
-            LIMIT ?
+            LEFT JOIN runs ON runs.id = steps.run_id
+            LEFT JOIN goals ON goals.id = runs.goal_id
+            WHERE steps.id IN ({placeholders})
         """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-        history = []
-        for row in rows:
-            history.append(
-                {
-                    "iteration": row[0],
-                    "plan": json.loads(row[1]),
-                    "result": json.loads(row[2]),
-                    "reflection": json.loads(row[3]),
-                    "score": row[4],
-                    "description": row[5],
-                    "outcome": row[6],
-                    "timestamp": row[7],
-                }
+            step_ids,
+        ).fetchall()
+        steps = {row[0]: {**self._step_from_row(row), "goal": row[-1]} for row in rows}
+        return [steps[i] for i in step_ids if i in steps]
+
+    def iter_vectors(self, model: str) -> Iterator[tuple[int, bytes]]:
+        """Yield (step id, vector blob) for every step embedded with `model`."""
+        yield from self.conn.execute("SELECT step_id, vector FROM step_vectors WHERE model = ?", (model,))
+
+    def steps_without_vectors(self, model: str, min_score: float, limit: int = 256) -> list[dict[str, Any]]:
+        """Steps scoring at least `min_score` that have no `model` vector yet, oldest first."""
+        self.flush()
+        rows = self.conn.execute(
+            """
+            SELECT steps.id FROM steps
+            WHERE steps.score >= ?
+              AND NOT EXISTS (SELECT 1 FROM step_vectors v WHERE v.model = ? AND v.step_id = steps.id)
+            ORDER BY steps.id LIMIT ?
+        """,
+            (min_score, model, limit),
+        ).fetchall()
+        return self.get_steps([row[0] for row in rows])
+
+    def add_vectors(self, model: str, vectors: list[tuple[int, bytes]]) -> None:
+        """Store (step id, vector blob) pairs for `model` in one transaction."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO step_vectors (model, step_id, vector) VALUES (?, ?, ?)",
+                [(model, step_id, blob) for step_id, blob in vectors],
             )
-        return history
+
+    def prune(self, keep_runs: int | None = None, older_than_days: float | None = None) -> int:
+        """
+        Delete finished runs other than the newest `keep_runs`, and those
+        started more than `older_than_days` ago, with their steps. Returns
+        how many runs were deleted. Blobs are reclaimed by `vacuum`.
+        """
+        self.flush()
+        doomed: set[str] = set()
+        if keep_runs is not None:
+            rows = self.conn.execute(
+                "SELECT id FROM runs WHERE status != 'running' ORDER BY started_at DESC, rowid DESC LIMIT -1 OFFSET ?",
+                (keep_runs,),
+            )
+            doomed.update(row[0] for row in rows)
+        if older_than_days is not None:
+            cutoff = f"-{older_than_days} days"
+            rows = self.conn.execute(
+                "SELECT id FROM runs WHERE status != 'running' AND started_at < datetime('now', ?)", (cutoff,)
+            )
+            doomed.update(row[0] for row in rows)
+            # Steps recorded before runs were tracked only have a timestamp
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM step_vectors WHERE step_id IN "
+                    "(SELECT id FROM steps WHERE run_id IS NULL AND timestamp < datetime('now', ?))",
+                    (cutoff,),
+                )
+                self.conn.execute(
+                    "DELETE FROM steps WHERE run_id IS NULL AND timestamp < datetime('now', ?)", (cutoff,)
+                )
+        self._delete_runs(sorted(doomed))
+        return len(doomed)
+
+    def vacuum(self, max_bytes: int | None = None) -> dict[str, int]:
+        """
+        Drop the oldest finished runs until the live data fits in `max_bytes`,
+        delete blobs no step refers to any more, and compact the file.
+        Run it while no agent is writing to the database.
+        """
+        self.flush()
+        runs_deleted = 0
+        blobs_deleted = self._collect_blobs()
+        if max_bytes is not None:
+            while self._used_bytes() > max_bytes:
+                oldest = [
+                    row[0]
+                    for row in self.conn.execute(
+                        "SELECT id FROM runs WHERE status != 'running' ORDER BY started_at, rowid LIMIT 4"
+                    )
+                ]
+                if not oldest:
+                    break
+                self._delete_runs(oldest)
+                runs_deleted += len(oldest)
+                blobs_deleted += self._collect_blobs()
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"runs_deleted": runs_deleted, "blobs_deleted": blobs_deleted, "size": self._used_bytes()}
+
+    def _delete_runs(self, run_ids: list[str]) -> None:
+        """Delete runs with their steps, step vectors and any goal left without runs."""
+        if not run_ids:
+            return
+        with self.conn:
+            for start in range(0, len(run_ids), 500):
+                chunk = run_ids[start : start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                self.conn.execute(
+                    f"DELETE FROM step_vectors WHERE step_id IN (SELECT id FROM steps WHERE run_id IN ({placeholders}))",
+                    chunk,
+                )
+                self.conn.execute(f"DELETE FROM steps WHERE run_id IN ({placeholders})", chunk)
+                self.conn.execute(f"DELETE FROM checkpoints WHERE run_id IN ({placeholders})", chunk)
+                self.conn.execute(f"DELETE FROM runs WHERE id IN ({placeholders})", chunk)
+            self.conn.execute("DELETE FROM goals WHERE id NOT IN (SELECT goal_id FROM runs)")
+
+    def _collect_blobs(self) -> int:
+        """Delete blobs no stored result refers to; returns how many."""
+        with self.conn:
+            cursor = self.conn.execute(
+                f"""
+                DELETE FROM blobs WHERE hash NOT IN (
+                    SELECT tree.value FROM steps, json_tree(steps.result) AS tree
+                    WHERE steps.result LIKE '%"{_BLOB_KEY}"%' AND tree.key = '{_BLOB_KEY}'
+                )
+            """
+            )
+        self._known_blobs.clear()
+        return cursor.rowcount
+
+    def _used_bytes(self) -> int:
+        """Bytes of the database file holding live data (excluding free pages)."""
+        page_size: int = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count: int = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages: int = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _step_from_row(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        result = json.loads(row[4])
+        if isinstance(result, dict) and f'"{_BLOB_KEY}"' in row[4]:
+            result = LazyResult(result, self._load_blob)
+        return {
+            "id": row[0],
+            "run_id": row[1],
+            "iteration": row[2],
+            "plan": json.loads(row[3]),
+            "result": result,
+            "reflection": json.loads(row[5]),
+            "score": row[6],
+            "description": row[7],
+            "outcome": row[8],
+            "timestamp": row[9],
+        }
 
     def close(self) -> None:
-        """Close the database connection."""
-        self.conn.close()
+        """Flush queued steps and close the database connection."""
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import heapq
+import math
+import operator
+from array import array
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional: install the "vectors" extra for vectorized search
+    np = None
+
+
+def pack_vector(vector: list[float] | array) -> bytes:
+    """Encode a vector as float32 bytes for a SQLite BLOB."""
+    return (vector if isinstance(vector, array) else array("f", vector)).tobytes()
+
+
+def unpack_vector(blob: bytes) -> array:
+    """Decode a BLOB written by pack_vector."""
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector
+
+
+class VectorIndex:
+    """
+    In-memory cosine-similarity index over float32 vectors keyed by integer id.
+
+    Search is exact brute force: one matrix-vector product with numpy when it
+    is installed, a plain Python dot product per vector otherwise. With
+    `approximate=True` (numpy only) a random-hyperplane LSH index is built once
+    the index holds `approximate_min_size` vectors, and only the candidates
+    sharing a bucket with the query in any table are scored.
+    """
+
+    def __init__(
+        self,
+        approximate: bool = False,
+        approximate_min_size: int = 5000,
+        lsh_tables: int = 8,
+        lsh_bits: int = 12,
+    ) -> None:
+        self.approximate = approximate and np is not None
+        self.approximate_min_size = approximate_min_size
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self.ids: list[int] = []
+        self._vectors: list[array] = []
+        self._matrix: Any = None
+        self._planes: Any = None
+        self._buckets: list[dict[int, list[int]]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, item_id: int, vector: list[float] | array, normalized: bool = False) -> array:
+        """
+        Add a vector and return it as stored: normalized to unit length, so
+        scores are cosine similarities. Pass `normalized` for vectors already stored.
+        """
+        if normalized:
+            stored = vector if isinstance(vector, array) else array("f", vector)
+        else:
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            stored = array("f", (v / norm for v in vector))
+        self._vectors.append(stored)
+        self.ids.append(item_id)
+        self._matrix = None
+        self._buckets = []
+        return stored
+
+    def search(self, query: list[float], k: int) -> list[tuple[int, float]]:
+        """The `k` most similar (id, score) pairs, best first."""
+        if not self.ids or k <= 0:
+            return []
+        norm = math.sqrt(sum(v * v for v in query)) or 1.0
+        if np is None:
+            q = [v / norm for v in query]
+            scores = ((sum(map(operator.mul, vector, q)), i) for i, vector in enumerate(self._vectors))
+            return [(self.ids[i], score) for score, i in heapq.nlargest(k, scores)]
+
+        matrix = self._ensure_matrix()
+        q = np.asarray(query, dtype=np.float32) / norm
+        candidates = self._candidates(q, k) if self.approximate and len(self.ids) >= self.approximate_min_size else None
+        scores = (matrix[candidates] if candidates is not None else matrix) @ q
+        top = min(k, len(scores))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        rows = candidates[best] if candidates is not None else best
+        return [(self.ids[int(row)], float(scores[i])) for row, i in zip(rows, best)]
+
+    def _ensure_matrix(self) -> Any:
+        if self._matrix is None or len(self._matrix) != len(self._vectors):
+            self._matrix = np.frombuffer(b"".join(v.tobytes() for v in self._vectors), dtype=np.float32).reshape(
+                len(self._vectors), -1
+            )
+        return self._matrix
+
+    def _candidates(self, q: Any, k: int) -> Any:
+        """Rows sharing an LSH bucket with `q`, or None if too few to fill `k`."""
+        if not self._buckets:
+            self._build_lsh()
+        keys = self._hash(q[None, :])[0]
+        rows: set[int] = set()
+        for table, key in zip(self._buckets, keys):
+            rows.update(table.get(int(key), ()))
+        if len(rows) < k:
+            return None
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    def _build_lsh(self) -> None:
+        matrix = self._ensure_matrix()
+        rng = np.random.default_rng(0)
+        self._planes = rng.standard_normal((self.lsh_tables, matrix.shape[1], self.lsh_bits)).astype(np.float32)
+        self._buckets = [{} for _ in range(self.lsh_tables)]
+        for row, keys in enumerate(self._hash(matrix)):
+            for table, key in zip(self._buckets, keys):
+                table.setdefault(int(key), []).append(row)
+
+    def _hash(self, vectors: Any) -> Any:
+        """Bucket key per (vector, table) from the signs of the hyperplane projections."""
+        bits = np.einsum("nd,tdb->ntb", vectors, self._planes) > 0
+        return bits.astype(np.int64) @ (1 << np.arange(self.lsh_bits, dtype=np.int64))
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any
+
+import click
+
+from trainwreck import tracing
+from trainwreck.agent.executor import AsyncExecutor, Executor
+from trainwreck.agent.loop import AsyncFeedbackLoop, FeedbackLoop
+from trainwreck.agent.planner import AsyncPlanner, Planner
+from trainwreck.agent.reflector import Reflector
+from trainwreck.cassette import Cassette, RecordingLLMClient, ReplayLLMClient, record_executor, replay_executor
+from trainwreck.llm.base import LLMClient
+from trainwreck.llm.cache import ResponseCache
+from trainwreck.llm.factory import make_async_llm_client, make_llm_client
+from trainwreck.memory.embeddings import make_embedder
+from trainwreck.memory.recorder import MemoryRecorder
+from trainwreck.memory.semantic import SemanticMemory
+from trainwreck.memory.sqlite_store import SQLiteMemoryStore
+from trainwreck.tools.abacus import AbacusClient
+from trainwreck.tools.mcp import AsyncMCPClient, MCPClient, MCPServerPool
+from trainwreck.tools.mcp_catalog import MCPCatalogCache
+
+
+def run_goal(
+    goal: str,
+    repo_path: Path,
+    provider: str,
+    max_iters: int = 20,
+    mcp_server: str | None = None,
+    mcp_config: str | None = None,
+    temperature: float = 0.7,
+    cache: bool = False,
+    token_budget: int = 6000,
+    command_timeout: float | None = None,
+    idle_timeout: float | None = None,
+    shell_session: bool = False,
+    mcp_lazy: bool = False,
+    mcp_idle_timeout: float | None = None,
+    mcp_pool: MCPServerPool | None = None,
+    mcp_max_tools: int | None = None,
+    max_parallel_steps: int = 4,
+    speculate: bool = False,
+    recall: int = 0,
+    embeddings: str | None = None,
+    resume: str | None = None,
+    record: Path | None = None,
+    replay: Path | None = None,
+    trace_exporter: str | None = None,
+    use_async: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Wire up the agent for one goal against one repository and run it.
+    Pass `mcp_pool` to keep MCP servers running for the next goal, and
+    `recall` to show the planner that many similar past successes. With
+    `resume`, the run with that id continues from its last checkpoint and
+    its goal replaces `goal`. `record` saves every LLM and executor call to
+    a cassette file; `replay` serves a cassette back instead of calling the
+    model or running anything. The run is traced with `trace_exporter`
+    (see tracing.make_exporter). With `use_async`, the run uses the asyncio
+    stack instead (see _run_goal_async).
+    """
+    if record and replay:
+        raise click.UsageError("--record and --replay cannot be used together")
+    if use_async and (record or replay or mcp_lazy):
+        raise click.UsageError("--async cannot be combined with --record, --replay or --mcp-lazy")
+
+    memory_db_path = repo_path / ".trainwreck.db"
+    memory_options: dict[str, Any] = {
+        "synchronous": os.getenv("TRAINWRECK_DB_SYNCHRONOUS", "NORMAL"),
+        "compression": os.getenv("TRAINWRECK_DB_COMPRESSION", "zlib"),
+    }
+    # Reads (resume, recall) use this connection; the recorder thread writes through its own.
+    # The async stack reads through it from worker threads, one call at a time.
+    memory = SQLiteMemoryStore(memory_db_path, **memory_options, check_same_thread=not use_async)
+
+    checkpoint: dict[str, Any] | None = None
+    if resume:
+        checkpoint = memory.load_checkpoint(resume)
+        if checkpoint is None:
+            memory.close()
+            raise click.ClickException(f"No run {resume} in {memory_db_path}")
+        if goal and goal != checkpoint["goal"]:
+            click.echo(f"⚠️  Resuming with the run's original goal: {checkpoint['goal']}")
+        goal = checkpoint["goal"]
+        if checkpoint["status"] == "achieved":
+            click.echo(f"✅ Run {resume} already achieved its goal")
+            memory.close()
+            history: list[dict[str, Any]] = checkpoint["history"]
+            return history
+
+    abacus: AbacusClient | None = None
+    if os.getenv("ABACUS_API_KEY"):
+        abacus = AbacusClient()
+
+    response_cache: ResponseCache | None = None
+    if cache:
+        response_cache = ResponseCache(repo_path / ".trainwreck-cache.db", check_same_thread=not use_async)
+        if not response_cache.cacheable(temperature):
+            click.echo(
+                f"⚠️  --cache has no effect at temperature {temperature}: only responses at "
+                f"temperature <= {response_cache.max_temperature} are cached (use --temperature 0)"
+            )
+
+    recorder = MemoryRecorder(lambda: SQLiteMemoryStore(memory_db_path, **memory_options))
+
+    semantic: SemanticMemory | None = None
+    if recall > 0:
+        semantic = SemanticMemory(
+            memory,
+            make_embedder(embeddings),
+            approximate=os.getenv("TRAINWRECK_RECALL_APPROXIMATE", "").lower() in ("1", "true", "yes"),
+        )
+
+    if use_async:
+        return _run_goal_async(
+            goal,
+            repo_path,
+            provider,
+            max_iters=max_iters,
+            checkpoint=checkpoint,
+            mcp_server=mcp_server,
+            mcp_config=mcp_config,
+            temperature=temperature,
+            token_budget=token_budget,
+            command_timeout=command_timeout,
+            idle_timeout=idle_timeout,
+            shell_session=shell_session,
+            mcp_max_tools=mcp_max_tools,
+            max_parallel_steps=max_parallel_steps,
+            speculate=speculate,
+            recall=recall,
+            trace_exporter=trace_exporter,
+            memory=memory,
+            abacus=abacus,
+            response_cache=response_cache,
+            recorder=recorder,
+            semantic=semantic,
+        )
+
+    cassette: Cassette | None = None
+    llm: LLMClient
+    if replay:
+        cassette = Cassette(replay, mode="replay")
+        llm = ReplayLLMClient(cassette)
+        # Plan from cached tool catalogs; MCP calls themselves are replayed with the executor
+        mcp_lazy = True
+        click.echo(f"📼 Replaying {replay}")
+    else:
+        llm = make_llm_client(provider=provider)
+        if record:
+            cassette = Cassette(record, mode="record")
+            cassette.meta.update({"provider": provider, "goal": goal})
+            llm = RecordingLLMClient(llm, cassette)
+
+    mcp: MCPClient | None = None
+    mcp_options: dict[str, Any] = {
+        "catalog": MCPCatalogCache(),
+        "lazy": mcp_lazy,
+        "idle_timeout": mcp_idle_timeout,
+        "pool": mcp_pool,
+    }
+
+    if mcp_server:
+        mcp = MCPClient(server_command=mcp_server.split(), **mcp_options)
+    else:
+        mcp = MCPClient(**mcp_options)
+
+        config_path = Path(mcp_config) if mcp_config else repo_path / ".trainwreck-mcp.json"
+        if config_path.exists():
+            click.echo(f"📡 Loading MCP servers from {config_path}")
+            mcp.load_config(config_path)
+
+    if mcp and mcp.servers:
+        _announce_mcp(mcp)
+
+    planner = Planner(
+        llm=llm,
+        mcp_client=mcp,
+        temperature=temperature,
+        cache=response_cache,
+        token_budget=token_budget,
+        max_mcp_tools=mcp_max_tools,
+        recall=semantic,
+        recall_k=recall,
+    )
+
+    executor: Any
+    if cassette is not None and cassette.mode == "replay":
+        executor = replay_executor(cassette)
+    else:
+        executor = Executor(
+            repo_path=repo_path,
+            abacus=abacus,
+            mcp=mcp,
+            command_timeout=command_timeout,
+            idle_timeout=idle_timeout,
+            shell_session=shell_session,
+            max_parallel_steps=max_parallel_steps,
+        )
+        if cassette is not None:
+            executor = record_executor(executor, cassette)
+    reflector = Reflector()
+
+    _announce(provider, repo_path, goal, max_iters)
+
+    tracing.configure(tracing.make_exporter(trace_exporter, repo_path))
+    try:
+        loop = FeedbackLoop(planner, executor, reflector, memory=recorder, speculate=speculate)
+        return loop.iterate(goal=goal, max_iters=max_iters, resume=checkpoint)
+    finally:
+        # First, so queued steps are written even if closing anything else fails
+        recorder.close()
+        llm.close()
+        executor.close()
+        if abacus is not None:
+            abacus.close()
+        if mcp is not None:
+            mcp.close()
+        if semantic is not None:
+            semantic.close()
+        memory.close()
+        if response_cache is not None:
+            response_cache.close()
+        if cassette is not None and record:
+            cassette.save()
+            click.echo(f"📼 Recorded {record}")
+        elif cassette is not None:
+            click.echo(f"📼 Replayed {cassette.hits + cassette.misses} call(s), {cassette.hits} matched by request")
+        # Last, after the recorder's final writes were traced
+        tracing.shutdown()
+
+
+def _run_goal_async(
+    goal: str,
+    repo_path: Path,
+    provider: str,
+    max_iters: int,
+    checkpoint: dict[str, Any] | None,
+    mcp_server: str | None,
+    mcp_config: str | None,
+    temperature: float,
+    token_budget: int,
+    command_timeout: float | None,
+    idle_timeout: float | None,
+    shell_session: bool,
+    mcp_max_tools: int | None,
+    max_parallel_steps: int,
+    speculate: bool,
+    recall: int,
+    trace_exporter: str | None,
+    memory: SQLiteMemoryStore,
+    abacus: AbacusClient | None,
+    response_cache: ResponseCache | None,
+    recorder: MemoryRecorder,
+    semantic: SemanticMemory | None,
+) -> list[dict[str, Any]]:
+    """
+    The rest of run_goal on the asyncio stack: an async LLM client, MCP
+    servers on AsyncMCPClient, AsyncPlanner, AsyncExecutor and
+    AsyncFeedbackLoop, run with asyncio.run. Closes the resources run_goal
+    opened once the run ends.
+    """
+
+    async def main() -> list[dict[str, Any]]:
+        llm = make_async_llm_client(provider=provider)
+        mcp = AsyncMCPClient(catalog=MCPCatalogCache())
+        executor: AsyncExecutor | None = None
+        try:
+            if mcp_server:
+                await mcp.add_server("default", mcp_server.split())
+            else:
+                config_path = Path(mcp_config) if mcp_config else repo_path / ".trainwreck-mcp.json"
+                if config_path.exists():
+                    click.echo(f"📡 Loading MCP servers from {config_path}")
+                    await mcp.load_config(config_path)
+            if mcp.servers:
+                _announce_mcp(mcp)
+
+            planner = AsyncPlanner(
+                llm=llm,
+                mcp_client=mcp,
+                temperature=temperature,
+                cache=response_cache,
+                token_budget=token_budget,
+                max_mcp_tools=mcp_max_tools,
+                recall=semantic,
+                recall_k=recall,
+            )
+            executor = AsyncExecutor(
+                repo_path=repo_path,
+                abacus=abacus,
+                mcp=mcp,
+                command_timeout=command_timeout,
+                idle_timeout=idle_timeout,
+                shell_session=shell_session,
+                max_parallel_steps=max_parallel_steps,
+            )
+            _announce(provider, repo_path, goal, max_iters)
+            loop = AsyncFeedbackLoop(planner, executor, Reflector(), memory=recorder, speculate=speculate)
+            return await loop.aiterate(goal=goal, max_iters=max_iters, resume=checkpoint)
+        finally:
+            await llm.aclose()
+            await mcp.close()
+            if executor is not None:
+                executor.close()
+
+    tracing.configure(tracing.make_exporter(trace_exporter, repo_path))
+    try:
+        return asyncio.run(main())
+    finally:
+        # First, so queued steps are written even if closing anything else fails
+        recorder.close()
+        if abacus is not None:
+            abacus.close()
+        if semantic is not None:
+            semantic.close()
+        memory.close()
+        if response_cache is not None:
+            response_cache.close()
+        tracing.shutdown()
+
+
+def _announce(provider: str, repo_path: Path, goal: str, max_iters: int) -> None:
+    click.echo(f"🚀 TrainWreck starting with model provider: {provider}")
+    click.echo(f"📁 Repo: {repo_path}")
+    click.echo(f"🎯 Goal: {goal}")
+    click.echo(f"🔁 Max iterations: {max_iters}\n")
+
+
+def _announce_mcp(mcp: MCPClient | AsyncMCPClient) -> None:
+    click.echo(f"🔧 Connected to {len(mcp.servers)} MCP server(s)")
+    tools_summary = mcp.get_tools_summary()
+    click.echo(f"📋 Available MCP tools:{tools_summary}\n")
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any
+
+import structlog
+from prometheus_client import Counter, Histogram, start_http_server
+
+from trainwreck import tracing
+
+# Steps and model calls range from milliseconds to many minutes
+_STEP_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)
+_LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+_WRITE_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+PLAN_SECONDS = Histogram("trainwreck_plan_seconds", "Time to plan one step", buckets=_LLM_BUCKETS)
+EXECUTE_SECONDS = Histogram(
+    "trainwreck_execute_seconds", "Time to execute one step, by action", ["action"], buckets=_STEP_BUCKETS
+)
+REFLECT_SECONDS = Histogram("trainwreck_reflect_seconds", "Time to reflect on one step result", buckets=_WRITE_BUCKETS)
+STEPS = Counter("trainwreck_steps", "Steps recorded by the feedback loop, by action and outcome", ["action", "outcome"])
+
+LLM_REQUEST_SECONDS = Histogram(
+    "trainwreck_llm_request_seconds", "LLM request latency", ["provider", "method"], buckets=_LLM_BUCKETS
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "trainwreck_llm_time_to_first_token_seconds", "Time to the first streamed chunk", ["provider"], buckets=_LLM_BUCKETS
+)
+LLM_TOKENS = Counter("trainwreck_llm_tokens", "Tokens sent to and received from LLMs", ["provider", "kind"])
+LLM_ERRORS = Counter("trainwreck_llm_errors", "LLM requests that raised", ["provider", "method"])
+
+MCP_CALL_SECONDS = Histogram(
+    "trainwreck_mcp_call_seconds", "MCP tool call round trip", ["server", "tool"], buckets=_STEP_BUCKETS
+)
+MCP_ERRORS = Counter("trainwreck_mcp_errors", "MCP tool calls that failed or timed out", ["server", "tool"])
+
+MEMORY_WRITE_SECONDS = Histogram(
+    "trainwreck_memory_write_seconds", "Step history write transactions", ["operation"], buckets=_WRITE_BUCKETS
+)
+MEMORY_STEPS_WRITTEN = Counter("trainwreck_memory_steps_written", "Steps committed to the step history database")
+
+_logger: Any = None
+_log_file: IO[str] | None = None
+_metrics_lock = threading.Lock()
+_metrics_port: int | None = None
+
+
+def configure_logging(path: Path | str) -> None:
+    """
+    Write structured events (one JSON object per line) to `path`, or to
+    stderr for "-". Until this is called, log_event does nothing.
+    """
+    global _logger, _log_file
+    if _log_file is not None and _log_file is not sys.stderr:
+        _log_file.close()
+    # Held open for the life of the process (or until reconfigured), so not a with block
+    _log_file = sys.stderr if str(path) == "-" else open(path, "a", encoding="utf-8", buffering=1)  # noqa: SIM115
+    # Wrapped rather than configured globally, so an application embedding TrainWreck keeps its own setup
+    _logger = structlog.wrap_logger(
+        structlog.WriteLogger(_log_file),
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.processors.JSONRenderer(sort_keys=False),
+        ],
+    )
+
+
+def log_event(event: str, level: str = "info", **fields: Any) -> None:
+    """Log one structured event, if a JSON log is configured."""
+    if _logger is not None:
+        getattr(_logger, level)(event, **fields)
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> None:
+    """Serve the metrics for Prometheus to scrape at http://addr:port/metrics (once per process)."""
+    global _metrics_port
+    with _metrics_lock:
+        if _metrics_port is not None:
+            return
+        start_http_server(port, addr=addr)
+        _metrics_port = port
+
+
+@contextmanager
+def timed(
+    histogram: Histogram, event: str | None = None, span: str | None = None, **labels: str
+) -> Iterator[dict[str, Any]]:
+    """
+    Observe how long the block takes in `histogram` (with `labels`), and log
+    it as `event` with the labels plus any fields the block puts in the
+    yielded dict. The block is also traced as a span named `span` (default
+    `event`) with the same attributes. Time spent before an exception is
+    observed too.
+    """
+    fields: dict[str, Any] = {}
+    start = time.perf_counter()
+    with tracing.span(span or event or "", **labels) as current:
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - start
+            (histogram.labels(**labels) if labels else histogram).observe(seconds)
+            current.set(**fields)
+            if event is not None and _logger is not None:
+                _logger.info(event, seconds=round(seconds, 6), **labels, **fields)
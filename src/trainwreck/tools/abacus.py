@@ -5,6 +5,8 @@ from typing import Any
 
 import httpx
 
+from trainwreck.llm.http import make_http_client
+
 
 class AbacusClient:
     """Abacus.AI API client."""
@@ -14,50 +16,57 @@ class AbacusClient:
         if not self.api_key:
             raise ValueError("ABACUS_API_KEY environment variable not set")
         self.base_url = "https://api.abacus.ai"
+        self._http: httpx.Client | None = None
+
+    @property
+    def http(self) -> httpx.Client:
+        """Pooled HTTP client, created on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = make_http_client(
+                self.base_url,
+                timeout=30.0,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        return self._http
 
     def list_deployments(self) -> list[dict[str, Any]]:
         """List all deployments."""
-        url = f"{self.base_url}/v0/deployments"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        with httpx.Client() as client:
-            response = client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json().get("deployments", [])
+        response = self.http.get("/v0/deployments")
+        response.raise_for_status()
+        return response.json().get("deployments", [])
 
     def create_deployment(self, model_id: str, name: str, **kwargs: Any) -> dict[str, Any]:
         """Create a new deployment."""
-        url = f"{self.base_url}/v0/deployments"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
         payload = {
             "modelId": model_id,
             "name": name,
             **kwargs,
         }
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
+        response = self.http.post("/v0/deployments", json=payload)
+        response.raise_for_status()
+        return response.json()
 
     def predict(self, deployment_id: str, data: dict[str, Any], deployment_token: str | None = None) -> dict[str, Any]:
         """Run a prediction on a deployment."""
-        url = f"{self.base_url}/v0/deployments/{deployment_id}/predict"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
+        headers = {}
         if deployment_token:
             headers["X-Deployment-Token"] = deployment_token
 
-        with httpx.Client() as client:
-            response = client.post(url, json=data, headers=headers, timeout=60.0)
-            response.raise_for_status()
-            return response.json()
+        response = self.http.post(f"/v0/deployments/{deployment_id}/predict", json=data, headers=headers, timeout=60.0)
+        response.raise_for_status()
+        return response.json()
 
     def upload_dataset(self, name: str, file_path: str, **kwargs: Any) -> dict[str, Any]:
         """Upload a dataset."""
-        url = f"{self.base_url}/v0/datasets"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
         with open(file_path, "rb") as f:
             files = {"file": f}
             data = {"name": name, **kwargs}
-            with httpx.Client() as client:
-                response = client.post(url, data=data, files=files, headers=headers, timeout=120.0)
-                response.raise_for_status()
-                return response.json()
+            response = self.http.post("/v0/datasets", data=data, files=files, timeout=120.0)
+            response.raise_for_status()
+            return response.json()
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
@@ -1,24 +1,89 @@
 from __future__ import annotations
 
-import subprocess
+import asyncio
+import threading
 from typing import Any
 
+from trainwreck import tracing
+from trainwreck.tools.process import OutputCallback, arun_streaming, record_result, run_streaming
+from trainwreck.tools.shell_session import ShellSession
+
 
 class BashExecutor:
-    """Execute bash commands."""
+    """
+    Execute bash commands.
+
+    Output is captured incrementally into bounded head/tail buffers of
+    `max_output_bytes` per stream, and the command's process group is killed
+    after `timeout` seconds, or after `idle_timeout` seconds without output.
+
+    With `session=True`, commands run in one long-lived ShellSession started
+    in the first command's `cwd`, so environment variables, `cd` and
+    virtualenv activation carry over between steps.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        idle_timeout: float | None = None,
+        max_output_bytes: int = 1024 * 1024,
+        on_output: OutputCallback | None = None,
+        session: bool = False,
+    ) -> None:
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_output_bytes = max_output_bytes
+        self.on_output = on_output
+        self.use_session = session
+        self._session: ShellSession | None = None
+        # Parallel batch steps must share one session, not each start their own
+        self._session_lock = threading.Lock()
 
     def run(self, command: str, cwd: str | None = None, **kwargs: Any) -> dict[str, Any]:
         """Run a bash command and return the result."""
-        result = subprocess.run(
-            command,
-            shell=True,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            **kwargs,
-        )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode,
-        }
+        with tracing.span("subprocess", shell="bash", command=command, session=self.use_session) as span:
+            if self.use_session:
+                result = self._get_session(cwd).run(command, timeout=self.timeout, idle_timeout=self.idle_timeout)
+            else:
+                result = run_streaming(
+                    command,
+                    cwd=cwd,
+                    shell=True,
+                    timeout=self.timeout,
+                    idle_timeout=self.idle_timeout,
+                    max_output_bytes=self.max_output_bytes,
+                    on_output=self.on_output,
+                    **kwargs,
+                )
+            return record_result(span, result)
+
+    async def arun(self, command: str, cwd: str | None = None, **kwargs: Any) -> dict[str, Any]:
+        """Run a bash command without blocking the event loop."""
+        if self.use_session:
+            return await asyncio.to_thread(self.run, command, cwd)
+        with tracing.span("subprocess", shell="bash", command=command) as span:
+            result = await arun_streaming(
+                command,
+                cwd=cwd,
+                shell=True,
+                timeout=self.timeout,
+                idle_timeout=self.idle_timeout,
+                max_output_bytes=self.max_output_bytes,
+                on_output=self.on_output,
+                **kwargs,
+            )
+            return record_result(span, result)
+
+    def _get_session(self, cwd: str | None) -> ShellSession:
+        # Commands on the session are serialized by ShellSession.run itself
+        with self._session_lock:
+            if self._session is None:
+                self._session = ShellSession(cwd=cwd, max_output_bytes=self.max_output_bytes, on_output=self.on_output)
+            return self._session
+
+    def close(self) -> None:
+        """Shut down the shell session, if one was started."""
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
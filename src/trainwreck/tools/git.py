@@ -5,6 +5,9 @@ from typing import Any
 
 from git import Repo
 
+# TrainWreck's own files in the work tree (step history with its WAL sidecars, response cache, traces)
+_ARTIFACT_EXCLUDES = (":(exclude).trainwreck.db*", ":(exclude).trainwreck-cache.db*", ":(exclude).trainwreck-traces")
+
 
 class GitAdapter:
     """Git operations adapter."""
@@ -54,3 +57,42 @@ class GitAdapter:
     def log(self, max_count: int = 10) -> str:
         """Get commit log."""
         return self.repo.git.log(f"--max-count={max_count}", "--oneline")
+
+    def head(self) -> str | None:
+        """Get the HEAD commit sha, or None if there are no commits yet."""
+        try:
+            return self.repo.head.commit.hexsha
+        except ValueError:
+            return None
+
+    def index_mtime(self) -> float:
+        """Modification time of the git index; it changes whenever tracked files are staged."""
+        try:
+            return (Path(self.repo.git_dir) / "index").stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def ls_files(self) -> list[str]:
+        """List tracked files."""
+        return [path for path in self.repo.git.ls_files("-z").split("\0") if path]
+
+    def status_porcelain(self, *paths: str) -> dict[str, str]:
+        """
+        Map each changed path (optionally limited to `paths`) to its two-letter
+        status code. TrainWreck's own databases and traces are left out.
+        """
+        args = ["--porcelain", "-z", "--untracked-files=all", "--", *paths, *_ARTIFACT_EXCLUDES]
+        entries = self.repo.git.status(*args).split("\0")
+        changes = {}
+        i = 0
+        while i < len(entries):
+            entry = entries[i]
+            i += 1
+            if not entry:
+                continue
+            code, path = entry[:2], entry[3:]
+            if code[0] in "RC":
+                # Renames and copies are followed by the original path
+                i += 1
+            changes[path] = code
+        return changes
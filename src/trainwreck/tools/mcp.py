@@ -1,124 +1,673 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 from typing import Any
 
+from trainwreck import telemetry
+from trainwreck.tools.mcp_catalog import MCPCatalogCache
+from trainwreck.tools.mcp_registry import MCPToolRegistry
+
+
+def _record_failure(fields: dict[str, Any], server: str, tool: str) -> None:
+    """Count a failed tool call and mark its log event."""
+    telemetry.MCP_ERRORS.labels(server, tool).inc()
+    fields["failed"] = True
+
 
 class MCPServerConnection:
-    """Single MCP server connection."""
+    """
+    Single MCP server connection.
+
+    A background thread reads stdout and resolves each request's future by
+    its JSON-RPC id, so several calls can be in flight at once from different
+    threads. Messages without a pending id (notifications, server requests)
+    are ignored, and stderr is drained continuously so a chatty server cannot
+    block on a full pipe. The last stderr lines are kept in `stderr_tail`.
+
+    With `lazy=True` the process is not spawned until the first request.
+    After `stop()` (e.g. an idle shutdown) the next request respawns it.
+    """
 
-    def __init__(self, name: str, command: list[str]) -> None:
+    def __init__(self, name: str, command: list[str], timeout: float | None = 120.0, lazy: bool = False) -> None:
         self.name = name
         self.command = command
-        self.process = subprocess.Popen(
-            command,
+        self.timeout = timeout
+        self.process: subprocess.Popen[str] | None = None
+        self.tools: list[dict[str, Any]] = []
+        self.stderr_tail: deque[str] = deque(maxlen=50)
+        self.last_used = time.monotonic()
+        self._request_id = 0
+        self._pending: dict[int, Future[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        if not lazy:
+            self.start()
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> None:
+        """Spawn the server process unless it is already running."""
+        with self._write_lock:
+            self._spawn_locked()
+
+    def _spawn_locked(self) -> subprocess.Popen[str]:
+        """Spawn the server process unless it is already running. Call with `_write_lock` held."""
+        process = self.process
+        if process is not None and process.poll() is None:
+            return process
+        process = subprocess.Popen(
+            self.command,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
         )
-        self.tools: list[dict[str, Any]] = []
-        self._request_id = 0
+        self.process = process
+        for target, stream in ((self._read_responses, "stdout"), (self._drain_stderr, "stderr")):
+            threading.Thread(target=target, args=(process,), name=f"mcp-{self.name}-{stream}", daemon=True).start()
+        return process
 
-    def call_tool(self, tool_name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    def call_tool(self, tool_name: str, arguments: dict[str, Any], timeout: float | None = None) -> dict[str, Any]:
         """Call a tool on this MCP server."""
-        self._request_id += 1
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._request_id,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments,
-            },
-        }
-        self._send(request)
-        response = self._receive()
-        return response
+        with telemetry.timed(telemetry.MCP_CALL_SECONDS, "mcp_call", server=self.name, tool=tool_name) as fields:
+            try:
+                response = self.request("tools/call", {"name": tool_name, "arguments": arguments}, timeout=timeout)
+            except Exception:
+                _record_failure(fields, self.name, tool_name)
+                raise
+            if "error" in response:
+                _record_failure(fields, self.name, tool_name)
+            return response
 
     def list_tools(self) -> list[dict[str, Any]]:
         """List available tools from this MCP server."""
-        self._request_id += 1
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._request_id,
-            "method": "tools/list",
-        }
-        self._send(request)
-        response = self._receive()
+        response = self.request("tools/list")
         tools = response.get("result", {}).get("tools", [])
         self.tools = tools
         return tools
 
-    def _send(self, message: dict[str, Any]) -> None:
-        """Send a JSON-RPC message to the server."""
-        if self.process.stdin:
-            self.process.stdin.write(json.dumps(message) + "\n")
-            self.process.stdin.flush()
+    def request(
+        self, method: str, params: dict[str, Any] | None = None, timeout: float | None = None
+    ) -> dict[str, Any]:
+        """
+        Send a request and wait for its response.
+        On timeout the request is cancelled on the server and TimeoutError is raised.
+        """
+        request_id, future = self.submit(method, params)
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.cancel(request_id, f"Timed out after {timeout}s")
+            raise TimeoutError(f"MCP request '{method}' to '{self.name}' timed out after {timeout}s") from None
+
+    def submit(self, method: str, params: dict[str, Any] | None = None) -> tuple[int, Future[dict[str, Any]]]:
+        """Send a request without waiting; returns its id and a future for the response."""
+        future: Future[dict[str, Any]] = Future()
+        if self._closed:
+            raise ConnectionError(f"MCP server '{self.name}' is closed")
+        with self._lock:
+            self.last_used = time.monotonic()
+            self._request_id += 1
+            request_id = self._request_id
+            self._pending[request_id] = future
+        message: dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        try:
+            self._send(message, start=True)
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise ConnectionError(f"MCP server '{self.name}' is not accepting input: {e}") from e
+        return request_id, future
+
+    def cancel(self, request_id: int, reason: str = "Cancelled") -> None:
+        """Abandon a pending request and tell the server to stop working on it."""
+        with self._lock:
+            future = self._pending.pop(request_id, None)
+        if future is None:
+            return
+        future.cancel()
+        with contextlib.suppress(OSError):
+            self._send(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/cancelled",
+                    "params": {"requestId": request_id, "reason": reason},
+                }
+            )
+
+    def _send(self, message: dict[str, Any], start: bool = False) -> None:
+        """Send a JSON-RPC message to the server, spawning it first if `start` is set."""
+        with self._write_lock:
+            process = self._spawn_locked() if start else self.process
+            if process is not None and process.stdin:
+                process.stdin.write(json.dumps(message) + "\n")
+                process.stdin.flush()
 
-    def _receive(self) -> dict[str, Any]:
-        """Receive a JSON-RPC message from the server."""
-        if self.process.stdout:
-            line = self.process.stdout.readline()
-            if line:
-                return json.loads(line)
-        return {}
+    def _read_responses(self, process: subprocess.Popen[str]) -> None:
+        """Resolve pending requests as responses arrive."""
+        assert process.stdout is not None
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(message, dict) or "method" in message:
+                continue
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)  # type: ignore[arg-type]
+                self.last_used = time.monotonic()
+            if future is not None and not future.done():
+                future.set_result(message)
+        if self.process is process:
+            self._fail_pending(ConnectionError(f"MCP server '{self.name}' closed its output"))
+
+    def _drain_stderr(self, process: subprocess.Popen[str]) -> None:
+        """Keep reading stderr so the server never blocks writing diagnostics."""
+        assert process.stderr is not None
+        for line in process.stderr:
+            self.stderr_tail.append(line.rstrip("\n"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def stop_if_idle(self, idle_timeout: float) -> bool:
+        """Terminate the process if it has had no requests for `idle_timeout` seconds."""
+        # Requests register as pending before taking the write lock, so none can be lost here
+        with self._write_lock, self._lock:
+            if self._pending or not self.running or time.monotonic() - self.last_used < idle_timeout:
+                return False
+            process, self.process = self.process, None
+        self._terminate(process)
+        return True
+
+    def stop(self) -> None:
+        """Terminate the process; a later request starts a new one."""
+        with self._write_lock:
+            process, self.process = self.process, None
+        self._terminate(process)
+        self._fail_pending(ConnectionError(f"MCP server '{self.name}' was stopped"))
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen[str] | None) -> None:
+        if process is None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
 
     def close(self) -> None:
         """Close this MCP server process."""
-        if self.process:
+        self._closed = True
+        self.stop()
+
+
+class AsyncMCPServerConnection:
+    """Single MCP server connection over asyncio subprocess pipes."""
+
+    # Tool results can be large single-line JSON documents
+    READ_LIMIT = 16 * 1024 * 1024
+
+    def __init__(self, name: str, command: list[str], timeout: float | None = 120.0) -> None:
+        self.name = name
+        self.command = command
+        self.timeout = timeout
+        self.process: asyncio.subprocess.Process | None = None
+        self.tools: list[dict[str, Any]] = []
+        self._request_id = 0
+        self._pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        """Spawn the server process and start the background readers."""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=self.READ_LIMIT,
+        )
+        self._tasks = [
+            asyncio.create_task(self._read_responses()),
+            asyncio.create_task(self._drain_stderr()),
+        ]
+
+    async def call_tool(
+        self, tool_name: str, arguments: dict[str, Any], timeout: float | None = None
+    ) -> dict[str, Any]:
+        """Call a tool on this MCP server."""
+        with telemetry.timed(telemetry.MCP_CALL_SECONDS, "mcp_call", server=self.name, tool=tool_name) as fields:
+            try:
+                response = await self._request(
+                    "tools/call", {"name": tool_name, "arguments": arguments}, timeout=timeout
+                )
+            except Exception:
+                _record_failure(fields, self.name, tool_name)
+                raise
+            if "error" in response:
+                _record_failure(fields, self.name, tool_name)
+            return response
+
+    async def list_tools(self) -> list[dict[str, Any]]:
+        """List available tools from this MCP server."""
+        response = await self._request("tools/list")
+        tools = response.get("result", {}).get("tools", [])
+        self.tools = tools
+        return tools
+
+    async def _request(
+        self, method: str, params: dict[str, Any] | None = None, timeout: float | None = None
+    ) -> dict[str, Any]:
+        """
+        Send a JSON-RPC request and wait for the response with the same id.
+        If the wait times out or is cancelled, the server is told to cancel the request.
+        """
+        if self.process is None or self.process.stdin is None:
+            raise ConnectionError(f"MCP server '{self.name}' is not running")
+        self._request_id += 1
+        request_id = self._request_id
+        request: dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            request["params"] = params
+
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            self.process.stdin.write((json.dumps(request) + "\n").encode())
+            await self.process.stdin.drain()
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            cancelled = {
+                "jsonrpc": "2.0",
+                "method": "notifications/cancelled",
+                "params": {"requestId": request_id, "reason": "Cancelled by client"},
+            }
+            if not self.process.stdin.is_closing():
+                self.process.stdin.write((json.dumps(cancelled) + "\n").encode())
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_responses(self) -> None:
+        """Resolve pending requests as responses arrive; notifications are ignored."""
+        assert self.process is not None and self.process.stdout is not None
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(message, dict) or "method" in message:
+                continue
+            future = self._pending.get(message.get("id"))  # type: ignore[arg-type]
+            if future is not None and not future.done():
+                future.set_result(message)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"MCP server '{self.name}' closed its output"))
+
+    async def _drain_stderr(self) -> None:
+        """Keep reading stderr so a chatty server cannot fill the pipe and stall."""
+        assert self.process is not None and self.process.stderr is not None
+        while await self.process.stderr.readline():
+            pass
+
+    async def close(self) -> None:
+        """Close this MCP server process."""
+        if self.process and self.process.returncode is None:
             self.process.terminate()
-            self.process.wait()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
 
 
-class MCPClient:
-    """Model Context Protocol client with multi-server support."""
+class _MCPToolCatalog:
+    """Tool routing and listing shared by the sync and async MCP clients."""
 
-    def __init__(self, server_command: list[str] | None = None) -> None:
-        self.servers: dict[str, MCPServerConnection] = {}
+    def __init__(self) -> None:
+        self.servers: dict[str, Any] = {}
         self.tool_to_server: dict[str, str] = {}
+        self.registry = MCPToolRegistry()
+
+    def _register_tools(self, name: str, tools: list[dict[str, Any]]) -> None:
+        """Route each of a server's tools to that server, replacing any earlier routes to it."""
+        self._unregister_tools(name)
+        for tool in tools:
+            tool_name = tool.get("name", "")
+            if tool_name:
+                self.tool_to_server[tool_name] = name
+        self.registry.set_server(name, tools)
+
+    def _unregister_tools(self, name: str) -> None:
+        """Drop every route to a server."""
+        for tool_name, server_name in list(self.tool_to_server.items()):
+            if server_name == name:
+                del self.tool_to_server[tool_name]
+        self.registry.remove_server(name)
+
+    def _read_config(self, config_path: Path) -> list[tuple[str, list[str]]]:
+        """Return (name, command) for each enabled server in a configuration file."""
+        with open(config_path) as f:
+            config = json.load(f)
+
+        enabled_servers = []
+        for server_config in config.get("mcp_servers", []):
+            name = server_config.get("name", "")
+            command = server_config.get("command", [])
+            enabled = server_config.get("enabled", True)
+
+            if name and command and enabled:
+                enabled_servers.append((name, command))
+        return enabled_servers
+
+    def list_tools(self) -> list[dict[str, Any]]:
+        """List all available tools from all connected MCP servers."""
+        all_tools = []
+        for server_name, server in list(self.servers.items()):
+            for tool in server.tools:
+                tool_with_server = tool.copy()
+                tool_with_server["mcp_server"] = server_name
+                all_tools.append(tool_with_server)
+        return all_tools
+
+    def tool_lines(self, goal: str | None = None, top_k: int | None = None) -> list[str]:
+        """Prompt lines for the available tools, most relevant to `goal` first."""
+        return self.registry.tool_lines(goal, top_k)
+
+    def get_tools_summary(self) -> str:
+        """Get a formatted summary of all available MCP tools."""
+        if not self.servers:
+            return "No MCP servers connected."
+        return self.registry.summary()
+
+
+class MCPServerPool:
+    """
+    Shares MCP server processes between clients.
+
+    Connections are keyed by command, so clients created for successive goals
+    (in a batch worker or any long-lived process) reuse a server that is
+    already running, along with its tool list. With `idle_timeout`, servers
+    that have had no requests for that many seconds are terminated; they
+    respawn on their next call.
+    """
+
+    def __init__(self, idle_timeout: float | None = None, timeout: float | None = 120.0) -> None:
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections: dict[tuple[str, ...], MCPServerConnection] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: threading.Thread | None = None
+
+    def acquire(self, name: str, command: list[str], lazy: bool = False) -> tuple[MCPServerConnection, bool]:
+        """Return the connection for a command and whether it already existed."""
+        key = tuple(command)
+        with self._lock:
+            server = self.connections.get(key)
+            reused = server is not None
+            if server is None:
+                server = MCPServerConnection(name, command, timeout=self.timeout, lazy=True)
+                self.connections[key] = server
+            if self.idle_timeout is not None and self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="mcp-reaper", daemon=True)
+                self._reaper.start()
+        if not lazy:
+            server.start()
+        return server, reused
+
+    def remove(self, server: MCPServerConnection) -> None:
+        """Close a connection and forget it."""
+        with self._lock:
+            if self.connections.get(tuple(server.command)) is server:
+                del self.connections[tuple(server.command)]
+        server.close()
+
+    def _reap(self) -> None:
+        """Stop servers that have been idle longer than `idle_timeout`."""
+        while not self._stop.wait(min(max((self.idle_timeout or 120.0) / 4, 0.05), 30.0)):
+            if self.idle_timeout is None:
+                continue
+            with self._lock:
+                servers = list(self.connections.values())
+            for server in servers:
+                server.stop_if_idle(self.idle_timeout)
+
+    def close(self) -> None:
+        """Close every pooled server process."""
+        self._stop.set()
+        with self._lock:
+            servers = list(self.connections.values())
+            self.connections.clear()
+        for server in servers:
+            server.close()
+
+
+class MCPClient(_MCPToolCatalog):
+    """
+    Model Context Protocol client with multi-server support.
+
+    Servers start concurrently. With a catalog cache, a server whose tool list
+    is cached is usable at once: its tools are routed from the cache while the
+    handshake finishes in the background, and requests sent meanwhile simply
+    queue on its stdin. In lazy mode such a server is not spawned at all
+    until a call is routed to it.
+
+    Connections come from an MCPServerPool. Pass a shared pool to reuse
+    servers across clients; otherwise the client owns a private pool and
+    closes it with itself.
+    """
+
+    def __init__(
+        self,
+        server_command: list[str] | None = None,
+        timeout: float | None = 120.0,
+        catalog: MCPCatalogCache | None = None,
+        lazy: bool = False,
+        idle_timeout: float | None = None,
+        pool: MCPServerPool | None = None,
+    ) -> None:
+        super().__init__()
+        self.servers: dict[str, MCPServerConnection] = {}
+        self.catalog = catalog
+        self.lazy = lazy
+        self.pool = pool or MCPServerPool(idle_timeout=idle_timeout, timeout=timeout)
+        self._owns_pool = pool is None
+        self._handshakes = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-handshake")
+        self._closed = False
 
         if server_command:
             self.add_server("default", server_command)
 
     def add_server(self, name: str, command: list[str]) -> None:
-        """Add and connect to an MCP server."""
+        """Add and connect to an MCP server, waiting for its tools unless they are cached."""
+        handshake = self._start_server(name, command)
+        if handshake is not None:
+            handshake.result()
+
+    def load_config(self, config_path: Path) -> None:
+        """Load MCP servers from a configuration file, starting them in parallel."""
+        if not config_path.exists():
+            return
+
+        handshakes = []
         try:
-            server = MCPServerConnection(name, command)
-            tools = server.list_tools()
+            for name, command in self._read_config(config_path):
+                handshake = self._start_server(name, command)
+                if handshake is not None:
+                    handshakes.append(handshake)
+        except Exception as e:
+            print(f"Warning: Failed to load MCP config from {config_path}: {e}")
+        wait(handshakes)
+
+    def _start_server(self, name: str, command: list[str]) -> Future[None] | None:
+        """
+        Get a server from the pool and begin its handshake if needed.
+        Returns the handshake future if the caller must wait for it, or None if the tools are already known.
+        """
+        try:
+            server, reused = self.pool.acquire(name, command, lazy=self.lazy)
+        except Exception as e:
+            print(f"Warning: Failed to connect to MCP server '{name}': {e}")
+            return None
+        self.servers[name] = server
 
-            for tool in tools:
-                tool_name = tool.get("name", "")
-                if tool_name:
-                    self.tool_to_server[tool_name] = name
+        if reused and server.tools:
+            self._register_tools(name, server.tools)
+            return None
+        cached = self.catalog.get(command) if self.catalog is not None else None
+        if cached is not None:
+            server.tools = cached
+            self._register_tools(name, cached)
+            if self.lazy:
+                return None
+        handshake = self._handshakes.submit(self._handshake, name, server)
+        return handshake if cached is None else None
 
-            self.servers[name] = server
+    def _handshake(self, name: str, server: MCPServerConnection) -> None:
+        """List a server's tools, refreshing routes and the catalog cache."""
+        try:
+            tools = server.list_tools()
         except Exception as e:
+            if self._closed:
+                return
             print(f"Warning: Failed to connect to MCP server '{name}': {e}")
+            if self.servers.get(name) is server:
+                del self.servers[name]
+                self._unregister_tools(name)
+            self.pool.remove(server)
+            return
+        self._register_tools(name, tools)
+        if self.catalog is not None:
+            self.catalog.put(server.command, tools)
 
-    def load_config(self, config_path: Path) -> None:
-        """Load MCP servers from a configuration file."""
+    def call_tool(self, tool_name: str, arguments: dict[str, Any], timeout: float | None = None) -> dict[str, Any]:
+        """
+        Call a tool on the appropriate MCP server, spawning it if it is not running.
+        Safe to call from several threads at once; requests to one server are pipelined.
+        """
+        server_name = self.tool_to_server.get(tool_name)
+
+        if not server_name:
+            return {"error": f"Tool '{tool_name}' not found in any MCP server"}
+
+        server = self.servers.get(server_name)
+        if not server:
+            return {"error": f"MCP server '{server_name}' not connected"}
+
+        try:
+            return server.call_tool(tool_name, arguments, timeout=timeout)
+        except (TimeoutError, ConnectionError) as e:
+            return {"error": str(e)}
+
+    def close(self) -> None:
+        """Close all MCP server processes, unless they belong to a shared pool."""
+        self._closed = True
+        self._handshakes.shutdown(wait=False, cancel_futures=True)
+        if self._owns_pool:
+            self.pool.close()
+
+
+class AsyncMCPClient(_MCPToolCatalog):
+    """Asyncio Model Context Protocol client with multi-server support."""
+
+    def __init__(self, timeout: float | None = 120.0, catalog: MCPCatalogCache | None = None) -> None:
+        super().__init__()
+        self.servers: dict[str, AsyncMCPServerConnection] = {}
+        self.timeout = timeout
+        self.catalog = catalog
+        self._handshakes: set[asyncio.Task[None]] = set()
+
+    async def add_server(self, name: str, command: list[str]) -> None:
+        """Add and connect to an MCP server, waiting for its tools unless they are cached."""
+        handshake = await self._start_server(name, command)
+        if handshake is not None:
+            await handshake
+
+    async def load_config(self, config_path: Path) -> None:
+        """Load MCP servers from a configuration file, starting them in parallel."""
         if not config_path.exists():
             return
 
         try:
-            with open(config_path) as f:
-                config = json.load(f)
+            servers = self._read_config(config_path)
+        except Exception as e:
+            print(f"Warning: Failed to load MCP config from {config_path}: {e}")
+            return
+        started = await asyncio.gather(*(self._start_server(name, command) for name, command in servers))
+        await asyncio.gather(*(handshake for handshake in started if handshake is not None))
 
-            servers = config.get("mcp_servers", [])
-            for server_config in servers:
-                name = server_config.get("name", "")
-                command = server_config.get("command", [])
-                enabled = server_config.get("enabled", True)
+    async def _start_server(self, name: str, command: list[str]) -> asyncio.Task[None] | None:
+        """
+        Spawn a server and begin its handshake.
+        Returns the handshake task if the caller must wait for it, or None if tools came from the cache.
+        """
+        server = AsyncMCPServerConnection(name, command, timeout=self.timeout)
+        try:
+            await server.start()
+        except Exception as e:
+            print(f"Warning: Failed to connect to MCP server '{name}': {e}")
+            await server.close()
+            return None
+        self.servers[name] = server
 
-                if name and command and enabled:
-                    self.add_server(name, command)
+        cached = self.catalog.get(command) if self.catalog is not None else None
+        if cached is not None:
+            server.tools = cached
+            self._register_tools(name, cached)
+        handshake = asyncio.create_task(self._handshake(name, server))
+        self._handshakes.add(handshake)
+        handshake.add_done_callback(self._handshakes.discard)
+        return handshake if cached is None else None
+
+    async def _handshake(self, name: str, server: AsyncMCPServerConnection) -> None:
+        """List a server's tools, refreshing routes and the catalog cache."""
+        try:
+            tools = await server.list_tools()
         except Exception as e:
-            print(f"Warning: Failed to load MCP config from {config_path}: {e}")
+            print(f"Warning: Failed to connect to MCP server '{name}': {e}")
+            if self.servers.get(name) is server:
+                del self.servers[name]
+                self._unregister_tools(name)
+            await server.close()
+            return
+        self._register_tools(name, tools)
+        if self.catalog is not None:
+            await asyncio.to_thread(self.catalog.put, server.command, tools)
 
-    def call_tool(self, tool_name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    async def call_tool(
+        self, tool_name: str, arguments: dict[str, Any], timeout: float | None = None
+    ) -> dict[str, Any]:
         """Call a tool on the appropriate MCP server."""
         server_name = self.tool_to_server.get(tool_name)
 
@@ -129,34 +678,13 @@ class MCPClient:
         if not server:
             return {"error": f"MCP server '{server_name}' not connected"}
 
-        return server.call_tool(tool_name, arguments)
-
-    def list_tools(self) -> list[dict[str, Any]]:
-        """List all available tools from all connected MCP servers."""
-        all_tools = []
-        for server_name, server in self.servers.items():
-            for tool in server.tools:
-                tool_with_server = tool.copy()
-                tool_with_server["mcp_server"] = server_name
-                all_tools.append(tool_with_server)
-        return all_tools
-
-    def get_tools_summary(self) -> str:
-        """Get a formatted summary of all available MCP tools."""
-        if not self.servers:
-            return "No MCP servers connected."
-
-        summary = []
-        for server_name, server in self.servers.items():
-            summary.append(f"\n{server_name}: {len(server.tools)} tools")
-            for tool in server.tools:
-                tool_name = tool.get("name", "unknown")
-                description = tool.get("description", "")
-                summary.append(f"  - {tool_name}: {description}")
-
-        return "\n".join(summary)
+        try:
+            return await server.call_tool(tool_name, arguments, timeout=timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            return {"error": str(e) or f"MCP tool '{tool_name}' timed out"}
 
-    def close(self) -> None:
+    async def close(self) -> None:
         """Close all MCP server processes."""
-        for server in self.servers.values():
-            server.close()
+        for handshake in list(self._handshakes):
+            handshake.cancel()
+        await asyncio.gather(*(server.close() for server in list(self.servers.values())))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any
+
+
+def default_catalog_path() -> Path:
+    """Location of the shared catalog file, overridable with TRAINWRECK_MCP_CATALOG."""
+    override = os.getenv("TRAINWRECK_MCP_CATALOG")
+    if override:
+        return Path(override).expanduser()
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "trainwreck" / "mcp-catalog.json"
+
+
+class MCPCatalogCache:
+    """
+    Persists each MCP server's tool list between runs.
+
+    Entries are keyed by the server command plus a fingerprint of the files it
+    refers to (the resolved executable and any path arguments), so upgrading
+    or editing a server invalidates its entry. Package versions pinned in the
+    command itself (e.g. `npx -y pkg@1.2.3`) are covered by the command text.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or default_catalog_path()
+        self._lock = threading.Lock()
+        self._entries: dict[str, Any] | None = None
+
+    @staticmethod
+    def make_key(command: list[str]) -> str:
+        """Hash the command and the size and mtime of every file it names."""
+        digest = hashlib.sha256(json.dumps(command).encode())
+        candidates = [shutil.which(command[0]) or command[0], *command[1:]] if command else []
+        for arg in candidates:
+            try:
+                stat = os.stat(arg)
+            except (OSError, ValueError):
+                continue
+            digest.update(f"\0{arg}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def get(self, command: list[str]) -> list[dict[str, Any]] | None:
+        """Return the cached tool list for a server command, if any."""
+        with self._lock:
+            entry = self._load().get(self.make_key(command))
+        return entry.get("tools") if isinstance(entry, dict) else None
+
+    def put(self, command: list[str], tools: list[dict[str, Any]]) -> None:
+        """Store a server's tool list and write the catalog file."""
+        with self._lock:
+            entries = self._load()
+            key = self.make_key(command)
+            if entries.get(key, {}).get("tools") == tools:
+                return
+            entries[key] = {"command": command, "tools": tools}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(entries))
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Warning: Failed to write MCP tool catalog {self.path}: {e}")
+
+    def _load(self) -> dict[str, Any]:
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                data = {}
+            self._entries = data if isinstance(data, dict) else {}
+        return self._entries
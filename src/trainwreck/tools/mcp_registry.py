@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any
+
+_STOPWORDS = {
+    "a",
+    "all",
+    "an",
+    "and",
+    "any",
+    "are",
+    "as",
+    "at",
+    "be",
+    "by",
+    "can",
+    "for",
+    "from",
+    "in",
+    "into",
+    "is",
+    "it",
+    "of",
+    "on",
+    "or",
+    "that",
+    "the",
+    "this",
+    "to",
+    "use",
+    "using",
+    "with",
+}
+
+
+def _terms(text: str) -> list[str]:
+    """Lowercase word terms, splitting snake_case and camelCase names."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class MCPToolRegistry:
+    """
+    Versioned catalog of every connected server's tools.
+
+    `version` changes only when a server's tool list actually changes, and
+    the rendered prompt lines, the startup summary and the relevance index
+    are rebuilt only then. `tool_lines(goal, top_k)` ranks tools by TF-IDF
+    similarity of their name and description to the goal, so a prompt can
+    carry just the most relevant ones.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._catalogs: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._built_version = -1
+        self._lines: list[str] = []
+        self._summary = ""
+        self._vectors: list[tuple[dict[str, float], float]] = []
+        self._idf: dict[str, float] = {}
+        self._ranked: dict[tuple[str, int | None], list[str]] = {}
+
+    def set_server(self, name: str, tools: list[dict[str, Any]]) -> None:
+        """Record a server's tool list, bumping the version if it changed."""
+        with self._lock:
+            if self._catalogs.get(name) != tools:
+                self._catalogs[name] = list(tools)
+                self.version += 1
+
+    def remove_server(self, name: str) -> None:
+        """Forget a server's tools."""
+        with self._lock:
+            if self._catalogs.pop(name, None) is not None:
+                self.version += 1
+
+    def tool_lines(self, goal: str | None = None, top_k: int | None = None) -> list[str]:
+        """
+        One prompt line per tool. With a goal, tools are ordered by relevance
+        to it (catalog order breaks ties) and cut to `top_k` if given.
+        """
+        with self._lock:
+            self._build()
+            if not goal:
+                return self._lines[:top_k] if top_k is not None else list(self._lines)
+            key = (goal, top_k)
+            if key not in self._ranked:
+                self._ranked[key] = self._rank(goal, top_k)
+            return list(self._ranked[key])
+
+    def summary(self) -> str:
+        """Per-server tool listing for the startup banner."""
+        with self._lock:
+            self._build()
+            return self._summary
+
+    def _build(self) -> None:
+        """Re-render lines, summary and relevance index if the catalog changed. Call with the lock held."""
+        if self._built_version == self.version:
+            return
+        lines: list[str] = []
+        summary: list[str] = []
+        documents: list[Counter[str]] = []
+        for server_name, tools in self._catalogs.items():
+            summary.append(f"\n{server_name}: {len(tools)} tools")
+            for tool in tools:
+                tool_name = tool.get("name", "unknown")
+                description = tool.get("description", "")
+                lines.append(f"- {tool_name} ({server_name}): {description}")
+                summary.append(f"  - {tool_name}: {description}")
+                # Name terms count double: they are the strongest signal of what a tool does
+                documents.append(Counter(_terms(tool_name) * 2 + _terms(description)))
+
+        document_frequency: Counter[str] = Counter()
+        for terms in documents:
+            document_frequency.update(terms.keys())
+        count = len(documents)
+        self._idf = {t: math.log((count + 1) / (df + 1)) + 1.0 for t, df in document_frequency.items()}
+        self._vectors = []
+        for terms in documents:
+            weights = {t: (1.0 + math.log(n)) * self._idf[t] for t, n in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            self._vectors.append((weights, norm))
+
+        self._lines = lines
+        self._summary = "\n".join(summary)
+        self._ranked = {}
+        self._built_version = self.version
+
+    def _rank(self, goal: str, top_k: int | None) -> list[str]:
+        """Lines sorted by cosine similarity between the goal and each tool."""
+        query = Counter(_terms(goal))
+        scores = []
+        for index, (weights, norm) in enumerate(self._vectors):
+            score = sum(weights.get(t, 0.0) * (1.0 + math.log(n)) * self._idf.get(t, 0.0) for t, n in query.items())
+            score /= norm
+            scores.append((-score, index))
+        ordered = [self._lines[index] for _, index in sorted(scores)]
+        return ordered[:top_k] if top_k is not None else ordered
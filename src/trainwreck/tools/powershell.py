@@ -1,23 +1,50 @@
 from __future__ import annotations
 
-import subprocess
 from typing import Any
 
+from trainwreck import tracing
+from trainwreck.tools.process import OutputCallback, arun_streaming, record_result, run_streaming
+
 
 class PowerShellExecutor:
-    """Execute PowerShell commands."""
+    """Execute PowerShell commands, with the same output bounds and timeouts as BashExecutor."""
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        idle_timeout: float | None = None,
+        max_output_bytes: int = 1024 * 1024,
+        on_output: OutputCallback | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_output_bytes = max_output_bytes
+        self.on_output = on_output
 
     def run(self, command: str, cwd: str | None = None, **kwargs: Any) -> dict[str, Any]:
         """Run a PowerShell command and return the result."""
-        result = subprocess.run(
-            ["powershell", "-Command", command],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            **kwargs,
-        )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode,
-        }
+        with tracing.span("subprocess", shell="powershell", command=command) as span:
+            result = run_streaming(
+                ["powershell", "-Command", command],
+                cwd=cwd,
+                timeout=self.timeout,
+                idle_timeout=self.idle_timeout,
+                max_output_bytes=self.max_output_bytes,
+                on_output=self.on_output,
+                **kwargs,
+            )
+            return record_result(span, result)
+
+    async def arun(self, command: str, cwd: str | None = None, **kwargs: Any) -> dict[str, Any]:
+        """Run a PowerShell command without blocking the event loop."""
+        with tracing.span("subprocess", shell="powershell", command=command) as span:
+            result = await arun_streaming(
+                ["powershell", "-Command", command],
+                cwd=cwd,
+                timeout=self.timeout,
+                idle_timeout=self.idle_timeout,
+                max_output_bytes=self.max_output_bytes,
+                on_output=self.on_output,
+                **kwargs,
+            )
+            return record_result(span, result)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import IO, Any, Callable
+
+from trainwreck.tracing import Span
+
+# Called with ("stdout" | "stderr", decoded chunk) as output arrives
+OutputCallback = Callable[[str, str], None]
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class OutputBuffer:
+    """
+    Bounded capture of a process stream.
+    Keeps the first and last `max_bytes / 2` bytes and counts what was dropped in between.
+    """
+
+    def __init__(self, max_bytes: int = 1024 * 1024) -> None:
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail: deque[bytes] = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        while self.tail and self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+        # Trim the oldest chunk too, so tail_size never exceeds the limit and `truncated` stays exact
+        excess = self.tail_size - self.tail_limit
+        if excess > 0:
+            self.tail[0] = self.tail[0][excess:]
+            self.tail_size -= excess
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.head) + self.tail_size
+
+    def getvalue(self) -> str:
+        tail = b"".join(self.tail)
+        text = self.head.decode(errors="replace")
+        if self.total > len(self.head) + len(tail):
+            omitted = self.total - len(self.head) - len(tail)
+            text += f"\n... [{omitted} bytes omitted] ...\n"
+        return text + tail.decode(errors="replace")
+
+
+def process_group_kwargs() -> dict[str, Any]:
+    """Start the child in its own process group so the whole tree can be killed."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}  # type: ignore[attr-defined]
+    return {"start_new_session": True}
+
+
+def kill_process_group(process: Any) -> None:
+    """Kill a process and everything it spawned."""
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == "nt":
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _result(
+    stdout: OutputBuffer, stderr: OutputBuffer, returncode: int | None, timed_out: str | None
+) -> dict[str, Any]:
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "returncode": returncode,
+        "timed_out": timed_out,
+        "truncated": stdout.truncated or stderr.truncated,
+        "stdout_bytes": stdout.total,
+        "stderr_bytes": stderr.total,
+    }
+
+
+def record_result(span: Span, result: dict[str, Any]) -> dict[str, Any]:
+    """Add a command result's exit status and output size to its trace span, and return the result."""
+    span.set(
+        returncode=result.get("returncode"),
+        output_bytes=result.get("stdout_bytes", 0) + result.get("stderr_bytes", 0),
+        timed_out=result.get("timed_out"),
+    )
+    return result
+
+
+def run_streaming(
+    args: str | list[str],
+    cwd: str | None = None,
+    shell: bool = False,
+    timeout: float | None = None,
+    idle_timeout: float | None = None,
+    max_output_bytes: int = 1024 * 1024,
+    on_output: OutputCallback | None = None,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """
+    Run a command, reading stdout and stderr incrementally into bounded buffers.
+
+    The process group is killed if it runs longer than `timeout` seconds or
+    produces no output for `idle_timeout` seconds; `timed_out` is then
+    "wall" or "idle".
+    """
+    process = subprocess.Popen(
+        args,
+        shell=shell,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **process_group_kwargs(),
+        **kwargs,
+    )
+    buffers = {"stdout": OutputBuffer(max_output_bytes), "stderr": OutputBuffer(max_output_bytes)}
+    last_output = [time.monotonic()]
+
+    def pump(name: str, pipe: IO[bytes]) -> None:
+        for data in iter(lambda: pipe.read1(_CHUNK_SIZE), b""):  # type: ignore[attr-defined]
+            last_output[0] = time.monotonic()
+            buffers[name].write(data)
+            if on_output is not None:
+                on_output(name, data.decode(errors="replace"))
+        pipe.close()
+
+    readers = [
+        threading.Thread(target=pump, args=("stdout", process.stdout), daemon=True),
+        threading.Thread(target=pump, args=("stderr", process.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    started = time.monotonic()
+    timed_out: str | None = None
+    while True:
+        try:
+            process.wait(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            now = time.monotonic()
+            if timeout is not None and now - started > timeout:
+                timed_out = "wall"
+            elif idle_timeout is not None and now - last_output[0] > idle_timeout:
+                timed_out = "idle"
+            if timed_out:
+                kill_process_group(process)
+                process.wait()
+                break
+
+    for reader in readers:
+        # Grandchildren may still hold the pipes open; don't wait on them forever
+        reader.join(timeout=1.0)
+    return _result(buffers["stdout"], buffers["stderr"], process.returncode, timed_out)
+
+
+async def arun_streaming(
+    args: str | list[str],
+    cwd: str | None = None,
+    shell: bool = False,
+    timeout: float | None = None,
+    idle_timeout: float | None = None,
+    max_output_bytes: int = 1024 * 1024,
+    on_output: OutputCallback | None = None,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Asyncio counterpart of run_streaming."""
+    if shell:
+        assert isinstance(args, str)
+        process = await asyncio.create_subprocess_shell(
+            args,
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **process_group_kwargs(),
+            **kwargs,
+        )
+    else:
+        assert isinstance(args, list)
+        program, *program_args = args
+        process = await asyncio.create_subprocess_exec(
+            program,
+            *program_args,
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **process_group_kwargs(),
+            **kwargs,
+        )
+    buffers = {"stdout": OutputBuffer(max_output_bytes), "stderr": OutputBuffer(max_output_bytes)}
+    last_output = time.monotonic()
+
+    async def pump(name: str, stream: asyncio.StreamReader) -> None:
+        nonlocal last_output
+        while data := await stream.read(_CHUNK_SIZE):
+            last_output = time.monotonic()
+            buffers[name].write(data)
+            if on_output is not None:
+                on_output(name, data.decode(errors="replace"))
+
+    assert process.stdout is not None and process.stderr is not None
+    readers = asyncio.gather(pump("stdout", process.stdout), pump("stderr", process.stderr))
+
+    started = time.monotonic()
+    timed_out: str | None = None
+    wait_task = asyncio.ensure_future(process.wait())
+    while True:
+        await asyncio.wait({wait_task}, timeout=0.1)
+        if wait_task.done():
+            break
+        now = time.monotonic()
+        if timeout is not None and now - started > timeout:
+            timed_out = "wall"
+        elif idle_timeout is not None and now - last_output > idle_timeout:
+            timed_out = "idle"
+        if timed_out:
+            kill_process_group(process)
+            await wait_task
+            break
+
+    with contextlib.suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(readers, timeout=1.0)
+    return _result(buffers["stdout"], buffers["stderr"], process.returncode, timed_out)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from typing import IO, Any
+
+from trainwreck.tools.process import OutputBuffer, OutputCallback, kill_process_group, process_group_kwargs
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class _StreamCollector:
+    """Accumulates one stream of a command's output until its end marker arrives."""
+
+    def __init__(self, name: str, start: bytes, end: bytes, buffer: OutputBuffer, on_output: OutputCallback | None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.buffer = buffer
+        self.on_output = on_output
+        self.pending = b""
+        self.done = False
+        self.status = b""
+
+    def feed(self, data: bytes) -> bytes:
+        """Consume data; return whatever follows the end marker (belongs to the next command)."""
+        self.pending += data
+        idx = self.pending.find(self.start)
+        if idx < 0:
+            # Hold back enough bytes to recognise a marker split across chunks
+            keep = len(self.start) + 32
+            self._emit(self.pending[:-keep] if len(self.pending) > keep else b"")
+            self.pending = self.pending[-keep:] if len(self.pending) > keep else self.pending
+            return b""
+        end = self.pending.find(self.end, idx + len(self.start))
+        if end < 0:
+            return b""
+        self._emit(self.pending[:idx])
+        self.status = self.pending[idx + len(self.start) : end]
+        rest = self.pending[end + len(self.end) :]
+        self.pending = b""
+        self.done = True
+        return rest
+
+    def flush(self) -> None:
+        """Emit everything held back, e.g. when the shell exits mid-command."""
+        self._emit(self.pending)
+        self.pending = b""
+
+    def _emit(self, data: bytes) -> None:
+        if not data:
+            return
+        self.buffer.write(data)
+        if self.on_output is not None:
+            self.on_output(self.name, data.decode(errors="replace"))
+
+
+class ShellSession:
+    """
+    A long-lived bash process that runs commands one after another.
+
+    Environment variables, the working directory, shell functions and
+    activated virtualenvs persist between commands. Each command is passed
+    through a quoted heredoc read by the `read` builtin and then `eval`, and is followed by sentinel lines
+    on stdout (carrying the exit code) and stderr that mark where its output
+    ends. If the shell exits or a command times out, the session is killed
+    and restarted on the next command.
+    """
+
+    def __init__(
+        self,
+        cwd: str | None = None,
+        shell: str | None = None,
+        max_output_bytes: int = 1024 * 1024,
+        on_output: OutputCallback | None = None,
+    ) -> None:
+        self.cwd = cwd
+        self.shell = shell or shutil.which("bash") or "bash"
+        self.max_output_bytes = max_output_bytes
+        self.on_output = on_output
+        self.process: subprocess.Popen[bytes] | None = None
+        self._chunks: queue.Queue[tuple[str, bytes]] = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen[bytes]:
+        process = subprocess.Popen(
+            [self.shell],
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **process_group_kwargs(),
+        )
+        # A fresh queue, so output from a killed shell cannot leak into the new one
+        self._chunks = queue.Queue()
+        for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr)):
+            threading.Thread(target=self._pump, args=(name, pipe, self._chunks), daemon=True).start()
+        self.process = process
+        return process
+
+    @staticmethod
+    def _pump(name: str, pipe: IO[bytes], chunks: queue.Queue[tuple[str, bytes]]) -> None:
+        for data in iter(lambda: pipe.read1(_CHUNK_SIZE), b""):  # type: ignore[attr-defined]
+            chunks.put((name, data))
+        chunks.put((name, b""))  # EOF
+
+    def run(
+        self,
+        command: str,
+        timeout: float | None = None,
+        idle_timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Run a command in the session and return the same shape as run_streaming."""
+        with self._lock:
+            process = self.process
+            if process is None or process.poll() is not None:
+                process = self._start()
+            assert process.stdin is not None
+
+            sentinel = f"__TRAINWRECK_{uuid.uuid4().hex}__"
+            script = (
+                f"IFS= read -r -d '' __tw_cmd <<'{sentinel}'\n{command}\n{sentinel}\n"
+                f'eval "$__tw_cmd" </dev/null\n'
+                f"printf '\\n{sentinel}:%d:{sentinel}\\n' $?\n"
+                f"printf '\\n{sentinel}:0:{sentinel}\\n' >&2\n"
+            )
+            start = f"\n{sentinel}:".encode()
+            end = f":{sentinel}\n".encode()
+            buffers = {"stdout": OutputBuffer(self.max_output_bytes), "stderr": OutputBuffer(self.max_output_bytes)}
+            collectors = {
+                name: _StreamCollector(name, start, end, buffers[name], self.on_output) for name in ("stdout", "stderr")
+            }
+
+            try:
+                process.stdin.write(script.encode())
+                process.stdin.flush()
+            except BrokenPipeError:
+                self.close()
+                return self._finish(buffers, None, None, exited=True)
+
+            started = last_output = time.monotonic()
+            while not all(c.done for c in collectors.values()):
+                try:
+                    name, data = self._chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+                else:
+                    if data == b"":
+                        # The shell exited (e.g. the command ran `exit`)
+                        for collector in collectors.values():
+                            collector.flush()
+                        returncode = process.wait()
+                        self.process = None
+                        return self._finish(buffers, returncode, None, exited=True)
+                    last_output = time.monotonic()
+                    collectors[name].feed(data)
+
+                now = time.monotonic()
+                timed_out = None
+                if timeout is not None and now - started > timeout:
+                    timed_out = "wall"
+                elif idle_timeout is not None and now - last_output > idle_timeout:
+                    timed_out = "idle"
+                if timed_out:
+                    self.close()
+                    return self._finish(buffers, -9, timed_out, exited=True)
+
+            status = collectors["stdout"].status.decode(errors="replace")
+            return self._finish(buffers, int(status) if status.lstrip("-").isdigit() else None, None)
+
+    @staticmethod
+    def _finish(
+        buffers: dict[str, OutputBuffer], returncode: int | None, timed_out: str | None, exited: bool = False
+    ) -> dict[str, Any]:
+        return {
+            "stdout": buffers["stdout"].getvalue(),
+            "stderr": buffers["stderr"].getvalue(),
+            "returncode": returncode,
+            "timed_out": timed_out,
+            "truncated": buffers["stdout"].truncated or buffers["stderr"].truncated,
+            "stdout_bytes": buffers["stdout"].total,
+            "stderr_bytes": buffers["stderr"].total,
+            "session_restarted": exited,
+        }
+
+    def close(self) -> None:
+        """Kill the shell and everything it started."""
+        if self.process is not None:
+            kill_process_group(self.process)
+            self.process.wait()
+            self.process = None
@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+# Long attribute values (commands, descriptions) are clipped to keep traces small
+_MAX_ATTRIBUTE_CHARS = 300
+
+TRACE_DIR_NAME = ".trainwreck-traces"
+
+
+def _clip(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > _MAX_ATTRIBUTE_CHARS:
+        return value[: _MAX_ATTRIBUTE_CHARS - 3] + "..."
+    return value
+
+
+class Span:
+    """One timed operation in a trace, with scalar attributes."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "_started")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes: dict[str, Any] = {}
+        self.error: str | None = None
+        self.end_ns: int | None = None
+        self.set(**attributes)
+        self.start_ns = time.time_ns()
+        # Durations come from the monotonic clock; only the start is wall time
+        self._started = time.perf_counter_ns()
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes; None values are skipped."""
+        for key, value in attributes.items():
+            if value is not None:
+                self.attributes[key] = _clip(value)
+
+    def fail(self, error: BaseException | str) -> None:
+        """Mark the span as failed."""
+        self.error = _clip(str(error) or type(error).__name__)
+
+    def end(self) -> None:
+        """Finish the span and hand it to the exporter (once)."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._started
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan(Span):
+    """Stands in for a span outside any trace, or while tracing is off."""
+
+    def __init__(self) -> None:
+        self.name = ""
+        self.attributes = {}
+
+    def set(self, **attributes: Any) -> None:
+        del attributes
+
+    def fail(self, error: BaseException | str) -> None:
+        del error
+
+    def end(self) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("trainwreck_span", default=None)
+
+
+class SpanExporter(ABC):
+    """Receives every span as it ends; spans of one trace may end on different threads."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """Record one finished span."""
+        ...
+
+    def flush(self) -> None:
+        """Write out anything buffered."""
+        return None
+
+    def close(self) -> None:
+        self.flush()
+
+
+class JSONFileExporter(SpanExporter):
+    """
+    Appends each span as a JSON line to `<directory>/<trace_id>.jsonl`. A
+    run's trace id is its run id, so `trainwreck trace show` can find it.
+    The directory ignores itself, so traces are never committed by accident.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if not self._ready:
+                self._make_directory()
+                self._ready = True
+            # Opened per span, so a run that is killed still leaves every finished span on disk
+            with open(self.directory / f"{span.trace_id}.jsonl", "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _make_directory(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        gitignore = self.directory / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text("*\n")
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter(SpanExporter):
+    """
+    Sends spans to an OpenTelemetry collector with OTLP/HTTP in its JSON
+    encoding, batching `batch_size` spans per request. Configured by the
+    standard OTEL_EXPORTER_OTLP_(TRACES_)ENDPOINT, OTEL_EXPORTER_OTLP_HEADERS
+    and OTEL_SERVICE_NAME variables.
+    """
+
+    def __init__(
+        self, endpoint: str | None = None, headers: dict[str, str] | None = None, batch_size: int = 256
+    ) -> None:
+        if endpoint is None:
+            endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") or (
+                os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/") + "/v1/traces"
+            )
+        if headers is None:
+            headers = {}
+            for pair in os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "").split(","):
+                if "=" in pair:
+                    key, value = pair.split("=", 1)
+                    headers[key.strip()] = value.strip()
+        self.endpoint = endpoint
+        self.service_name = os.getenv("OTEL_SERVICE_NAME", "trainwreck")
+        self.batch_size = batch_size
+        self._client = httpx.Client(headers=headers, timeout=10.0)
+        self._buffer: list[Span] = []
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= self.batch_size
+        if full or span.parent_id is None:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+        try:
+            self._client.post(self.endpoint, json=self._payload(spans)).raise_for_status()
+        except httpx.HTTPError as e:
+            if not self._warned:
+                print(f"Warning: Failed to export traces to {self.endpoint}: {e}")
+                self._warned = True
+
+    def close(self) -> None:
+        self.flush()
+        self._client.close()
+
+    def _payload(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                    "scopeSpans": [{"scope": {"name": "trainwreck"}, "spans": [self._span(s) for s in spans]}],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _span(span: Span) -> dict[str, Any]:
+        encoded: dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            # STATUS_CODE_ERROR or STATUS_CODE_OK
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+
+TRACE_EXPORTERS = ("json", "otlp", "none")
+
+_exporter: SpanExporter | None = None
+
+
+def make_exporter(kind: str | None, repo_path: Path) -> SpanExporter | None:
+    """
+    Create an exporter by name, falling back to the TRAINWRECK_TRACE_EXPORTER
+    env var and then to "json" (files under `repo_path`). "none" disables tracing.
+    """
+    default_kind: str = os.getenv("TRAINWRECK_TRACE_EXPORTER", "json")
+    kind = (kind or default_kind).lower()
+    if kind == "json":
+        return JSONFileExporter(repo_path / TRACE_DIR_NAME)
+    if kind == "otlp":
+        return OTLPExporter()
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown trace exporter: {kind}, expected one of {', '.join(TRACE_EXPORTERS)}")
+
+
+def configure(exporter: SpanExporter | None) -> None:
+    """Send spans to `exporter` from now on (None turns tracing off), closing the previous one."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.close()
+
+
+def shutdown() -> None:
+    """Flush and close the exporter and turn tracing off."""
+    configure(None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            span.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+@contextmanager
+def trace(name: str, trace_id: str | None = None, **attributes: Any) -> Iterator[Span]:
+    """Start a new trace rooted at a span called `name`; `trace_id` defaults to a random one."""
+    if _exporter is None:
+        yield _NOOP
+        return
+    with _activate(Span(name, trace_id or uuid.uuid4().hex, None, attributes)) as span:
+        yield span
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Time the block as a child of the current span. Outside a trace (or with
+    tracing off) this yields a span that records nothing.
+    """
+    parent = _current.get()
+    if parent is None or _exporter is None:
+        yield _NOOP
+        return
+    with _activate(Span(name, parent.trace_id, parent.span_id, attributes)) as child:
+        yield child
+
+
+def start_span(name: str, **attributes: Any) -> Span:
+    """
+    A child of the current span that does not become current itself, for
+    work that outlives a `with` block (e.g. a stream being consumed). The
+    caller must call `end()`.
+    """
+    parent = _current.get()
+    if parent is None or _exporter is None:
+        return _NOOP
+    return Span(name, parent.trace_id, parent.span_id, attributes)
+
+
+def load_trace(directory: Path, run_id: str) -> list[dict[str, Any]]:
+    """The spans recorded for a run (a unique prefix of its id is enough), in start order."""
+    path = directory / f"{run_id}.jsonl"
+    if not path.exists():
+        matches = sorted(directory.glob(f"{run_id}*.jsonl")) if directory.is_dir() else []
+        if len(matches) != 1:
+            reason = "matches several runs" if matches else "has no trace"
+            raise LookupError(f"Run {run_id} {reason} in {directory}")
+        path = matches[0]
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                spans.append(json.loads(line))
+    spans.sort(key=lambda s: s["start_ns"])
+    return spans
+
+
+# Attributes worth showing next to a span's name in `trace show`
+_SUMMARY_ATTRIBUTES = ("action", "provider", "method", "server", "tool", "operation", "command", "returncode")
+
+
+def _seconds(ns: float) -> str:
+    seconds = ns / 1e9
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    return f"{seconds * 1000:.1f}ms"
+
+
+def format_trace(spans: list[dict[str, Any]], width: int = 40, min_ms: float = 0.0) -> list[str]:
+    """
+    Render a trace as a timeline: one line per span, indented under its
+    parent, with a bar placed where it ran within the trace; spans shorter
+    than `min_ms` are hidden. Then a table of where the time went, by span
+    name, counting each span's own time (excluding its children).
+    """
+    if not spans:
+        return ["(empty trace)"]
+    by_id = {s["span_id"]: s for s in spans}
+    children: dict[str | None, list[dict[str, Any]]] = defaultdict(list)
+    for s in spans:
+        parent = s["parent_id"] if s["parent_id"] in by_id else None
+        children[parent].append(s)
+
+    trace_start = min(s["start_ns"] for s in spans)
+    trace_end = max(s["end_ns"] for s in spans)
+    total = max(trace_end - trace_start, 1)
+    lines = [f"Trace {spans[0]['trace_id']}: {len(spans)} spans over {_seconds(total)}", ""]
+
+    def render(s: dict[str, Any], depth: int) -> None:
+        duration = s["end_ns"] - s["start_ns"]
+        if duration / 1e6 >= min_ms:
+            offset = int((s["start_ns"] - trace_start) / total * width)
+            length = max(1, round(duration / total * width))
+            bar = (" " * offset + "█" * length)[:width]
+            details = [f"{key}={s['attributes'][key]}" for key in _SUMMARY_ATTRIBUTES if key in s["attributes"]]
+            label = "  " * depth + s["name"] + (f" [{', '.join(details)}]" if details else "")
+            if s.get("error"):
+                label += f" ✗ {s['error']}"
+            lines.append(f"{bar:<{width}} {_seconds(duration):>9}  {label}")
+        for child in children[s["span_id"]]:
+            render(child, depth + 1)
+
+    for root in children[None]:
+        render(root, 0)
+
+    own: dict[str, float] = defaultdict(float)
+    counts: dict[str, int] = defaultdict(int)
+    for s in spans:
+        duration = s["end_ns"] - s["start_ns"]
+        # Children may overlap (parallel steps), so never go below zero
+        covered = sum(c["end_ns"] - c["start_ns"] for c in children[s["span_id"]])
+        own[s["name"]] += max(duration - covered, 0)
+        counts[s["name"]] += 1
+    lines += ["", f"{'span':<16} {'self time':>10} {'share':>6} {'count':>6}"]
+    for name, ns in sorted(own.items(), key=lambda item: -item[1]):
+        lines.append(f"{name:<16} {_seconds(ns):>10} {ns / total:>6.0%} {counts[name]:>6}")
+    return lines
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import gzip
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from trainwreck.cassette import (
+    Cassette,
+    CassetteMiss,
+    RecordingLLMClient,
+    ReplayLLMClient,
+    record_executor,
+    replay_executor,
+)
+from trainwreck.llm.base import LLMClient
+
+
+class EchoLLM(LLMClient):
+    """Answers with the call count so each response is distinct."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def complete(self, prompt: str, **kwargs: Any) -> str:
+        self.calls += 1
+        return f"{prompt} #{self.calls}"
+
+    def chat(self, messages: list[dict[str, str]], **kwargs: Any) -> str:
+        return self.complete(messages[-1]["content"])
+
+    def stream_chat(self, messages: list[dict[str, str]], **kwargs: Any) -> Iterator[str]:
+        yield from ("one ", "two ", "three")
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(text))] for text in texts]
+
+
+class FakeGit:
+    def head(self) -> str:
+        return "abc123"
+
+
+class FakeExecutor:
+    def __init__(self, repo_path: Path) -> None:
+        self.repo_path = repo_path
+        self.git = FakeGit()
+        self.closed = False
+
+    def execute_step(self, plan: dict[str, Any]) -> dict[str, Any]:
+        return {"success": True, "stdout": plan["command"]}
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _messages(content: str) -> list[dict[str, str]]:
+    return [{"role": "user", "content": content}]
+
+
+def _record(path: Path, calls: list[str], **meta: Any) -> list[str]:
+    cassette = Cassette(path, "record")
+    cassette.meta.update(meta)
+    llm = RecordingLLMClient(EchoLLM(), cassette)
+    responses = [llm.chat(_messages(content), temperature=0.2) for content in calls]
+    cassette.save()
+    return responses
+
+
+def test_replay_returns_recorded_responses(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    cassette = Cassette(path, "record")
+    cassette.meta["goal"] = "demo"
+    llm = RecordingLLMClient(EchoLLM(), cassette)
+    chat = llm.chat(_messages("plan"), temperature=0.2)
+    completion = llm.complete("summarize")
+    vectors = llm.embed(["abc"])
+    stream = list(llm.stream_chat(_messages("plan")))
+    cassette.save()
+
+    replayed = Cassette(path)
+    client = ReplayLLMClient(replayed)
+    assert replayed.meta == {"goal": "demo"}
+    assert client.chat(_messages("plan"), temperature=0.2) == chat
+    assert client.complete("summarize") == completion
+    assert client.embed(["abc"]) == vectors
+    assert list(client.stream_chat(_messages("plan"))) == stream
+    assert (replayed.hits, replayed.misses) == (4, 0)
+
+
+def test_matching_requests_are_replayed_out_of_order(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    first, second = _record(path, ["first", "second"])
+
+    client = ReplayLLMClient(Cassette(path))
+    assert client.chat(_messages("second"), temperature=0.2) == second
+    assert client.chat(_messages("first"), temperature=0.2) == first
+
+
+def test_unmatched_requests_fall_back_to_recording_order(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    first, second, third = _record(path, ["a", "b", "c"])
+
+    cassette = Cassette(path)
+    client = ReplayLLMClient(cassette)
+    assert client.chat(_messages("b"), temperature=0.2) == second
+    assert client.chat(_messages("changed"), temperature=0.2) == first
+    assert client.chat(_messages("changed again"), temperature=0.2) == third
+    assert (cassette.hits, cassette.misses) == (1, 2)
+    with pytest.raises(CassetteMiss, match="have been replayed"):
+        client.chat(_messages("a"), temperature=0.2)
+
+
+def test_strict_replay_rejects_unrecorded_requests(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    _record(path, ["a"])
+
+    client = ReplayLLMClient(Cassette(path, strict=True))
+    with pytest.raises(CassetteMiss, match="matches"):
+        client.chat(_messages("a"), temperature=0.9)
+    with pytest.raises(CassetteMiss, match="No llm.complete"):
+        client.complete("a")
+
+
+def test_cycle_restarts_a_short_recording(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    responses = _record(path, ["a", "b"])
+
+    cassette = Cassette(path, cycle=True)
+    client = ReplayLLMClient(cassette)
+    replayed = [client.chat(_messages("a"), temperature=0.2) for _ in range(5)]
+    assert replayed == [responses[0], responses[1], responses[0], responses[1], responses[0]]
+    assert (cassette.hits, cassette.misses) == (3, 2)
+
+
+def test_replayed_responses_are_independent_copies(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    cassette = Cassette(path, "record")
+    RecordingLLMClient(EchoLLM(), cassette).embed(["abc"])
+    cassette.save()
+
+    client = ReplayLLMClient(Cassette(path, cycle=True))
+    client.embed(["abc"])[0].append(99.0)
+    assert client.embed(["abc"]) == [[3.0]]
+
+
+def test_stream_records_only_the_chunks_consumed(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    cassette = Cassette(path, "record")
+    stream = RecordingLLMClient(EchoLLM(), cassette).stream_chat(_messages("plan"))
+    assert next(stream) == "one "
+    stream.close()
+    cassette.save()
+
+    assert list(ReplayLLMClient(Cassette(path)).stream_chat(_messages("plan"))) == ["one "]
+
+
+def test_executor_and_git_calls_replay(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    cassette = Cassette(path, "record")
+    executor = FakeExecutor(tmp_path)
+    recording = record_executor(executor, cassette)
+    result = recording.execute_step({"command": "make"})
+    head = recording.git.head()
+    recording.close()
+    assert executor.closed
+    cassette.save()
+
+    replay = replay_executor(Cassette(path))
+    assert replay.repo_path == tmp_path
+    assert replay.execute_step({"command": "make"}) == result
+    assert replay.git.head() == head
+    assert replay.close() is None
+
+
+def test_cassette_modes_and_versions(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="mode"):
+        Cassette(tmp_path / "run.jsonl.gz", "rewind")
+    with pytest.raises(FileNotFoundError):
+        Cassette(tmp_path / "missing.jsonl.gz")
+
+    path = tmp_path / "nested" / "run.jsonl.gz"
+    _record(path, [], goal="demo")
+    Cassette(path).save()  # replay mode never rewrites the file
+    assert Cassette(path).meta == {"goal": "demo"}
+
+    future = tmp_path / "future.jsonl.gz"
+    with gzip.open(future, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"version": 99}) + "\n")
+    with pytest.raises(ValueError, match="version"):
+        Cassette(future)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from git import Repo
+
+from trainwreck.agent.executor import AsyncExecutor, Executor
+from trainwreck.agent.step_plan import StepPlan
+
+
+def _batch(*steps: dict[str, Any]) -> StepPlan:
+    return StepPlan.from_dict({"action": "batch", "description": "batch", "steps": list(steps)})
+
+
+def _bash(step_id: str | None, command: str, depends_on: list[str] | None = None) -> dict[str, Any]:
+    step: dict[str, Any] = {"action": "bash", "description": command, "command": command}
+    if step_id is not None:
+        step["id"] = step_id
+    if depends_on is not None:
+        step["depends_on"] = depends_on
+    return step
+
+
+def _results(result: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    return {entry["id"]: entry["result"] for entry in result["steps"]}
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    Repo.init(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def executor(repo: Path) -> Executor:
+    return Executor(repo, max_parallel_steps=4)
+
+
+def test_independent_steps_run_concurrently(executor: Executor) -> None:
+    started = time.monotonic()
+    result = executor.execute(_batch(*(_bash(None, "sleep 0.5") for _ in range(3))))
+    assert time.monotonic() - started < 1.2
+    assert (result["succeeded"], result["failed"]) == (3, 0)
+    assert [entry["id"] for entry in result["steps"]] == ["1", "2", "3"]
+
+
+def test_steps_wait_for_their_dependencies(executor: Executor) -> None:
+    result = executor.execute(
+        _batch(
+            _bash("read", "cat out.txt", depends_on=["write"]),
+            _bash("write", "sleep 0.2; echo done > out.txt"),
+        )
+    )
+    results = _results(result)
+    assert results["read"]["stdout"].strip() == "done"
+    # Entries keep the order the plan listed them in
+    assert [entry["id"] for entry in result["steps"]] == ["read", "write"]
+
+
+def test_failed_dependency_skips_dependents(executor: Executor) -> None:
+    result = executor.execute(
+        _batch(
+            _bash("a", "exit 1"),
+            _bash("b", "echo b", depends_on=["a"]),
+            _bash("c", "echo c", depends_on=["b"]),
+            _bash("d", "echo d"),
+        )
+    )
+    results = _results(result)
+    assert results["b"]["error"] == "Skipped: dependency 'a' failed"
+    assert results["c"]["error"] == "Skipped: dependency 'b' failed"
+    assert results["d"]["stdout"].strip() == "d"
+    assert (result["succeeded"], result["failed"]) == (1, 3)
+
+
+def test_invalid_steps_get_error_results(executor: Executor) -> None:
+    result = executor.execute(
+        _batch(
+            _bash("a", "echo a", depends_on=["missing"]),
+            _bash("b", "echo b", depends_on=["c"]),
+            _bash("c", "echo c", depends_on=["b"]),
+            _bash("d", "echo d"),
+            _bash("d", "echo again"),
+            {"action": "batch", "description": "nested", "id": "e", "steps": []},
+        )
+    )
+    results = _results(result)
+    assert results["a"]["error"] == "Unknown dependency 'missing'"
+    assert results["b"]["error"] == "Circular dependency"
+    assert results["c"]["error"] == "Circular dependency"
+    assert results["d"]["stdout"].strip() == "d"
+    assert results["d#5"]["error"] == "Duplicate step id 'd'"
+    assert results["e"]["error"] == "Nested batches are not supported"
+
+
+def test_empty_batch(executor: Executor) -> None:
+    assert executor.execute(_batch())["error"] == "Batch has no steps"
+
+
+def test_parallelism_is_bounded(repo: Path) -> None:
+    executor = Executor(repo, max_parallel_steps=1)
+    started = time.monotonic()
+    executor.execute(_batch(_bash(None, "sleep 0.3"), _bash(None, "sleep 0.3")))
+    assert time.monotonic() - started >= 0.6
+
+
+@pytest.mark.asyncio
+async def test_async_batch_schedules_the_same_graph(repo: Path) -> None:
+    executor = AsyncExecutor(repo, max_parallel_steps=4)
+    started = time.monotonic()
+    result = await executor.aexecute(
+        _batch(
+            _bash("slow", "sleep 0.5"),
+            _bash("write", "sleep 0.2; echo done > out.txt"),
+            _bash("read", "cat out.txt", depends_on=["write"]),
+            _bash("fail", "exit 3"),
+            _bash("skipped", "echo never", depends_on=["fail"]),
+        )
+    )
+    assert time.monotonic() - started < 1.0
+    results = _results(result)
+    assert results["read"]["stdout"].strip() == "done"
+    assert results["skipped"]["error"] == "Skipped: dependency 'fail' failed"
+    assert (result["succeeded"], result["failed"]) == (3, 2)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from trainwreck.tools.mcp import AsyncMCPClient, AsyncMCPServerConnection, MCPClient, MCPServerConnection
+
+# Answers each request on its own thread so slow calls overlap, and remembers cancellations
+SERVER = """
+import json
+import sys
+import threading
+import time
+
+lock = threading.Lock()
+cancelled = []
+
+
+def reply(request, result):
+    with lock:
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}) + "\\n")
+        sys.stdout.flush()
+
+
+def handle(request):
+    if request["method"] == "tools/list":
+        names = ("echo", "sleep", "cancelled", "exit")
+        reply(request, {"tools": [{"name": name, "description": name} for name in names]})
+        return
+    name = request["params"]["name"]
+    arguments = request["params"].get("arguments", {})
+    if name == "sleep":
+        time.sleep(arguments["seconds"])
+    text = json.dumps(cancelled if name == "cancelled" else arguments)
+    reply(request, {"content": [{"type": "text", "text": text}]})
+
+
+for line in sys.stdin:
+    message = json.loads(line)
+    if message.get("method") == "notifications/cancelled":
+        cancelled.append(message["params"]["requestId"])
+    elif "id" in message:
+        if message["method"] == "tools/call" and message["params"]["name"] == "exit":
+            break
+        threading.Thread(target=handle, args=(message,), daemon=True).start()
+"""
+
+
+@pytest.fixture
+def command(tmp_path: Path) -> list[str]:
+    script = tmp_path / "server.py"
+    script.write_text(SERVER)
+    return [sys.executable, str(script)]
+
+
+def _text(response: dict) -> str:
+    return response["result"]["content"][0]["text"]
+
+
+def test_requests_from_several_threads_are_multiplexed(command: list[str]) -> None:
+    server = MCPServerConnection("test", command)
+    try:
+        finished: list[str] = []
+
+        def call(name: str, arguments: dict) -> None:
+            server.call_tool(name, arguments)
+            finished.append(name)
+
+        slow = threading.Thread(target=call, args=("sleep", {"seconds": 1.0}))
+        slow.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        assert _text(server.call_tool("echo", {"value": 1})) == '{"value": 1}'
+        assert time.monotonic() - started < 0.9
+        slow.join()
+        assert finished == ["sleep"]
+    finally:
+        server.close()
+
+
+def test_timeout_cancels_the_request_on_the_server(command: list[str]) -> None:
+    server = MCPServerConnection("test", command)
+    try:
+        server.list_tools()
+        with pytest.raises(TimeoutError):
+            server.call_tool("sleep", {"seconds": 5}, timeout=0.2)
+        assert not server._pending
+        assert _text(server.call_tool("cancelled", {})) == "[2]"
+    finally:
+        server.close()
+
+
+def test_lazy_connection_spawns_on_first_request_and_after_stop(command: list[str]) -> None:
+    server = MCPServerConnection("test", command, lazy=True)
+    try:
+        assert not server.running
+        assert [tool["name"] for tool in server.list_tools()][0] == "echo"
+        assert server.running
+        server.stop()
+        assert not server.running
+        assert _text(server.call_tool("echo", {})) == "{}"
+        assert server.running
+    finally:
+        server.close()
+    with pytest.raises(ConnectionError):
+        server.submit("tools/list")
+
+
+def test_pending_requests_fail_when_the_server_exits(command: list[str]) -> None:
+    server = MCPServerConnection("test", command)
+    try:
+        _, pending = server.submit("tools/call", {"name": "sleep", "arguments": {"seconds": 5}})
+        with pytest.raises(ConnectionError):
+            server.call_tool("exit", {}, timeout=5)
+        with pytest.raises(ConnectionError):
+            pending.result(timeout=5)
+    finally:
+        server.close()
+
+
+def test_client_routes_tools_and_reports_errors(command: list[str]) -> None:
+    client = MCPClient(timeout=5)
+    try:
+        client.add_server("test", command)
+        assert client.tool_to_server["sleep"] == "test"
+        assert _text(client.call_tool("echo", {"a": "b"})) == '{"a": "b"}'
+        assert "not found" in client.call_tool("missing", {})["error"]
+        assert "timed out" in client.call_tool("sleep", {"seconds": 5}, timeout=0.2)["error"]
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_requests_are_multiplexed(command: list[str]) -> None:
+    server = AsyncMCPServerConnection("test", command)
+    await server.start()
+    try:
+        started = time.monotonic()
+        responses = await asyncio.gather(*(server.call_tool("sleep", {"seconds": 0.5, "n": n}) for n in range(4)))
+        assert time.monotonic() - started < 1.5
+        assert [_text(response) for response in responses] == [f'{{"seconds": 0.5, "n": {n}}}' for n in range(4)]
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_async_cancellation_notifies_the_server(command: list[str]) -> None:
+    server = AsyncMCPServerConnection("test", command)
+    await server.start()
+    try:
+        call = asyncio.create_task(server.call_tool("sleep", {"seconds": 5}))
+        await asyncio.sleep(0.1)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        with pytest.raises(asyncio.TimeoutError):
+            await server.call_tool("sleep", {"seconds": 5}, timeout=0.2)
+        assert not server._pending
+        assert _text(await server.call_tool("cancelled", {})) == "[1, 2]"
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_async_client_routes_tools_and_reports_timeouts(command: list[str]) -> None:
+    client = AsyncMCPClient(timeout=5)
+    try:
+        await client.add_server("test", command)
+        assert _text(await client.call_tool("echo", {"a": 1})) == '{"a": 1}'
+        assert "not found" in (await client.call_tool("missing", {}))["error"]
+        assert "timed out" in (await client.call_tool("sleep", {"seconds": 5}, timeout=0.2))["error"]
+    finally:
+        await client.close()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from trainwreck.tools.process import OutputBuffer, arun_streaming, run_streaming
+
+
+def _python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_output_buffer_keeps_everything_under_the_limit() -> None:
+    buffer = OutputBuffer(10)
+    buffer.write(b"abc")
+    buffer.write(b"de")
+    assert buffer.getvalue() == "abcde"
+    assert not buffer.truncated
+
+
+def test_output_buffer_keeps_head_and_tail() -> None:
+    buffer = OutputBuffer(10)
+    buffer.write(b"abcde")
+    buffer.write(b"0123456")
+    assert buffer.truncated
+    assert buffer.tail_size == 5
+    assert buffer.getvalue() == "abcde\n... [2 bytes omitted] ...\n23456"
+
+
+def test_output_buffer_trims_across_many_chunks() -> None:
+    buffer = OutputBuffer(8)
+    for chunk in (b"head", b"xx", b"yyy", b"z", b"tail"):
+        buffer.write(chunk)
+    assert buffer.total == 14
+    assert buffer.tail_size == 4
+    assert buffer.getvalue().endswith("tail")
+    assert "[6 bytes omitted]" in buffer.getvalue()
+
+
+def test_output_buffer_with_zero_limit() -> None:
+    buffer = OutputBuffer(0)
+    buffer.write(b"abc")
+    assert buffer.truncated
+    assert buffer.getvalue() == "\n... [3 bytes omitted] ...\n"
+
+
+def test_run_streaming_captures_both_streams() -> None:
+    result = run_streaming(_python("import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"))
+    assert result["stdout"].strip() == "out"
+    assert result["stderr"].strip() == "err"
+    assert result["returncode"] == 3
+    assert result["timed_out"] is None
+    assert not result["truncated"]
+
+
+def test_run_streaming_bounds_output() -> None:
+    result = run_streaming(_python("print('x' * 10000)"), max_output_bytes=100)
+    assert result["truncated"]
+    assert result["stdout_bytes"] == 10001
+    assert len(result["stdout"]) < 200
+
+
+def test_run_streaming_reports_output_as_it_arrives() -> None:
+    chunks: list[tuple[str, str]] = []
+    run_streaming(_python("print('hello')"), on_output=lambda name, text: chunks.append((name, text)))
+    assert "".join(text for name, text in chunks if name == "stdout").strip() == "hello"
+
+
+def test_run_streaming_wall_timeout() -> None:
+    result = run_streaming(_python("import time; time.sleep(30)"), timeout=0.5)
+    assert result["timed_out"] == "wall"
+    assert result["returncode"] != 0
+
+
+def test_run_streaming_idle_timeout() -> None:
+    code = "import time; print('started', flush=True); time.sleep(30)"
+    result = run_streaming(_python(code), idle_timeout=0.5, timeout=20)
+    assert result["timed_out"] == "idle"
+    assert result["stdout"].strip() == "started"
+
+
+@pytest.mark.asyncio
+async def test_arun_streaming_matches_run_streaming() -> None:
+    result = await arun_streaming(_python("import sys; print('out'); sys.exit(2)"))
+    assert result["stdout"].strip() == "out"
+    assert result["returncode"] == 2
+    assert result["timed_out"] is None
+
+
+@pytest.mark.asyncio
+async def test_arun_streaming_shell_and_timeout() -> None:
+    result = await arun_streaming("echo hi", shell=True)
+    assert result["stdout"].strip() == "hi"
+
+    result = await arun_streaming(_python("import time; time.sleep(30)"), timeout=0.5)
+    assert result["timed_out"] == "wall"
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from trainwreck.memory.recorder import MemoryRecorder
+from trainwreck.memory.sqlite_store import SQLiteMemoryStore
+
+
+def _step(iteration: int, run_id: str) -> dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "iteration": iteration,
+        "plan": {"action": "bash"},
+        "result": {"stdout": "ok"},
+        "reflection": {},
+        "score": 1.0,
+        "description": f"step {iteration}",
+        "outcome": "ok",
+    }
+
+
+class GatedStore(SQLiteMemoryStore):
+    """Holds the first step write until `gate` is set."""
+
+    def __init__(self, db_path: Path, gate: threading.Event) -> None:
+        super().__init__(db_path)
+        self.gate = gate
+
+    def add_step(self, step: dict[str, Any]) -> None:
+        self.gate.wait()
+        super().add_step(step)
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "memory.db"
+
+
+def test_writes_are_applied_in_order_off_the_calling_thread(db_path: Path) -> None:
+    threads: list[str] = []
+
+    def open_store() -> SQLiteMemoryStore:
+        threads.append(threading.current_thread().name)
+        return SQLiteMemoryStore(db_path)
+
+    recorder = MemoryRecorder(open_store)
+    run_id = recorder.start_run("goal", repo="/repo")
+    for iteration in (1, 2):
+        recorder.add_step(_step(iteration, run_id))
+    recorder.save_checkpoint(run_id, 2, {"plan": None, "head": "abc"})
+    recorder.finish_run(run_id, "achieved", 2)
+    assert recorder.flush(timeout=10)
+    recorder.close()
+    assert threads == ["trainwreck-recorder"]
+
+    store = SQLiteMemoryStore(db_path)
+    try:
+        checkpoint = store.load_checkpoint(run_id)
+        assert checkpoint is not None
+        assert (checkpoint["status"], checkpoint["iterations"], checkpoint["head"]) == ("achieved", 2, "abc")
+        assert [step["iteration"] for step in checkpoint["history"]] == [1, 2]
+        assert all(step["timestamp"] for step in checkpoint["history"])
+    finally:
+        store.close()
+
+
+def test_close_writes_everything_queued(db_path: Path) -> None:
+    recorder = MemoryRecorder(lambda: SQLiteMemoryStore(db_path, batch_size=100, flush_interval=60))
+    run_id = recorder.start_run("goal")
+    recorder.add_step(_step(1, run_id))
+    recorder.close()
+    recorder.close()
+    assert recorder.flush()
+    with pytest.raises(RuntimeError, match="closed"):
+        recorder.add_step(_step(2, run_id))
+
+    store = SQLiteMemoryStore(db_path)
+    try:
+        assert len(store.get_history(run_id=run_id)) == 1
+    finally:
+        store.close()
+
+
+def test_a_failing_store_factory_raises_in_the_caller() -> None:
+    def open_store() -> SQLiteMemoryStore:
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        MemoryRecorder(open_store)
+
+
+def test_a_failed_write_does_not_stop_the_recorder(db_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    recorder = MemoryRecorder(lambda: SQLiteMemoryStore(db_path))
+    try:
+        run_id = recorder.start_run("goal")
+        recorder.save_checkpoint(run_id, 0, {"unserializable": object()})
+        recorder.add_step(_step(1, run_id))
+        assert recorder.flush(timeout=10)
+    finally:
+        recorder.close()
+    assert "Failed to record step history (save_checkpoint)" in capsys.readouterr().out
+
+    store = SQLiteMemoryStore(db_path)
+    try:
+        assert len(store.get_history(run_id=run_id)) == 1
+    finally:
+        store.close()
+
+
+def test_a_full_queue_blocks_instead_of_dropping_steps(db_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    gate = threading.Event()
+    recorder = MemoryRecorder(lambda: GatedStore(db_path, gate), max_queue=1)
+    try:
+        run_id = recorder.start_run("goal")
+        timer = threading.Timer(0.3, gate.set)
+        timer.start()
+        for iteration in range(1, 5):
+            recorder.add_step(_step(iteration, run_id))
+        assert gate.is_set()
+        assert recorder.flush(timeout=10)
+        timer.join()
+    finally:
+        recorder.close()
+    assert "writes behind" in capsys.readouterr().out
+
+    store = SQLiteMemoryStore(db_path)
+    try:
+        assert len(store.get_history(run_id=run_id)) == 4
+    finally:
+        store.close()
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from trainwreck.memory.sqlite_store import _MIGRATIONS, SQLiteMemoryStore
+
+
+def _step(iteration: int, action: str = "bash", score: float = 1.0, **extra: Any) -> dict[str, Any]:
+    return {
+        "iteration": iteration,
+        "plan": {"action": action, "description": f"step {iteration}"},
+        "result": {"stdout": f"output {iteration}"},
+        "reflection": {"score": score},
+        "score": score,
+        "description": f"step {iteration}",
+        "outcome": "ok",
+        **extra,
+    }
+
+
+def _count_steps(db_path: Path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        count: int = conn.execute("SELECT COUNT(*) FROM steps").fetchone()[0]
+    return count
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "memory.db"
+
+
+def test_new_database_uses_wal_and_latest_schema(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path, synchronous="full")
+    try:
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert store.conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+        assert store.conn.execute("PRAGMA user_version").fetchone()[0] == len(_MIGRATIONS)
+    finally:
+        store.close()
+
+
+def test_invalid_synchronous_level(db_path: Path) -> None:
+    with pytest.raises(ValueError, match="synchronous"):
+        SQLiteMemoryStore(db_path, synchronous="sometimes")
+
+
+def test_migrates_a_legacy_database(db_path: Path) -> None:
+    with sqlite3.connect(db_path) as conn:
+        for statement in _MIGRATIONS[0]:
+            conn.execute(statement)
+        conn.execute(
+            "INSERT INTO steps (iteration, plan, result, reflection, score, description, outcome) "
+            "VALUES (1, ?, '{}', '{}', 0.5, 'old', 'ok')",
+            (json.dumps({"action": "git"}),),
+        )
+    conn.close()
+
+    store = SQLiteMemoryStore(db_path)
+    try:
+        assert store.conn.execute("PRAGMA user_version").fetchone()[0] == len(_MIGRATIONS)
+        assert store.conn.execute("SELECT action FROM steps").fetchone()[0] == "git"
+        indexes = {row[1] for row in store.conn.execute("PRAGMA index_list(steps)")}
+        assert {"idx_steps_run_iteration", "idx_steps_action"} <= indexes
+        [step] = store.get_history()
+        assert step["description"] == "old"
+        assert step["run_id"] is None
+    finally:
+        store.close()
+
+    # Reopening an up-to-date database is a no-op
+    SQLiteMemoryStore(db_path).close()
+
+
+def test_steps_are_written_in_batches(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path, batch_size=3, flush_interval=60)
+    try:
+        store.add_step(_step(1))
+        store.add_step(_step(2))
+        assert _count_steps(db_path) == 0
+        store.add_step(_step(3))
+        assert _count_steps(db_path) == 3
+        store.add_step(_step(4))
+        assert _count_steps(db_path) == 3
+    finally:
+        store.close()
+    assert _count_steps(db_path) == 4
+
+
+def test_reads_see_queued_steps(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path, batch_size=100, flush_interval=60)
+    try:
+        store.add_step(_step(1))
+        assert [step["iteration"] for step in store.get_history()] == [1]
+    finally:
+        store.close()
+
+
+def test_flush_interval_bounds_how_long_steps_wait(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path, batch_size=100, flush_interval=0)
+    try:
+        store.add_step(_step(1))
+        assert _count_steps(db_path) == 1
+    finally:
+        store.close()
+
+
+def test_concurrent_stores_share_a_file(db_path: Path) -> None:
+    first = SQLiteMemoryStore(db_path, batch_size=1)
+    second = SQLiteMemoryStore(db_path, batch_size=1)
+    try:
+        first.add_step(_step(1))
+        second.add_step(_step(2))
+        assert sorted(step["iteration"] for step in first.get_history()) == [1, 2]
+    finally:
+        first.close()
+        second.close()
+
+
+def _record_run(store: SQLiteMemoryStore, goal: str, steps: int, status: str = "achieved", **step: Any) -> str:
+    run_id = store.start_run(goal, repo="/repo")
+    for iteration in range(1, steps + 1):
+        store.add_step(_step(iteration, run_id=run_id, **step))
+    store.finish_run(run_id, status, steps)
+    return run_id
+
+
+def test_runs_are_recorded_against_goals(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path)
+    try:
+        first = _record_run(store, "fix the build", 2)
+        second = _record_run(store, "fix the build", 1, status="failed")
+        other = _record_run(store, "add docs", 1)
+        assert store.conn.execute("SELECT COUNT(*) FROM goals").fetchone()[0] == 2
+
+        run = store.get_run(first)
+        assert run is not None
+        assert (run["goal"], run["repo"], run["status"], run["iterations"]) == ("fix the build", "/repo", "achieved", 2)
+        assert run["finished_at"] is not None
+        assert store.get_run("missing") is None
+
+        assert [run["id"] for run in store.iter_runs()] == [other, second, first]
+        assert [run["id"] for run in store.iter_runs(goal="fix the build")] == [second, first]
+        assert [run["id"] for run in store.iter_runs(status="failed")] == [second]
+
+        store.resume_run(second)
+        resumed = store.get_run(second)
+        assert resumed is not None
+        assert (resumed["status"], resumed["finished_at"]) == ("running", None)
+    finally:
+        store.close()
+
+
+def test_iter_history_pages_by_id(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path)
+    try:
+        _record_run(store, "goal", 7)
+        queries: list[str] = []
+        store.conn.set_trace_callback(queries.append)
+
+        newest = store.iter_history(page_size=3)
+        assert [step["iteration"] for step in (next(newest), next(newest))] == [7, 6]
+        assert sum(query.startswith("SELECT") for query in queries) == 1
+        assert [step["iteration"] for step in newest] == [5, 4, 3, 2, 1]
+        assert [step["iteration"] for step in store.iter_history(page_size=3, newest_first=False)] == list(range(1, 8))
+    finally:
+        store.close()
+
+
+def test_iter_history_filters(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path)
+    try:
+        build = _record_run(store, "fix the build", 2, action="bash", score=0.2)
+        _record_run(store, "add docs", 3, action="mcp", score=0.9)
+
+        assert {step["run_id"] for step in store.iter_history(run_id=build)} == {build}
+        assert len(list(store.iter_history(goal="add docs"))) == 3
+        assert len(list(store.iter_history(action="bash"))) == 2
+        assert len(list(store.iter_history(min_score=0.5))) == 3
+        assert len(list(store.iter_history(max_score=0.5))) == 2
+        assert list(store.iter_history(goal="add docs", action="bash")) == []
+    finally:
+        store.close()
+
+
+def test_get_history_limits(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path)
+    try:
+        _record_run(store, "goal", 5)
+        assert [step["iteration"] for step in store.get_history(limit=2)] == [5, 4]
+        assert len(store.get_history(limit=50)) == 5
+        assert store.get_history(limit=0) == []
+        with pytest.raises(ValueError, match="page_size"):
+            list(store.iter_history(page_size=0))
+    finally:
+        store.close()
+
+
+def test_prune_keeps_the_newest_finished_runs(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path)
+    try:
+        old = _record_run(store, "old goal", 2)
+        kept = _record_run(store, "goal", 1)
+        running = store.start_run("goal")
+        store.add_step(_step(1, run_id=running))
+
+        assert store.prune(keep_runs=1) == 1
+        assert store.get_run(old) is None
+        assert {run["id"] for run in store.iter_runs()} == {kept, running}
+        assert list(store.iter_history(run_id=old)) == []
+        assert store.conn.execute("SELECT text FROM goals").fetchall() == [("goal",)]
+
+        store.conn.execute("UPDATE runs SET started_at = datetime('now', '-10 days')")
+        store.conn.commit()
+        assert store.prune(older_than_days=5) == 1
+        assert [run["id"] for run in store.iter_runs()] == [running]
+    finally:
+        store.close()
+
+
+def test_large_results_are_stored_once_as_blobs(db_path: Path) -> None:
+    big = "line of output\n" * 1000
+    store = SQLiteMemoryStore(db_path, blob_threshold=1024)
+    try:
+        for iteration in (1, 2):
+            store.add_step(_step(iteration, result={"stdout": big, "stderr": "short", "files": [big]}))
+        store.flush()
+        codec, size, data = store.conn.execute("SELECT codec, size, data FROM blobs").fetchone()
+        assert store.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+        assert (codec, size) == ("zlib", len(big))
+        assert len(data) < len(big) // 10
+
+        stored = json.loads(store.conn.execute("SELECT result FROM steps LIMIT 1").fetchone()[0])
+        assert stored["stdout"] == {"$blob": stored["files"][0]["$blob"], "size": len(big)}
+        assert stored["stderr"] == "short"
+    finally:
+        store.close()
+
+
+def test_blob_fields_load_on_access(db_path: Path) -> None:
+    big = "x" * 5000
+    store = SQLiteMemoryStore(db_path)
+    try:
+        store.add_step(_step(1, result={"stdout": big, "nested": {"files": [big]}, "code": 0}))
+        [step] = store.get_history()
+        result = step["result"]
+        queries: list[str] = []
+        store.conn.set_trace_callback(queries.append)
+        assert result["code"] == 0
+        assert queries == []
+        assert result["stdout"] == big
+        assert result.get("nested")["files"] == [big]
+        assert result.get("missing", "default") == "default"
+        assert dict(result.items())["stdout"] == big
+    finally:
+        store.close()
+
+
+def test_zstd_codec(db_path: Path) -> None:
+    pytest.importorskip("zstandard")
+    big = "zstd compressed output " * 500
+    store = SQLiteMemoryStore(db_path, compression="zstd")
+    try:
+        store.add_step(_step(1, result={"stdout": big}))
+        [step] = store.get_history()
+        assert step["result"]["stdout"] == big
+        assert store.conn.execute("SELECT codec FROM blobs").fetchone()[0] == "zstd"
+    finally:
+        store.close()
+
+
+def test_invalid_compression(db_path: Path) -> None:
+    with pytest.raises(ValueError, match="compression"):
+        SQLiteMemoryStore(db_path, compression="lz4")
+
+
+def test_vacuum_collects_unreferenced_blobs(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path)
+    try:
+        old = _record_run(store, "old", 1, result={"stdout": "a" * 5000})
+        shared = {"stdout": "b" * 5000}
+        _record_run(store, "old", 1, result=shared)
+        kept = _record_run(store, "new", 1, result=shared)
+        assert store.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 2
+
+        assert store.prune(keep_runs=2) == 1
+        assert store.get_run(old) is None
+        assert store.vacuum()["blobs_deleted"] == 1
+        [step] = store.get_history(run_id=kept)
+        assert step["result"]["stdout"] == "b" * 5000
+
+        # A blob collected earlier is written again when it reappears
+        _record_run(store, "again", 1, result={"stdout": "a" * 5000})
+        assert store.get_history(limit=1)[0]["result"]["stdout"] == "a" * 5000
+    finally:
+        store.close()
+
+
+def test_vacuum_drops_oldest_runs_to_fit_a_size_budget(db_path: Path) -> None:
+    store = SQLiteMemoryStore(db_path, blob_threshold=1 << 30)
+    try:
+        runs = [_record_run(store, f"goal {n}", 20, result={"stdout": f"{n}" * 2000}) for n in range(8)]
+        size = store.vacuum()["size"]
+        # Runs are dropped four at a time, oldest first
+        report = store.vacuum(max_bytes=size * 3 // 5)
+        assert report["runs_deleted"] == 4
+        assert report["size"] <= size * 3 // 5
+        assert store.get_run(runs[-1]) is not None
+        assert store.get_run(runs[0]) is None
+    finally:
+        store.close()